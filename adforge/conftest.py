@@ -0,0 +1,228 @@
+"""
+Shared Playwright harness for the AdForge UI tests
+One Chromium per test process, one login per run (saved as storage_state and
+reused by every isolated browser context), and a localhost stand-in for the
+Supabase/Drive backends (stub_backend.py) so runs need no network access.
+The stub (and `next dev`, when asked) start the first time a browser test
+needs them, so runs of the non-browser tests never touch them.
+
+Run:
+    pytest -n auto                         # parallel across cores (pytest-xdist)
+    ADFORGE_E2E_START_SERVER=1 pytest -n auto
+                                           # also boot `next dev` against the stub
+
+Environment:
+    ADFORGE_E2E_BASE_URL      App under test (default http://localhost:3000). When the
+                              server is started separately it must point its
+                              NEXT_PUBLIC_SUPABASE_URL at the stub (see stub_backend.py).
+    ADFORGE_E2E_SUPABASE_URL  Use an existing backend instead of starting the stub
+    ADFORGE_E2E_EMAIL / ADFORGE_E2E_PASSWORD / ADFORGE_E2E_CATEGORY_ID
+                              Login and category for a real backend
+    ADFORGE_E2E_HEADED=1      Show the browser
+"""
+
+import fcntl
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlparse
+
+import pytest
+
+from stub_backend import DEFAULT_PORT, STUB_CATEGORY_ID, STUB_EMAIL, STUB_PASSWORD
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'scripts'))
+
+from compositor.shared_state import pid_alive  # noqa: E402
+BASE_URL = os.environ.get('ADFORGE_E2E_BASE_URL', 'http://localhost:3000')
+SUPABASE_URL = os.environ.get('ADFORGE_E2E_SUPABASE_URL', f'http://127.0.0.1:{DEFAULT_PORT}')
+USE_STUB = 'ADFORGE_E2E_SUPABASE_URL' not in os.environ
+EMAIL = os.environ.get('ADFORGE_E2E_EMAIL', STUB_EMAIL)
+PASSWORD = os.environ.get('ADFORGE_E2E_PASSWORD', STUB_PASSWORD)
+CATEGORY_ID = os.environ.get('ADFORGE_E2E_CATEGORY_ID', STUB_CATEGORY_ID)
+VIEWPORT = {'width': 1920, 'height': 1080}
+SCREENSHOTS_ROOT = '/tmp/adforge_e2e'
+
+
+def _responds(url):
+    """True once url answers at all (any HTTP status counts)"""
+    try:
+        urllib.request.urlopen(url, timeout=2).close()
+        return True
+    except urllib.error.HTTPError:
+        return True
+    except OSError:
+        return False
+
+
+def _wait_until_up(url, timeout_s):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if _responds(url):
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f'{url} did not come up within {timeout_s}s')
+
+
+def _start_service(run_dir, name, url, timeout_s, args, **popen_kwargs):
+    """
+    Start a service shared by the whole run unless url already answers
+
+    The first worker to get here starts it (under a lock in run_dir) and
+    records its pid; pytest_unconfigure on the controller stops it, so it
+    outlives the worker that happened to start it.
+    """
+    with open(os.path.join(run_dir, f'{name}.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if _responds(url):
+            return
+        process = subprocess.Popen(args, **popen_kwargs)
+        with open(os.path.join(run_dir, f'{name}.pid'), 'w') as f:
+            f.write(str(process.pid))
+        _wait_until_up(url, timeout_s)
+
+
+def _stop_service(run_dir, name, timeout_s=10):
+    """Stop a service recorded by _start_service (possibly another process's child)"""
+    try:
+        with open(os.path.join(run_dir, f'{name}.pid')) as f:
+            pid = int(f.read())
+        os.kill(pid, signal.SIGTERM)
+    except (FileNotFoundError, ValueError, ProcessLookupError):
+        return
+
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            # Reaps it when this process started it (runs without xdist)
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                return
+        except ChildProcessError:
+            if not pid_alive(pid):
+                return
+        time.sleep(0.1)
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def pytest_configure(config):
+    # Only the controller (or a non-xdist run) owns the run directory
+    if hasattr(config, 'workerinput'):
+        return
+    config.adforge_run_dir = tempfile.mkdtemp(prefix='adforge-e2e-')
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Hand the controller's run directory to each xdist worker"""
+    node.workerinput['adforge_run_dir'] = node.config.adforge_run_dir
+
+
+def pytest_unconfigure(config):
+    if hasattr(config, 'workerinput'):
+        return
+    for name in ('next', 'stub'):
+        _stop_service(config.adforge_run_dir, name)
+
+
+@pytest.fixture(scope='session')
+def run_dir(pytestconfig):
+    """Directory shared by all workers of this run (saved login state lives here)"""
+    if hasattr(pytestconfig, 'workerinput'):
+        return pytestconfig.workerinput['adforge_run_dir']
+    return pytestconfig.adforge_run_dir
+
+
+@pytest.fixture(scope='session')
+def services(run_dir):
+    """The stub backend, plus `next dev` with ADFORGE_E2E_START_SERVER=1, started on first use"""
+    pytest.importorskip('playwright.sync_api')
+    if USE_STUB:
+        _start_service(
+            run_dir, 'stub', f'{SUPABASE_URL}/health', 10,
+            [sys.executable, os.path.join(HERE, 'stub_backend.py'), '--port', str(DEFAULT_PORT)],
+            stdout=subprocess.DEVNULL,
+        )
+    if os.environ.get('ADFORGE_E2E_START_SERVER') == '1':
+        env = {
+            **os.environ,
+            'NEXT_PUBLIC_SUPABASE_URL': SUPABASE_URL,
+            'NEXT_PUBLIC_SUPABASE_ANON_KEY': os.environ.get('NEXT_PUBLIC_SUPABASE_ANON_KEY', 'stub-anon-key'),
+        }
+        port = str(urlparse(BASE_URL).port or 3000)
+        _start_service(
+            run_dir, 'next', f'{BASE_URL}/auth/login', 180,
+            ['npx', 'next', 'dev', '-p', port],
+            cwd=HERE,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+@pytest.fixture(scope='session')
+def browser(services):
+    """One Chromium for the whole test process"""
+    sync_api = pytest.importorskip('playwright.sync_api')
+    with sync_api.sync_playwright() as p:
+        browser = p.chromium.launch(headless=os.environ.get('ADFORGE_E2E_HEADED') != '1')
+        yield browser
+        browser.close()
+
+
+@pytest.fixture(scope='session')
+def auth_state(browser, run_dir):
+    """Log in once per run and share the storage_state file across workers"""
+    path = os.path.join(run_dir, 'storage_state.json')
+    with open(f'{path}.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.exists(path):
+            context = browser.new_context(base_url=BASE_URL, viewport=VIEWPORT)
+            page = context.new_page()
+            page.goto('/auth/login')
+            page.fill('input[type="email"]', EMAIL)
+            page.fill('input[type="password"]', PASSWORD)
+            page.click('button[type="submit"]')
+            page.wait_for_url(lambda url: '/auth/' not in url)
+            context.storage_state(path=path)
+            context.close()
+    return path
+
+
+@pytest.fixture
+def anon_page(browser):
+    """Page in a fresh, unauthenticated context"""
+    context = browser.new_context(base_url=BASE_URL, viewport=VIEWPORT)
+    page = context.new_page()
+    yield page
+    context.close()
+
+
+@pytest.fixture
+def page(browser, auth_state):
+    """Page in a fresh context that starts logged in"""
+    context = browser.new_context(base_url=BASE_URL, viewport=VIEWPORT, storage_state=auth_state)
+    page = context.new_page()
+    yield page
+    context.close()
+
+
+@pytest.fixture
+def category_id():
+    return CATEGORY_ID
+
+
+@pytest.fixture
+def screenshots_dir(request):
+    """Per-module screenshot folder under /tmp/adforge_e2e"""
+    path = os.path.join(SCREENSHOTS_ROOT, request.module.__name__)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,416 @@
+"""
+Golden-image harness for the compositor
+Renders a fixed corpus of templates in all four formats from deterministic
+local fixtures (generated here, loaded through file:// URLs) and a pinned font,
+and compares each render against the reference PNG in golden/ with PSNR and
+SSIM. Every template carries its own tolerances (lossless templates must match
+bit for bit); a failing case writes the actual render and a diff heatmap so a
+reviewer can see what moved.
+
+Render paths that must match the single-render output are listed per template
+and compared against the same golden, so an optimized path is checked against
+the reference path's pixels:
+    single    - composite_final_asset, the reference
+    variants  - render_copy_variants, after another copy dirtied the canvas
+    cached    - a second render from the shared decoded-image cache
+                (what ADFORGE_IMAGE_CACHE_DIR turns on)
+    animated  - the last frame of a lossless animated WebP whose keyframes
+                settle before it ends
+
+Usage:
+    pytest test_golden_images.py                 # run as tests
+    python3 golden_images.py                     # table of metrics, heatmaps in /tmp/adforge_golden
+    python3 golden_images.py --update            # re-render the goldens (review the diff!)
+    python3 golden_images.py --cases text_stack  # only cases whose id contains this
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(HERE, 'golden')
+OUTPUT_DIR = '/tmp/adforge_golden'
+FONT_PATH = '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'
+
+FORMATS = {
+    '1:1': (1080, 1080),
+    '16:9': (1920, 1080),
+    '9:16': (1080, 1920),
+    '4:5': (1080, 1350),
+}
+
+# Lossless sources must reproduce exactly; JPEG decoders differ slightly across libjpeg builds
+EXACT = {'exact': True}
+JPEG = {'min_psnr': 40.0, 'min_ssim': 0.99}
+
+SSIM_WINDOW = 7
+# Channel differences at or below this are not counted as changed pixels
+CHANGED_THRESHOLD = 2
+HEATMAP_GAIN = 8
+# Room for the 2400 px background and a logo
+CACHE_BYTES = 64 * 1024 * 1024
+
+COPY = {
+    'headline': 'Sunshine in every bite',
+    'body': 'Zest & zing, 30 gummies a pack',
+    'cta': 'Shop now',
+}
+
+# Every animated layer is back at rest (full opacity, no offset) from 900 ms on
+ANIMATION = {
+    'duration_ms': 1500,
+    'fps': 10,
+    'format': 'webp',
+    'lossless': True,
+    'keyframes': {
+        'headline': [{'t': 0, 'opacity': 0, 'dy': 4}, {'t': 600, 'opacity': 1, 'dy': 0, 'easing': 'ease_out'}],
+        'logo': [{'t': 0, 'dx': -20}, {'t': 500, 'dx': 0}],
+        'cta': [{'t': 300, 'opacity': 0.2}, {'t': 900, 'opacity': 1, 'easing': 'ease_in_out'}],
+    },
+}
+
+CORPUS = {
+    'headline_logo': {
+        'background': 'background.png',
+        'logo': 'logo_rgba.png',
+        'tolerance': EXACT,
+        'paths': ['single', 'variants', 'cached', 'animated'],
+        'template': {
+            'layers': [
+                {'id': 'bg', 'type': 'background', 'x': 0, 'y': 0, 'width': 100, 'height': 100, 'z_index': 0},
+                {'id': 'headline', 'type': 'text', 'name': 'headline', 'x': 8, 'y': 74, 'width': 84, 'height': 12,
+                 'z_index': 2, 'font_size': 56, 'color': '#ffffff', 'text_align': 'center'},
+                {'id': 'logo', 'type': 'logo', 'x': 5, 'y': 5, 'width': 24, 'height': 10, 'z_index': 3},
+            ],
+            'safe_zones': [],
+        },
+    },
+    'text_stack': {
+        'background': 'background.png',
+        'logo': None,
+        'tolerance': EXACT,
+        'paths': ['single', 'variants', 'animated'],
+        'template': {
+            'layers': [
+                {'id': 'bg', 'type': 'background', 'x': 0, 'y': 0, 'width': 100, 'height': 100, 'z_index': 0},
+                {'id': 'headline', 'type': 'text', 'name': 'headline', 'x': 6, 'y': 10, 'width': 88, 'height': 10,
+                 'z_index': 2, 'font_size': 48, 'color': '#111111', 'background_color': '#ffffff', 'text_align': 'left'},
+                {'id': 'body', 'type': 'text', 'name': 'body', 'x': 6, 'y': 24, 'width': 88, 'height': 8,
+                 'z_index': 3, 'font_size': 32, 'color': '#fefae0', 'text_align': 'right'},
+                {'id': 'cta', 'type': 'text', 'name': 'cta', 'x': 30, 'y': 82, 'width': 40, 'height': 8,
+                 'z_index': 4, 'font_size': 40, 'color': '#ffffff', 'background_color': '#e63946', 'text_align': 'center'},
+            ],
+            'safe_zones': [],
+        },
+    },
+    'safe_zone_layout': {
+        'background': 'background.jpg',
+        'logo': 'logo_palette.png',
+        'tolerance': JPEG,
+        'paths': ['single', 'cached'],
+        'template': {
+            'layers': [
+                {'id': 'bg', 'type': 'background', 'x': 0, 'y': 0, 'width': 100, 'height': 100, 'z_index': 0},
+                {'id': 'headline', 'type': 'text', 'name': 'headline', 'x': 10, 'y': 60, 'width': 80, 'height': 12,
+                 'z_index': 2, 'font_size': 52, 'color': '#1d3557', 'text_align': 'center'},
+                {'id': 'logo', 'type': 'logo', 'x': 70, 'y': 84, 'width': 22, 'height': 10, 'z_index': 3},
+            ],
+            'safe_zones': [
+                {'id': 'content', 'name': 'Content', 'type': 'safe', 'x': 5, 'y': 5, 'width': 90, 'height': 90},
+            ],
+        },
+    },
+    'jpeg_opaque_logo': {
+        'background': 'background.jpg',
+        'logo': 'logo_rgb.png',
+        'tolerance': JPEG,
+        'paths': ['single', 'cached'],
+        'template': {
+            'layers': [
+                {'id': 'bg', 'type': 'background', 'x': 0, 'y': 0, 'width': 100, 'height': 100, 'z_index': 0},
+                {'id': 'logo', 'type': 'logo', 'x': 35, 'y': 40, 'width': 30, 'height': 14, 'z_index': 3},
+            ],
+            'safe_zones': [],
+        },
+    },
+}
+
+
+# ─── Fixtures ────────────────────────────────────────────────────────────────
+
+def _background(size=2400):
+    """
+    Gradients with a few hard-edged panels, from integer arithmetic only (bit-identical everywhere)
+
+    The edges exercise resampling; the rest is smooth so the goldens stay small.
+    """
+    y, x = np.mgrid[0:size, 0:size]
+    panels = ((x // 600 + y // 800) % 2).astype(np.int32)
+    r = 40 + x * 160 // size + panels * 30
+    g = 90 + y * 120 // size
+    b = 150 - (x + y) * 100 // (2 * size) + panels * 40
+    return Image.fromarray(np.stack([r, g, b], axis=2).clip(0, 255).astype(np.uint8))
+
+
+def _logo():
+    """A two-tone badge with a soft 8 px alpha edge"""
+    width, height = 600, 260
+    y, x = np.mgrid[0:height, 0:width]
+    edge = np.minimum(np.minimum(x, width - 1 - x), np.minimum(y, height - 1 - y))
+    alpha = (edge * 32).clip(0, 255)
+    inner = (x > width // 3).astype(np.int32)
+    r = np.where(inner, 230, 29)
+    g = np.where(inner, 57, 53)
+    b = np.where(inner, 70, 87)
+    return Image.fromarray(np.stack([r, g, b, alpha], axis=2).astype(np.uint8))
+
+
+def write_fixtures(directory):
+    """Write the fixture images and return {name: file:// URL}"""
+    os.makedirs(directory, exist_ok=True)
+    background = _background()
+    logo = _logo()
+
+    palette = logo.convert('RGB').quantize(colors=16, method=Image.Quantize.MEDIANCUT)
+    # Palette logo with a transparent index for the fully transparent border
+    palette_indices = np.asarray(palette).copy()
+    palette_indices[np.asarray(logo.getchannel('A')) == 0] = 15
+    palette_logo = Image.fromarray(palette_indices.astype(np.uint8), 'P')
+    palette_logo.putpalette(palette.getpalette())
+
+    images = {
+        'background.png': lambda path: background.save(path, 'PNG'),
+        'background.jpg': lambda path: background.save(path, 'JPEG', quality=90),
+        'logo_rgba.png': lambda path: logo.save(path, 'PNG'),
+        'logo_rgb.png': lambda path: logo.convert('RGB').save(path, 'PNG'),
+        'logo_palette.png': lambda path: palette_logo.save(path, 'PNG', transparency=15),
+    }
+    urls = {}
+    for name, save in images.items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            save(path)
+        urls[name] = f'file://{path}'
+    return urls
+
+
+# ─── Cases and rendering ─────────────────────────────────────────────────────
+
+def cases():
+    """Every (case id, template name, format, render path)"""
+    return [
+        (f"{name}_{fmt.replace(':', 'x')}" + ('' if path == 'single' else f'_{path}'), name, fmt, path)
+        for name, spec in CORPUS.items()
+        for fmt in FORMATS
+        for path in spec['paths']
+    ]
+
+
+def golden_path(name, fmt):
+    return os.path.join(GOLDEN_DIR, f"{name}_{fmt.replace(':', 'x')}.png")
+
+
+def _use_compositor():
+    """Make the compositor importable, with the pinned font"""
+    os.environ['ADFORGE_FONT_PATH'] = FONT_PATH
+    scripts = os.path.join(HERE, 'scripts')
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+
+
+def render(name, fmt, path, fixture_urls, work_dir):
+    """Render one case through the given render path and return it as an RGB image"""
+    _use_compositor()
+    from compositor.animated import render_animated_asset
+    from compositor.render import composite_final_asset
+    from compositor.variants import render_copy_variants
+
+    spec = CORPUS[name]
+    width, height = FORMATS[fmt]
+
+    def template():
+        return json.loads(json.dumps(spec['template']))
+
+    background = fixture_urls[spec['background']]
+    logo = fixture_urls[spec['logo']] if spec['logo'] else None
+    output = os.path.join(work_dir, f"{name}_{fmt.replace(':', 'x')}_{path}.png")
+
+    # The compositor logs every layer to stderr; keep the harness output readable
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stderr(quiet):
+        if path == 'single':
+            composite_final_asset(template(), background, COPY, logo, output, width, height)
+        elif path == 'variants':
+            # The case's copy rendered second, after a different copy dirtied the canvas
+            decoy = {key: f'{value} !' for key, value in COPY.items()}
+            render_copy_variants(template(), background, [
+                {'id': 'decoy', 'copy_text': decoy, 'output_path': f'{output}.decoy.png'},
+                {'id': 'case', 'copy_text': COPY, 'output_path': output},
+            ], logo, width, height)
+        elif path == 'cached':
+            from compositor.image_cache import SharedImageCache
+
+            # The first render decodes into the cache; the case is the second, built from cached pixels
+            cache = SharedImageCache(os.path.join(work_dir, 'image-cache'), capacity_bytes=CACHE_BYTES)
+            for target in (f'{output}.warm.png', output):
+                try:
+                    composite_final_asset(template(), background, COPY, logo, target, width, height, image_cache=cache)
+                finally:
+                    cache.release_all()
+            if cache.stats()['hits'] == 0:
+                raise RuntimeError('The second render did not read from the shared image cache')
+        elif path == 'animated':
+            output, report = render_animated_asset(
+                template(), background, COPY, ANIMATION, logo, f'{output[:-len(".png")]}.webp', width, height
+            )
+            if report['format'] != 'webp':
+                raise RuntimeError('The animated path needs animated WebP support in Pillow (GIF is not lossless)')
+        else:
+            raise ValueError(f'Unknown render path {path}')
+
+    with Image.open(output) as image:
+        # The at-rest final frame of an animation; a still image has only this one
+        image.seek(getattr(image, 'n_frames', 1) - 1)
+        return image.convert('RGB')
+
+
+# ─── Metrics ─────────────────────────────────────────────────────────────────
+
+def psnr(expected, actual):
+    """Peak signal-to-noise ratio in dB (inf for identical images)"""
+    mse = np.mean((expected.astype(np.float64) - actual.astype(np.float64)) ** 2)
+    return float('inf') if mse == 0 else float(10 * np.log10(255.0 ** 2 / mse))
+
+
+def _window_mean(values, size):
+    """Mean over every size x size window ('valid' positions) via a summed-area table"""
+    table = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    sums = table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+    return sums / (size * size)
+
+
+def _luma(rgb):
+    return rgb.astype(np.float64) @ np.array([0.299, 0.587, 0.114])
+
+
+def ssim(expected, actual, window=SSIM_WINDOW):
+    """
+    Mean structural similarity of the luminance
+
+    Uniform window with sample covariance (the scikit-image defaults), computed
+    with summed-area tables so the cost is linear in the pixel count.
+    """
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    correction = window * window / (window * window - 1)
+    x, y = _luma(expected), _luma(actual)
+    mx, my = _window_mean(x, window), _window_mean(y, window)
+    vx = (_window_mean(x * x, window) - mx * mx) * correction
+    vy = (_window_mean(y * y, window) - my * my) * correction
+    cov = (_window_mean(x * y, window) - mx * my) * correction
+    ssim_map = ((2 * mx * my + c1) * (2 * cov + c2)) / ((mx * mx + my * my + c1) * (vx + vy + c2))
+    return float(ssim_map.mean())
+
+
+def compare(expected, actual):
+    """PSNR, SSIM and changed-pixel stats of two same-size RGB images"""
+    if expected.size != actual.size:
+        return {'size_mismatch': [expected.size, actual.size], 'identical': False, 'psnr': 0.0, 'ssim': 0.0}
+    a = np.asarray(expected)
+    b = np.asarray(actual)
+    if np.array_equal(a, b):
+        return {'identical': True, 'psnr': float('inf'), 'ssim': 1.0, 'max_diff': 0, 'changed_percent': 0.0}
+    diff = np.abs(a.astype(np.int16) - b.astype(np.int16)).max(axis=2)
+    return {
+        'identical': False,
+        'psnr': round(psnr(a, b), 2),
+        'ssim': round(ssim(a, b), 5),
+        'max_diff': int(diff.max()),
+        'changed_percent': round(100.0 * float(np.count_nonzero(diff > CHANGED_THRESHOLD)) / diff.size, 3),
+    }
+
+
+def write_heatmap(expected, actual, path):
+    """Per-pixel max channel difference, amplified (black -> red -> yellow) over a dimmed golden"""
+    a = np.asarray(expected).astype(np.int16)
+    b = np.asarray(actual).astype(np.int16)
+    intensity = (np.abs(a - b).max(axis=2) * HEATMAP_GAIN).clip(0, 255)
+    heat = np.stack([intensity, (intensity * 2 - 255).clip(0, 255), np.zeros_like(intensity)], axis=2)
+    backdrop = np.repeat(np.asarray(expected.convert('L'), dtype=np.int16)[:, :, None] // 4, 3, axis=2)
+    out = np.where(intensity[:, :, None] > 0, heat, backdrop).astype(np.uint8)
+    Image.fromarray(out).save(path)
+
+
+def passes(name, metrics):
+    tolerance = CORPUS[name]['tolerance']
+    if tolerance.get('exact'):
+        # Any changed pixel fails, however little it moves PSNR/SSIM
+        return metrics['identical']
+    return 'size_mismatch' not in metrics and metrics['psnr'] >= tolerance['min_psnr'] and metrics['ssim'] >= tolerance['min_ssim']
+
+
+def check_case(case_id, name, fmt, path, fixture_urls, work_dir, output_dir=OUTPUT_DIR):
+    """
+    Render a case and compare it with its golden
+
+    Returns:
+        (passed, metrics); on failure the render and its heatmap are saved in output_dir
+    """
+    actual = render(name, fmt, path, fixture_urls, work_dir)
+    with Image.open(golden_path(name, fmt)) as golden:
+        expected = golden.convert('RGB')
+    metrics = compare(expected, actual)
+    passed = passes(name, metrics)
+    if not passed:
+        os.makedirs(output_dir, exist_ok=True)
+        actual.save(os.path.join(output_dir, f'{case_id}_actual.png'))
+        if 'size_mismatch' not in metrics:
+            write_heatmap(expected, actual, os.path.join(output_dir, f'{case_id}_diff.png'))
+        metrics['artifacts'] = output_dir
+    return passed, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compositor golden-image harness')
+    parser.add_argument('--update', action='store_true', help='Re-render the goldens from the reference (single) path')
+    parser.add_argument('--cases', help='Only cases whose id contains this')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help='Where failing renders and heatmaps go')
+    args = parser.parse_args()
+
+    if not os.path.exists(FONT_PATH):
+        sys.exit(f'❌ Golden renders need {FONT_PATH} (fonts-dejavu-core)')
+
+    selected = [case for case in cases() if not args.cases or args.cases in case[0]]
+    work_dir = tempfile.mkdtemp(prefix='adforge-golden-')
+    fixture_urls = write_fixtures(os.path.join(work_dir, 'fixtures'))
+
+    if args.update:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        for case_id, name, fmt, path in selected:
+            if path == 'single':
+                render(name, fmt, path, fixture_urls, work_dir).save(golden_path(name, fmt), optimize=True)
+                sys.stderr.write(f'🖼️  {golden_path(name, fmt)}\n')
+        return
+
+    failures = 0
+    sys.stderr.write(f"{'case':<36} {'psnr':>8} {'ssim':>8} {'max':>4} {'changed%':>9}\n")
+    for case_id, name, fmt, path in selected:
+        passed, metrics = check_case(case_id, name, fmt, path, fixture_urls, work_dir, args.output_dir)
+        failures += not passed
+        sys.stderr.write(
+            f"{case_id:<36} {metrics['psnr']:>8} {metrics['ssim']:>8} {metrics.get('max_diff', '-'):>4} "
+            f"{metrics.get('changed_percent', '-'):>9} {'✅' if passed else '❌'}\n"
+        )
+    if failures:
+        sys.stderr.write(f'\n❌ {failures} case(s) outside tolerance; renders and heatmaps in {args.output_dir}\n')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
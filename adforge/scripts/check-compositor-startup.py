@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Cold-start budget check for composite_final_asset.py
+Every final asset spawns a fresh python3, so interpreter startup plus module
+imports are paid on each render. This runs the script the way the route does
+(`python3 composite_final_asset.py` with a job on stdin; a trivial layer-less
+job, so the time is startup rather than rendering), measures it with
+-X importtime and wall-clock timing and exits non-zero when a budget is
+exceeded or when a module that should be imported lazily shows up at startup.
+Running the script as __main__ also counts compiling it, which no .pyc saves.
+
+Usage:
+    python3 scripts/check-compositor-startup.py [--runs 10] [--budget-ms 120] [--import-budget-ms 60]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(SCRIPTS_DIR, 'composite_final_asset.py')
+MODULE = 'compositor.cli'
+
+# Only imported when a layer needs them — must never appear at startup
+LAZY_MODULES = [
+    'PIL.ImageFont', 'PIL.ImageDraw', 'urllib.request',
+    'compositor.image_cache', 'compositor.safe_zones', 'compositor.single_flight',
+    'compositor.animation', 'compositor.animated', 'compositor.variants', 'numpy',
+]
+
+
+def trivial_job(output_dir):
+    """A layer-less 16x16 job: nothing to download, decode or draw"""
+    return json.dumps({
+        'template_data': {'layers': []},
+        'composite_url': 'http://127.0.0.1/unused.png',
+        'copy_text': {},
+        'output_path': os.path.join(output_dir, 'startup-check.png'),
+        'width': 16,
+        'height': 16,
+    })
+
+
+def run_job(python, job, extra_args=()):
+    """Run the compositor script on job in a fresh interpreter, return (seconds, stderr)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [python, *extra_args, SCRIPT],
+        input=job,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0 or not json.loads(proc.stdout or '{}').get('success'):
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f'❌ Running {SCRIPT} failed')
+    return elapsed, proc.stderr
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into {module: (self_us, cumulative_us, depth)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        self_us = int(fields[0])
+        cumulative_us = int(fields[1])
+        raw_name = fields[2].rstrip()
+        depth = (len(raw_name) - len(raw_name.lstrip())) // 2
+        modules[raw_name.strip()] = (self_us, cumulative_us, depth)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--python', default=sys.executable, help='Interpreter to benchmark')
+    parser.add_argument('--runs', type=int, default=10, help='Timed cold starts (median is reported)')
+    parser.add_argument('--budget-ms', type=float, default=120.0, help='Max median wall time for startup')
+    parser.add_argument('--import-budget-ms', type=float, default=60.0, help='Max cumulative import time of the module')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    job = trivial_job(tempfile.mkdtemp(prefix='adforge-startup-'))
+    # Precompile the package like the Dockerfile does (imports alone may not
+    # write .pyc files, e.g. under PYTHONDONTWRITEBYTECODE), then warm the page cache
+    subprocess.run([args.python, '-m', 'compileall', '-q', os.path.join(SCRIPTS_DIR, 'compositor')], check=True)
+    run_job(args.python, job)
+
+    wall_times = [run_job(args.python, job)[0] * 1000 for _ in range(args.runs)]
+    median_ms = statistics.median(wall_times)
+
+    _, importtime_output = run_job(args.python, job, ['-X', 'importtime'])
+    modules = parse_importtime(importtime_output)
+    import_ms = modules.get(MODULE, (0, 0, 0))[1] / 1000
+
+    print(f'🚀 Compositor cold start ({args.runs} runs, {args.python})')
+    print(f'   Wall time:   median {median_ms:.1f} ms  (min {min(wall_times):.1f}, max {max(wall_times):.1f}) — budget {args.budget_ms:.0f} ms')
+    print(f'   Import time: {import_ms:.1f} ms cumulative for {MODULE} — budget {args.import_budget_ms:.0f} ms')
+
+    print('\n   Slowest imports (cumulative):')
+    slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (_, cumulative_us, depth) in slowest[:args.top]:
+        print(f'     {cumulative_us / 1000:7.1f} ms  {"  " * depth}{name}')
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f'median startup {median_ms:.1f} ms exceeds {args.budget_ms:.0f} ms')
+    if import_ms > args.import_budget_ms:
+        failures.append(f'{MODULE} imports take {import_ms:.1f} ms, budget {args.import_budget_ms:.0f} ms')
+    for name in LAZY_MODULES:
+        if name in modules:
+            failures.append(f'{name} is imported at startup but should be lazy')
+
+    if failures:
+        print('\n❌ Startup budget exceeded:')
+        for failure in failures:
+            print(f'   - {failure}')
+        return 1
+
+    print('\n✅ Startup within budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
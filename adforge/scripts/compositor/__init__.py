@@ -0,0 +1,3 @@
+"""
+Phase 6 compositing engine (composite_final_asset.py runs compositor.cli, which dispatches to the render modules)
+"""
@@ -0,0 +1,302 @@
+"""
+Memory-budgeted admission control for concurrent renders
+Each final asset runs in its own python3 process, so concurrent requests to the
+final-assets route are coordinated through a small flock-guarded ledger on disk.
+A job estimates its peak memory from the canvas size, the source dimensions
+read from the image headers and the layer list before anything is decoded, then
+waits in FIFO order until the running jobs leave room for it in the budget.
+
+Configuration:
+    ADFORGE_RENDER_MEMORY_BUDGET_MB  - budget shared by all renders (default: 60%
+                                       of the cgroup memory limit, disabled if none)
+    ADFORGE_RENDER_BUDGET_DIR        - ledger directory (default /tmp/adforge-render-budget)
+    ADFORGE_RENDER_QUEUE_TIMEOUT_S   - max wait before a queued job gives up (default 120)
+
+Run `python3 -m compositor.admission` from scripts/ to print current usage.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from compositor.layers import layer_box
+from compositor.shared_state import locked_json, pid_alive
+
+DEFAULT_LEDGER_DIR = '/tmp/adforge-render-budget'
+DEFAULT_QUEUE_TIMEOUT_S = 120
+CGROUP_BUDGET_FRACTION = 0.6
+CGROUP_LIMIT_FILES = [
+    '/sys/fs/cgroup/memory.max',                     # cgroup v2
+    '/sys/fs/cgroup/memory/memory.limit_in_bytes',   # cgroup v1
+]
+
+# PIL stores RGB, RGBA and RGBX rasters at 4 bytes per pixel
+BYTES_PER_PIXEL = 4
+# Interpreter, PIL and font state resident in every compositor process
+PROCESS_BASELINE_BYTES = 40 * 1024 * 1024
+
+POLL_INTERVAL_S = 0.05
+MAX_POLL_INTERVAL_S = 0.5
+
+
+class AdmissionTimeout(Exception):
+    """Raised when a job waits longer than the queue timeout for memory"""
+
+
+def estimate_peak_bytes(
+    template_data, width, height, background_size=None, logo_size=None, encoded_bytes=0,
+    background_copied=True, logo_copied=True, background_alpha=True, logo_alpha=True,
+):
+    """
+    Estimate the peak resident memory of one render
+
+    Mirrors composite_final_asset(): the canvas lives for the whole job, the
+    background is decoded, LANCZOS-resized (via a width-resized intermediate)
+    and the resized copy stays referenced; the logo is decoded and resized on
+    top of that; text layers allocate a glyph mask about the size of their box.
+    Before resizing, normalize_image() holds each converted step (EXIF
+    transpose, mode conversion, 16-bit scaling) next to the one it replaces,
+    so a source that is copied briefly needs twice its decoded size; resizing
+    an RGBA source likewise holds a premultiplied copy of it.
+
+    Args:
+        template_data: Template JSON with layers
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        background_size: (width, height) of the composite from its header
+        logo_size: (width, height) of the logo from its header
+        encoded_bytes: Total size of downloaded, still-encoded sources
+        background_copied: Whether normalizing the background copies it
+            (False for plain RGB and for shared-cache hits)
+        logo_copied: Whether normalizing the logo copies it
+        background_alpha: Whether the background may be RGBA when resized
+        logo_alpha: Whether the logo may be RGBA when resized
+
+    Returns:
+        Estimated peak bytes
+    """
+    canvas = width * height * BYTES_PER_PIXEL
+    layers = template_data.get('layers', [])
+    types = [layer.get('type') for layer in layers]
+
+    resident = canvas
+    peak = canvas
+
+    if 'background' in types and background_size:
+        sw, sh = background_size
+        decoded = sw * sh * BYTES_PER_PIXEL
+        intermediate = width * sh * BYTES_PER_PIXEL
+        resized = canvas
+        normalizing = 2 * decoded if background_copied else decoded
+        source = 2 * decoded if background_alpha else decoded
+        peak = max(peak, resident + normalizing, resident + source + intermediate + resized)
+        resident += resized
+
+    for layer in layers:
+        if layer.get('type') == 'logo' and logo_size:
+            _, _, lw, lh = layer_box(layer, width, height)
+            lw, lh = max(lw, 0), max(lh, 0)
+            sw, sh = logo_size
+            decoded = sw * sh * BYTES_PER_PIXEL
+            resized = lw * lh * BYTES_PER_PIXEL
+            normalizing = 2 * decoded if logo_copied else decoded
+            source = 2 * decoded if logo_alpha else decoded
+            peak = max(peak, resident + normalizing, resident + source + lw * sh * BYTES_PER_PIXEL + resized)
+        elif layer.get('type') == 'text':
+            _, _, lw, lh = layer_box(layer, width, height)
+            peak = max(peak, resident + max(lw, 0) * max(lh, 0))
+
+    return PROCESS_BASELINE_BYTES + encoded_bytes + peak
+
+
+def admit_render(
+    memory_budget, template_data, composite_url, logo_url, width, height, image_cache=None, single_flight=None,
+    extra_bytes=0,
+):
+    """
+    Reserve this render's peak memory in the shared budget before decoding anything
+
+    Source dimensions, and whether normalizing them copies, come from the
+    image headers of the downloaded bytes (or the shared cache index, whose
+    entries are already normalized), so the encoded bytes are returned for reuse.
+    extra_bytes covers buffers the estimate does not model (animation frames).
+
+    Returns:
+        (memory report dict, {url: encoded bytes})
+    """
+    from compositor.sources import fetch_image_bytes, probe_source
+
+    layer_types = {layer.get('type') for layer in template_data.get('layers', [])}
+    sources = {}
+    if 'background' in layer_types:
+        sources['background'] = composite_url
+    if 'logo' in layer_types and logo_url:
+        sources['logo'] = logo_url
+
+    encoded_sources = {}
+    sizes = {}
+    copied = {}
+    alpha = {}
+    for role, url in sources.items():
+        cached_size = image_cache.size_of(url) if image_cache is not None else None
+        if cached_size is not None:
+            sizes[role], copied[role] = cached_size, False
+            alpha[role] = image_cache.mode_of(url) != 'RGBX'
+            continue
+        encoded_sources[url] = fetch_image_bytes(url, single_flight)
+        sizes[role], copied[role], alpha[role] = probe_source(encoded_sources[url])
+        # Storing a miss in the shared cache serializes the raster once more
+        copied[role] = copied[role] or image_cache is not None
+
+    estimate = estimate_peak_bytes(
+        template_data,
+        width,
+        height,
+        background_size=sizes.get('background'),
+        logo_size=sizes.get('logo'),
+        encoded_bytes=sum(len(data) for data in encoded_sources.values()),
+        background_copied=copied.get('background', True),
+        logo_copied=copied.get('logo', True),
+        background_alpha=alpha.get('background', True),
+        logo_alpha=alpha.get('logo', True),
+    ) + extra_bytes
+    sys.stderr.write(f"🧮 Estimated peak memory {estimate / 1e6:.0f} MB, waiting for admission...\n")
+    queued_s = memory_budget.admit(estimate)
+    sys.stderr.write(f"   Admitted after {queued_s * 1000:.0f} ms\n")
+
+    report = {
+        'estimated_peak_bytes': estimate,
+        'queued_ms': round(queued_s * 1000),
+        'budget': memory_budget.usage(),
+    }
+    return report, encoded_sources
+
+
+def default_budget_bytes():
+    """Budget from the environment, else a fraction of the container memory limit"""
+    configured = os.environ.get('ADFORGE_RENDER_MEMORY_BUDGET_MB')
+    if configured:
+        return int(float(configured) * 1024 * 1024)
+
+    for path in CGROUP_LIMIT_FILES:
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+        except OSError:
+            continue
+        if raw.isdigit() and int(raw) < 1 << 60:
+            return int(int(raw) * CGROUP_BUDGET_FRACTION)
+    return None
+
+
+class MemoryBudget:
+    """Cross-process FIFO admission of render jobs against a memory budget"""
+
+    def __init__(self, budget_bytes, directory=DEFAULT_LEDGER_DIR, queue_timeout_s=DEFAULT_QUEUE_TIMEOUT_S):
+        os.makedirs(directory, exist_ok=True)
+        self.budget_bytes = budget_bytes
+        self.directory = directory
+        self.queue_timeout_s = queue_timeout_s
+        self._job_id = None
+
+    @classmethod
+    def from_env(cls):
+        """Open the budget configured by the environment, or None when there is no budget"""
+        budget = default_budget_bytes()
+        if budget is None:
+            return None
+        directory = os.environ.get('ADFORGE_RENDER_BUDGET_DIR', DEFAULT_LEDGER_DIR)
+        timeout = float(os.environ.get('ADFORGE_RENDER_QUEUE_TIMEOUT_S', DEFAULT_QUEUE_TIMEOUT_S))
+        return cls(budget, directory, timeout)
+
+    @contextmanager
+    def _ledger(self):
+        """Hold the ledger lock and yield it with dead processes purged"""
+        with locked_json(
+            os.path.join(self.directory, 'ledger.lock'),
+            os.path.join(self.directory, 'ledger.json'),
+            lambda: {'running': {}, 'queued': {}},
+        ) as ledger:
+            for section in ('running', 'queued'):
+                ledger[section] = {
+                    job_id: job for job_id, job in ledger[section].items()
+                    if pid_alive(job['pid'])
+                }
+            yield ledger
+
+    def admit(self, nbytes):
+        """
+        Block until the job fits in the budget, then reserve nbytes for it
+
+        Jobs are admitted in arrival order. A job larger than the whole budget
+        is still admitted once nothing else is running, so it cannot deadlock.
+
+        Returns:
+            Seconds spent queued
+        """
+        pid = os.getpid()
+        job_id = f"{pid}-{time.time_ns()}"
+        queued_at = time.time()
+        interval = POLL_INTERVAL_S
+
+        while True:
+            timed_out = False
+            with self._ledger() as ledger:
+                queued = ledger['queued']
+                if job_id not in queued:
+                    queued[job_id] = {'pid': pid, 'bytes': nbytes, 'queued_at': queued_at}
+                head = min(queued, key=lambda j: (queued[j]['queued_at'], j))
+                used = sum(job['bytes'] for job in ledger['running'].values())
+                fits = used + nbytes <= self.budget_bytes or not ledger['running']
+
+                if head == job_id and fits:
+                    del queued[job_id]
+                    ledger['running'][job_id] = {'pid': pid, 'bytes': nbytes, 'admitted_at': time.time()}
+                    self._job_id = job_id
+                    return time.time() - queued_at
+
+                if time.time() - queued_at > self.queue_timeout_s:
+                    del queued[job_id]
+                    timed_out = True
+
+            if timed_out:
+                raise AdmissionTimeout(
+                    f"Render needs {nbytes / 1e6:.0f} MB but only "
+                    f"{max(self.budget_bytes - used, 0) / 1e6:.0f} MB of the "
+                    f"{self.budget_bytes / 1e6:.0f} MB budget was free after "
+                    f"{self.queue_timeout_s:.0f}s"
+                )
+
+            time.sleep(interval)
+            interval = min(interval * 2, MAX_POLL_INTERVAL_S)
+
+    def release(self):
+        """Return this process's reservation to the budget"""
+        if self._job_id is None:
+            return
+        with self._ledger() as ledger:
+            ledger['running'].pop(self._job_id, None)
+        self._job_id = None
+
+    def usage(self):
+        """Current budget usage across all compositor processes"""
+        with self._ledger() as ledger:
+            running = ledger['running']
+            queued = ledger['queued']
+        return {
+            'budget_bytes': self.budget_bytes,
+            'used_bytes': sum(job['bytes'] for job in running.values()),
+            'running': len(running),
+            'queued': len(queued),
+            'queued_bytes': sum(job['bytes'] for job in queued.values()),
+        }
+
+
+if __name__ == '__main__':
+    budget = MemoryBudget.from_env()
+    if budget is None:
+        print(json.dumps({'enabled': False}))
+        sys.exit(0)
+    print(json.dumps({'enabled': True, **budget.usage()}, indent=2))
@@ -0,0 +1,243 @@
+"""
+Animated render: keyframed layers to an animated WebP/GIF (see compositor.animation)
+"""
+
+import os
+import sys
+import time
+
+from PIL import Image
+
+from compositor.layers import (
+    layer_box,
+    load_font,
+    merge_rects,
+    paste_clipped,
+    text_content_for,
+    text_origin,
+    text_sprite,
+)
+from compositor.sources import download_image, resize_source
+
+
+def render_animated_asset(
+    template_data,
+    composite_url,
+    copy_text,
+    animation,
+    logo_url=None,
+    output_path='/tmp/final_asset.webp',
+    width=1080,
+    height=1920,
+    image_cache=None,
+    encoded_sources=None,
+    ink=None,
+    single_flight=None,
+):
+    """
+    Render an animated WebP/GIF from per-layer keyframes
+
+    Every layer is turned into a sprite once (text layers once per distinct
+    copy). Layers below the first animated one are flattened into a base.
+    Each frame restores only the rectangles the animated layers covered in
+    the previous frame and cover now, then replays the layers from the first
+    animated one up inside them. Frames whose state repeats are merged into
+    the previous frame's duration, and GIF frames share one palette, with
+    only the dirty rectangles re-quantized.
+
+    Args:
+        template_data: Template JSON with layers
+        composite_url: URL to background/composite image
+        copy_text: Text content for text layers
+        animation: Animation spec (see compositor.animation)
+        logo_url: Optional URL to logo image
+        output_path: Where to save the animation (.webp or .gif)
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        image_cache: Optional SharedImageCache for decoded source images
+        encoded_sources: Optional {url: bytes} already downloaded (e.g. by admit_render)
+        ink: Optional InkCoverage that records the text/logo ink of the last
+            frame, where the layers come to rest, for safe-zone validation
+        single_flight: Optional SingleFlight to coalesce source downloads
+
+    Returns:
+        (output path, animation report dict)
+    """
+    from compositor.animation import (
+        DEFAULT_DURATION_MS,
+        DEFAULT_FPS,
+        FORMATS,
+        build_palette,
+        frame_times,
+        layer_state,
+        opacity_mask,
+        save_animation,
+        webp_animation_supported,
+    )
+
+    started = time.perf_counter()
+    encoded_sources = encoded_sources or {}
+    keyframes = animation.get('keyframes', {})
+    fps = animation.get('fps', DEFAULT_FPS)
+    duration_ms = animation.get('duration_ms', DEFAULT_DURATION_MS)
+    fmt = animation.get('format') or ('gif' if output_path.lower().endswith('.gif') else 'webp')
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown animation format '{fmt}', expected one of {', '.join(FORMATS)}")
+    if fmt == 'webp' and not webp_animation_supported():
+        sys.stderr.write("WARNING: Pillow cannot write animated WebP here, writing GIF instead\n")
+        fmt = 'gif'
+        output_path = os.path.splitext(output_path)[0] + '.gif'
+
+    sorted_layers = sorted(template_data.get('layers', []), key=lambda l: l.get('z_index', 0))
+    animated = [index for index, layer in enumerate(sorted_layers) if layer.get('id') in keyframes]
+    first_animated = animated[0] if animated else len(sorted_layers)
+
+    # Sprites: {(layer index, copy): (image, origin)}; RGBA images are pasted through their alpha
+    sprites = {}
+
+    def sprite_for(index, text=None):
+        layer = sorted_layers[index]
+        layer_type = layer.get('type')
+        if layer_type == 'text':
+            text = text if text is not None else text_content_for(layer, copy_text)
+        key = (index, text)
+        if key not in sprites:
+            x, y, lw, lh = layer_box(layer, width, height)
+            if layer_type == 'background':
+                bg_image = download_image(composite_url, image_cache, encoded_sources.get(composite_url), single_flight)
+                sprites[key] = (resize_source(bg_image, (width, height)), (0, 0))
+            elif layer_type == 'logo' and logo_url:
+                logo_image = download_image(logo_url, image_cache, encoded_sources.get(logo_url), single_flight)
+                sprites[key] = (resize_source(logo_image, (lw, lh)), (x, y))
+            elif layer_type == 'text':
+                sprites[key] = text_sprite(layer, (x, y, lw, lh), text)
+            else:
+                # Product is already in the composite background
+                sprites[key] = None
+        return sprites[key]
+
+    full_rect = (0, 0, width, height)
+    base = Image.new('RGB', (width, height), color='white')
+    for index in range(first_animated):
+        sprite = sprite_for(index)
+        if sprite is not None:
+            paste_clipped(base, *sprite, full_rect, sprite[0].mode == 'RGBA')
+    canvas = base.copy()
+
+    # Pre-render every copy an animated text layer will show (they feed the palette too)
+    for index in animated:
+        sprite_for(index)
+        for keyframe in keyframes[sorted_layers[index].get('id')]:
+            if 'text' in keyframe:
+                sprite_for(index, keyframe['text'])
+
+    sys.stderr.write(
+        f"🎞️  Animating {len(animated)} of {len(sorted_layers)} layers on {width}x{height} canvas "
+        f"({duration_ms} ms at {fps} fps, {fmt})...\n"
+    )
+
+    times = frame_times(duration_ms, fps)
+    frames = []
+    starts = []
+    palette = None
+    indexed = None
+    dirty_pixels = 0
+    previous_state = None
+    previous_rects = [full_rect]
+
+    for t in times:
+        placed = {}
+        for index in animated:
+            state = layer_state(keyframes[sorted_layers[index].get('id')], t)
+            sprite = sprite_for(index, state['text'])
+            if sprite is None:
+                continue
+            image, (ox, oy) = sprite
+            offset = (ox + round(state['dx'] / 100 * width), oy + round(state['dy'] / 100 * height))
+            placed[index] = (image, offset, round(state['opacity'] * 255))
+
+        frame_state = tuple((index, id(image), offset, alpha) for index, (image, offset, alpha) in placed.items())
+        if frame_state == previous_state:
+            # Nothing moved: hold the previous frame longer
+            continue
+
+        current_rects = [
+            (ox, oy, ox + image.width, oy + image.height)
+            for image, (ox, oy), alpha in placed.values() if alpha > 0
+        ]
+        dirty = merge_rects(previous_rects + current_rects, width, height)
+        for rect in dirty:
+            canvas.paste(base.crop(rect), rect[:2])
+
+        for index in range(first_animated, len(sorted_layers)):
+            if index in placed:
+                image, offset, alpha = placed[index]
+                if alpha == 255:
+                    canvas.paste(image, offset, image if image.mode == 'RGBA' else None)
+                elif alpha > 0:
+                    mask = image.getchannel('A') if image.mode == 'RGBA' else Image.new('L', image.size, 255)
+                    canvas.paste(image, offset, opacity_mask(mask, alpha / 255))
+            else:
+                sprite = sprite_for(index)
+                if sprite is not None:
+                    for rect in dirty:
+                        paste_clipped(canvas, *sprite, rect, sprite[0].mode == 'RGBA')
+
+        if fmt == 'gif':
+            if palette is None:
+                animated_sprites = [image for (index, _), sprite in sprites.items()
+                                    if index in animated and sprite is not None for image in sprite[:1]]
+                palette = build_palette([canvas] + animated_sprites)
+                indexed = canvas.quantize(palette=palette)
+            else:
+                for rect in dirty:
+                    indexed.paste(canvas.crop(rect).quantize(palette=palette), rect[:2])
+            frames.append(indexed.copy())
+        else:
+            frames.append(canvas.copy())
+        starts.append(t)
+
+        dirty_pixels += sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in dirty)
+        previous_rects = current_rects
+        previous_state = frame_state
+
+    if ink is not None:
+        rest = times[-1]
+        for index, layer in enumerate(sorted_layers):
+            layer_type = layer.get('type')
+            state = layer_state(keyframes.get(layer.get('id'), []), rest)
+            if layer_type not in ('text', 'logo') or round(state['opacity'] * 255) == 0:
+                continue
+            x, y, lw, lh = layer_box(layer, width, height)
+            dx, dy = round(state['dx'] / 100 * width), round(state['dy'] / 100 * height)
+            if layer_type == 'text':
+                text_content = state['text'] if state['text'] is not None else text_content_for(layer, copy_text)
+                font = load_font(layer.get('font_size', 24))
+                text_x, text_y = text_origin(text_content, font, layer.get('text_align', 'center'), x, y, lw, lh)
+                if layer.get('background_color'):
+                    ink.add_box(layer.get('id'), 'text', (x + dx, y + dy, x + lw + dx, y + lh + dy))
+                ink.add_text(layer.get('id'), (text_x + dx, text_y + dy), text_content, font)
+            elif logo_url:
+                image, (ox, oy) = sprite_for(index)
+                ink.add_image(layer.get('id'), 'logo', (ox + dx, oy + dy), image)
+
+    rendered = time.perf_counter()
+    durations = [end - start for start, end in zip(starts, starts[1:] + [max(duration_ms, starts[-1] + 1)])]
+    save_animation(frames, durations, output_path, fmt, animation.get('loop', 0), bool(animation.get('lossless')))
+    finished = time.perf_counter()
+
+    report = {
+        'format': fmt,
+        'frames': len(frames),
+        'timeline_frames': len(times),
+        'duration_ms': duration_ms,
+        'dirty_pixels': dirty_pixels,
+        'canvas_pixels': width * height * len(frames),
+        'render_ms': round((rendered - started) * 1000, 1),
+        'encode_ms': round((finished - rendered) * 1000, 1),
+    }
+    sys.stderr.write(
+        f"\n✅ Animation saved to: {output_path} ({report['frames']} unique of {len(times)} frames, "
+        f"render {report['render_ms']} ms + encode {report['encode_ms']} ms)\n"
+    )
+    return output_path, report
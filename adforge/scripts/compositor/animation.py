@@ -0,0 +1,153 @@
+"""
+Keyframe animation for Stories placements
+An animation spec gives keyframes per layer id; each keyframe sets any of
+    t        - time in ms
+    opacity  - 0..1, interpolated
+    dx, dy   - offset in percent of the canvas, interpolated (slides)
+    text     - copy shown from this keyframe on (copy rotation, not interpolated)
+    easing   - how the segment ending at this keyframe is interpolated
+               ('linear', 'ease_in', 'ease_out', 'ease_in_out')
+
+The spec may also set "loop" (0 = forever) and "lossless" (WebP only; exact
+frames at a larger file size, e.g. for pixel comparisons).
+
+Example (headline fades in, CTA slides up from below):
+    {"duration_ms": 3000, "fps": 12, "format": "webp",
+     "keyframes": {"headline": [{"t": 0, "opacity": 0}, {"t": 600, "opacity": 1}],
+                   "cta": [{"t": 300, "dy": 10}, {"t": 900, "dy": 0, "easing": "ease_out"}]}}
+"""
+
+from PIL import Image
+
+DEFAULT_FPS = 12
+DEFAULT_DURATION_MS = 3000
+FORMATS = ('webp', 'gif')
+# Long side (px) each image is reduced to before the palette is fitted
+PALETTE_SAMPLE_PX = 256
+
+EASINGS = {
+    'linear': lambda p: p,
+    'ease_in': lambda p: p * p,
+    'ease_out': lambda p: 1 - (1 - p) * (1 - p),
+    'ease_in_out': lambda p: 2 * p * p if p < 0.5 else 1 - 2 * (1 - p) * (1 - p),
+}
+
+INTERPOLATED = {'opacity': 1.0, 'dx': 0.0, 'dy': 0.0}
+
+
+def frame_times(duration_ms, fps):
+    """Start time (ms) of every frame; each frame lasts 1000 / fps ms"""
+    count = max(int(round(duration_ms * fps / 1000)), 1)
+    return [round(index * 1000 / fps) for index in range(count)]
+
+
+def frame_buffer_bytes(animation, width, height):
+    """Upper bound on the memory held by the frames until they are encoded"""
+    fmt = animation.get('format', 'webp')
+    frames = len(frame_times(animation.get('duration_ms', DEFAULT_DURATION_MS), animation.get('fps', DEFAULT_FPS)))
+    # GIF frames are 1 byte/pixel palette images; WebP frames are RGB, which
+    # Pillow stores at 4 bytes/pixel
+    return frames * width * height * (1 if fmt == 'gif' else 4)
+
+
+def layer_state(keyframes, t):
+    """
+    Interpolated state of one layer at time t
+
+    Returns:
+        {'opacity', 'dx', 'dy', 'text'} (text None = the layer's own copy)
+    """
+    keyframes = sorted(keyframes, key=lambda k: k.get('t', 0))
+    state = {'text': None}
+    for prop, default in INTERPOLATED.items():
+        frames = [k for k in keyframes if prop in k]
+        if not frames:
+            state[prop] = default
+            continue
+        before = [k for k in frames if k.get('t', 0) <= t]
+        after = [k for k in frames if k.get('t', 0) > t]
+        if not before:
+            state[prop] = float(frames[0][prop])
+        elif not after:
+            state[prop] = float(before[-1][prop])
+        else:
+            start, end = before[-1], after[0]
+            span = end.get('t', 0) - start.get('t', 0)
+            progress = EASINGS.get(end.get('easing', 'linear'), EASINGS['linear'])((t - start.get('t', 0)) / span)
+            state[prop] = float(start[prop]) + (float(end[prop]) - float(start[prop])) * progress
+
+    for keyframe in keyframes:
+        if 'text' in keyframe and keyframe.get('t', 0) <= t:
+            state['text'] = keyframe['text']
+    state['opacity'] = min(max(state['opacity'], 0.0), 1.0)
+    return state
+
+
+def opacity_mask(alpha, opacity):
+    """Scale an L alpha mask by opacity (a 256-entry lookup, cost ~ mask area)"""
+    if opacity >= 1.0:
+        return alpha
+    return alpha.point([int(round(value * opacity)) for value in range(256)])
+
+
+def build_palette(images, colors=256):
+    """
+    One adaptive palette for every frame, from the opening frame and all layer sprites
+
+    Median cut over a full-size story sheet takes seconds, so each image is
+    box-reduced to at most PALETTE_SAMPLE_PX on its long side first; the
+    palette only needs the colour distribution, not every pixel.
+    """
+    samples = []
+    for image in images:
+        factor = -(-max(image.size) // PALETTE_SAMPLE_PX)
+        sample = image.convert('RGB')
+        samples.append(sample.reduce(factor) if factor > 1 else sample)
+    width = max(sample.width for sample in samples)
+    height = sum(sample.height for sample in samples)
+    sheet = Image.new('RGB', (width, height))
+    y = 0
+    for sample in samples:
+        sheet.paste(sample, (0, y))
+        y += sample.height
+    return sheet.quantize(colors=colors, method=Image.Quantize.MEDIANCUT)
+
+
+def webp_animation_supported():
+    """Whether this Pillow build can write animated WebP"""
+    from PIL import features
+
+    if not features.check('webp'):
+        return False
+    try:
+        return features.check_feature('webp_anim')
+    except ValueError:
+        # Pillow 11+ dropped the flag: WebP support always includes animation
+        return True
+
+
+def save_animation(frames, durations, output_path, fmt, loop=0, lossless=False):
+    """Write frames (RGB for WebP, P with the shared palette for GIF) as one animated file"""
+    if fmt == 'gif':
+        frames[0].save(
+            output_path,
+            'GIF',
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=loop,
+            disposal=1,
+            optimize=False,
+        )
+    else:
+        frames[0].save(
+            output_path,
+            'WEBP',
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=loop,
+            lossless=lossless,
+            quality=90,
+            method=4,
+        )
@@ -0,0 +1,259 @@
+"""
+Phase 6: Compositing Engine
+Combines template, background, product, copy, and logo into final ad creative
+
+scripts/composite_final_asset.py is only a shim calling main(): Python never
+caches bytecode for the __main__ script, so the job handling lives here and
+the render paths in their own modules, all with .pyc files reused by every
+spawn:
+    compositor.render    - still render (the reference path)
+    compositor.variants  - copy variants and render-free safe-zone validation
+    compositor.animated  - keyframed WebP/GIF
+    compositor.layers    - layer geometry and text drawing
+    compositor.sources   - source download, normalization and probing
+
+Every final asset spawns a fresh interpreter, so module-level imports are kept
+to what every render needs. Only the render path a job uses is imported, and
+ImageDraw/ImageFont, urllib and the optional subsystems are imported inside
+the functions that use them; see check-compositor-startup.py for the startup
+budget. NumPy is only loaded when the template has safe zones to validate.
+"""
+
+import sys
+import json
+import os
+from contextlib import nullcontext
+
+
+def open_image_cache():
+    """Open the shared decoded-image cache if ADFORGE_IMAGE_CACHE_DIR is set"""
+    if not os.environ.get('ADFORGE_IMAGE_CACHE_DIR'):
+        return None
+    from compositor.image_cache import SharedImageCache
+    return SharedImageCache.from_env()
+
+
+def open_memory_budget():
+    """Open the render memory budget, or None when admission control is off"""
+    from compositor.admission import MemoryBudget
+    return MemoryBudget.from_env()
+
+
+def open_profiler(option, job_name):
+    """Return a RenderProfiler when this job is selected for profiling, else None"""
+    # An explicit "profile": false also opts out of ADFORGE_PROFILE_SAMPLE_EVERY sampling
+    if option is False or (not option and not os.environ.get('ADFORGE_PROFILE_SAMPLE_EVERY')):
+        return None
+    from compositor.profiling import RenderProfiler, profile_settings
+    settings = profile_settings(option)
+    if settings is None:
+        return None
+    return RenderProfiler(job_name=job_name, **settings)
+
+
+def open_single_flight():
+    """Open cross-process coalescing of identical downloads/renders if ADFORGE_SINGLE_FLIGHT_DIR is set"""
+    if not os.environ.get('ADFORGE_SINGLE_FLIGHT_DIR'):
+        return None
+    from compositor.single_flight import SingleFlight
+    return SingleFlight.from_env()
+
+
+def main():
+    """Read one job as JSON on stdin, render it and print the result as JSON on stdout"""
+    # Read input from stdin (JSON)
+    try:
+        input_data = json.loads(sys.stdin.read())
+    except json.JSONDecodeError as e:
+        print(json.dumps({'success': False, 'error': f'Invalid JSON input: {e}'}))
+        sys.exit(1)
+
+    # Batch mode: validate copy/template variants against safe zones, no render
+    if input_data.get('mode') == 'validate_safe_zones':
+        from compositor.variants import validate_safe_zone_variants
+
+        batch = validate_safe_zone_variants(
+            input_data.get('template_data', {}),
+            input_data.get('variants', []),
+            width=input_data.get('width', 1080),
+            height=input_data.get('height', 1080),
+            tolerance_percent=input_data.get('safe_zone_tolerance', 0.0),
+        )
+        sys.stderr.write(f"🛡️  Validated {len(batch['variants'])} variants ({batch['variants_per_second']}/s)\n")
+        print(json.dumps({'success': True, **batch}))
+        sys.exit(0)
+
+    # Copy-variants mode: one template/background, many copy_text variants
+    copy_variants = input_data.get('variants') if input_data.get('mode') == 'copy_variants' else None
+    # Animated mode: keyframed layers rendered to an animated WebP/GIF
+    animation = input_data.get('animation') if input_data.get('mode') == 'animated' else None
+
+    template_data = input_data['template_data']
+    composite_url = input_data['composite_url']
+    copy_text = input_data['copy_text'] if copy_variants is None else None
+    logo_url = input_data.get('logo_url')
+    output_path = input_data.get('output_path', '/tmp/final_asset.png')
+    width = input_data.get('width', 1080)
+    height = input_data.get('height', 1080)
+
+    # Already loaded by open_memory_budget(), so importing it here costs nothing
+    from compositor.admission import AdmissionTimeout, admit_render
+
+    if copy_variants is not None:
+        from compositor.variants import render_copy_variants
+    elif animation is not None:
+        from compositor.animated import render_animated_asset
+    else:
+        from compositor.render import composite_final_asset
+
+    image_cache = open_image_cache()
+    memory_budget = open_memory_budget()
+    single_flight = open_single_flight()
+    profiler = open_profiler(
+        input_data.get('profile'),
+        os.path.splitext(os.path.basename(output_path))[0],
+    )
+
+    def render():
+        """Admit, composite and validate this input, returning the result dict"""
+        memory = None
+        ink = None
+        if template_data.get('safe_zones') and copy_variants is None:
+            from compositor.safe_zones import InkCoverage
+            ink = InkCoverage(width, height)
+
+        try:
+            encoded_sources = {}
+            if memory_budget is not None:
+                extra_bytes = 0
+                if animation is not None:
+                    from compositor.animation import frame_buffer_bytes
+                    extra_bytes = frame_buffer_bytes(animation, width, height)
+                memory, encoded_sources = admit_render(
+                    memory_budget, template_data, composite_url, logo_url, width, height, image_cache, single_flight,
+                    extra_bytes,
+                )
+
+            with profiler if profiler is not None else nullcontext():
+                if copy_variants is not None:
+                    variant_results = render_copy_variants(
+                        template_data=template_data,
+                        composite_url=composite_url,
+                        variants=copy_variants,
+                        logo_url=logo_url,
+                        width=width,
+                        height=height,
+                        image_cache=image_cache,
+                        encoded_sources=encoded_sources,
+                        safe_zone_tolerance=input_data.get('safe_zone_tolerance', 0.0),
+                        single_flight=single_flight,
+                    )
+                elif animation is not None:
+                    result_path, animation_report = render_animated_asset(
+                        template_data=template_data,
+                        composite_url=composite_url,
+                        copy_text=copy_text,
+                        animation=animation,
+                        logo_url=logo_url,
+                        output_path=output_path,
+                        width=width,
+                        height=height,
+                        image_cache=image_cache,
+                        encoded_sources=encoded_sources,
+                        ink=ink,
+                        single_flight=single_flight,
+                    )
+                else:
+                    result_path = composite_final_asset(
+                        template_data=template_data,
+                        composite_url=composite_url,
+                        copy_text=copy_text,
+                        logo_url=logo_url,
+                        output_path=output_path,
+                        width=width,
+                        height=height,
+                        image_cache=image_cache,
+                        encoded_sources=encoded_sources,
+                        ink=ink,
+                        single_flight=single_flight,
+                    )
+        finally:
+            if memory_budget is not None:
+                memory_budget.release()
+
+        if copy_variants is not None:
+            result = {'success': True, 'variants': variant_results}
+        else:
+            result = {'success': True, 'output_path': result_path}
+        if animation is not None:
+            result['animation'] = animation_report
+        if ink is not None:
+            result['safe_zones'] = ink.validate(
+                template_data['safe_zones'],
+                input_data.get('safe_zone_tolerance', 0.0),
+            )
+            for violation in result['safe_zones']['violations']:
+                sys.stderr.write(f"⚠️  Safe zone: {violation}\n")
+        if memory is not None:
+            result['memory'] = memory
+        return result
+
+    try:
+        if single_flight is not None and copy_variants is None:
+            # Identical inputs rendering right now share one render; only the
+            # output path and the profiling switch do not change the pixels
+            from compositor.single_flight import flight_key
+
+            import shutil
+
+            def produce_render(shared_path):
+                rendered = render()
+                try:
+                    os.link(rendered['output_path'], shared_path)
+                except OSError:
+                    shutil.copyfile(rendered['output_path'], shared_path)
+                return rendered, {
+                    # The leader's file may not be in the requested format
+                    # (GIF fallback for WebP), so waiters take its extension
+                    'extension': os.path.splitext(rendered['output_path'])[1],
+                    'safe_zones': rendered.get('safe_zones'),
+                    'animation': rendered.get('animation'),
+                }
+
+            def consume_render(shared_path, meta):
+                target = os.path.splitext(output_path)[0] + meta['extension']
+                shutil.copyfile(shared_path, target)
+                sys.stderr.write(f"🔗 Reused an identical in-flight render for {target}\n")
+                coalesced = {'success': True, 'output_path': target}
+                if meta.get('safe_zones') is not None:
+                    coalesced['safe_zones'] = meta['safe_zones']
+                if meta.get('animation') is not None:
+                    coalesced['animation'] = meta['animation']
+                return coalesced
+
+            fingerprint = flight_key({
+                key: value for key, value in input_data.items() if key not in ('output_path', 'profile')
+            })
+            result, role = single_flight.run('render', fingerprint, produce_render, consume_render)
+        else:
+            result, role = render(), None
+    except AdmissionTimeout as e:
+        # The host is saturated; report it as JSON so the route can answer 503
+        sys.stderr.write(f"⏳ {e}\n")
+        print(json.dumps({'success': False, 'error': str(e), 'code': 'admission_timeout'}))
+        sys.exit(1)
+    finally:
+        if image_cache is not None:
+            image_cache.release_all()
+
+    if image_cache is not None:
+        result['image_cache'] = image_cache.stats()
+    if single_flight is not None:
+        result['single_flight'] = single_flight.report()
+    # A coalesced job never rendered, so there is nothing of its own to profile
+    if profiler is not None and role != 'coalesced':
+        result['profile'] = profiler.report()
+        sys.stderr.write(f"📊 Profile written to {result['profile']['pstats_path']}\n")
+
+    # Output result as JSON on stdout (only this line goes to stdout)
+    print(json.dumps(result))
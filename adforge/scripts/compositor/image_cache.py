@@ -0,0 +1,200 @@
+"""
+Shared decoded-image cache
+Keeps decoded rasters in one memory-mapped arena so every compositor process
+on the host builds PIL images from the same pages instead of downloading and
+decoding the same composite/logo into its own heap.
+
+Layout of the cache directory:
+    arena.bin   - fixed-size raster arena (sparse file, mmapped by every worker)
+    index.json  - key -> offset, size, mode, holders, last_used
+    index.lock  - flock guarding index.json
+
+Enable it by pointing ADFORGE_IMAGE_CACHE_DIR at a directory (ideally tmpfs,
+e.g. /dev/shm/adforge-image-cache) and optionally ADFORGE_IMAGE_CACHE_MB.
+"""
+
+import mmap
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from PIL import Image
+
+from compositor.shared_state import locked_json, pid_alive
+
+ARENA_FILE = 'arena.bin'
+INDEX_FILE = 'index.json'
+LOCK_FILE = 'index.lock'
+DEFAULT_CAPACITY_MB = 512
+
+# PIL can only map a buffer without copying for 4-byte-per-pixel modes, so
+# opaque images are stored padded as RGBX rather than packed RGB.
+RAW_MODES = {'RGB': 'RGBX', 'RGBA': 'RGBA'}
+BYTES_PER_PIXEL = 4
+
+
+class SharedImageCache:
+    """Cross-process LRU cache of decoded RGB/RGBA rasters"""
+
+    def __init__(self, directory, capacity_bytes=DEFAULT_CAPACITY_MB * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._held = {}
+
+        arena_path = os.path.join(directory, ARENA_FILE)
+        with self._locked():
+            fd = os.open(arena_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                # An existing arena keeps its size so live offsets stay valid
+                if os.fstat(fd).st_size == 0:
+                    os.ftruncate(fd, capacity_bytes)
+                self.capacity = os.fstat(fd).st_size
+                self._mmap = mmap.mmap(fd, self.capacity)
+            finally:
+                os.close(fd)
+
+    @classmethod
+    def from_env(cls):
+        """Open the cache configured by ADFORGE_IMAGE_CACHE_DIR, or None if unset"""
+        directory = os.environ.get('ADFORGE_IMAGE_CACHE_DIR')
+        if not directory:
+            return None
+        capacity_mb = int(os.environ.get('ADFORGE_IMAGE_CACHE_MB', DEFAULT_CAPACITY_MB))
+        try:
+            return cls(directory, capacity_mb * 1024 * 1024)
+        except OSError as e:
+            sys.stderr.write(f"WARNING: Shared image cache disabled ({e})\n")
+            return None
+
+    @contextmanager
+    def _locked(self):
+        """Hold the index lock and yield the index, writing it back on exit"""
+        with locked_json(
+            os.path.join(self.directory, LOCK_FILE),
+            os.path.join(self.directory, INDEX_FILE),
+            lambda: {'entries': {}},
+        ) as index:
+            yield index
+
+    def _view(self, entry):
+        """Build a read-only PIL image directly on top of the arena bytes"""
+        start = entry['offset']
+        end = start + entry['nbytes']
+        raw_mode = entry['mode']
+        size = tuple(entry['size'])
+        return Image.frombuffer(raw_mode, size, memoryview(self._mmap)[start:end], 'raw', raw_mode, 0, 1)
+
+    def _acquire(self, key, entry):
+        entry['last_used'] = time.time()
+        entry['holders'].append(os.getpid())
+        self._held[key] = self._held.get(key, 0) + 1
+        return self._view(entry)
+
+    def _allocate(self, entries, nbytes):
+        """First-fit allocation in the arena, evicting idle LRU entries as needed"""
+        if nbytes > self.capacity:
+            return None
+
+        while True:
+            cursor = 0
+            for entry in sorted(entries.values(), key=lambda e: e['offset']):
+                if entry['offset'] - cursor >= nbytes:
+                    return cursor
+                cursor = max(cursor, entry['offset'] + entry['nbytes'])
+            if self.capacity - cursor >= nbytes:
+                return cursor
+
+            idle = []
+            for key, entry in entries.items():
+                entry['holders'] = [pid for pid in entry['holders'] if pid_alive(pid)]
+                if not entry['holders']:
+                    idle.append((entry['last_used'], key))
+            if not idle:
+                return None
+            _, victim = min(idle)
+            del entries[victim]
+
+    def get(self, key):
+        """Return a zero-copy PIL image for key, or None on a miss"""
+        with self._locked() as index:
+            entry = index['entries'].get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._acquire(key, entry)
+
+    def size_of(self, key):
+        """Return (width, height) of a cached raster without acquiring it, or None"""
+        with self._locked() as index:
+            entry = index['entries'].get(key)
+            return tuple(entry['size']) if entry is not None else None
+
+    def mode_of(self, key):
+        """Return the raw mode ('RGBX' or 'RGBA') of a cached raster, or None"""
+        with self._locked() as index:
+            entry = index['entries'].get(key)
+            return entry['mode'] if entry is not None else None
+
+    def put(self, key, image):
+        """
+        Store a decoded image under key
+
+        Returns a zero-copy image backed by the arena, or None when the image
+        mode is not cacheable or it does not fit even after eviction.
+        """
+        raw_mode = RAW_MODES.get(image.mode)
+        if raw_mode is None:
+            return None
+        data = image.tobytes('raw', raw_mode)
+
+        with self._locked() as index:
+            entries = index['entries']
+            if key in entries:
+                # Another worker decoded the same source while we were downloading
+                return self._acquire(key, entries[key])
+
+            offset = self._allocate(entries, len(data))
+            if offset is None:
+                return None
+            self._mmap[offset:offset + len(data)] = data
+            entries[key] = {
+                'offset': offset,
+                'nbytes': len(data),
+                'size': list(image.size),
+                'mode': raw_mode,
+                'holders': [],
+                'last_used': time.time(),
+            }
+            return self._acquire(key, entries[key])
+
+    def release_all(self):
+        """Drop every reference this process holds so entries become evictable"""
+        if not self._held:
+            return
+        pid = os.getpid()
+        with self._locked() as index:
+            for key, count in self._held.items():
+                entry = index['entries'].get(key)
+                if entry is None:
+                    continue
+                for _ in range(count):
+                    if pid in entry['holders']:
+                        entry['holders'].remove(pid)
+        self._held = {}
+
+    def stats(self):
+        """Hit/miss counters for this process plus current arena usage"""
+        with self._locked() as index:
+            entries = index['entries']
+            used = sum(e['nbytes'] for e in entries.values())
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'used_bytes': used,
+            'capacity_bytes': self.capacity,
+        }
@@ -0,0 +1,146 @@
+"""
+Layer geometry and text drawing shared by every render path
+"""
+
+import os
+import sys
+from functools import lru_cache
+
+from PIL import Image
+
+
+@lru_cache(maxsize=None)
+def load_font(font_size):
+    """Load a font, trying multiple cross-platform paths before falling back."""
+    from PIL import ImageFont
+
+    candidates = [
+        # Linux (common server environments)
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        "/usr/share/fonts/truetype/freefont/FreeSansBold.ttf",
+        "/usr/share/fonts/truetype/ubuntu/Ubuntu-B.ttf",
+        # macOS
+        "/System/Library/Fonts/Helvetica.ttc",
+        "/Library/Fonts/Arial.ttf",
+        # Windows
+        "C:\\Windows\\Fonts\\arial.ttf",
+    ]
+    # A pinned face (golden-image tests need identical glyphs on every machine)
+    if os.environ.get('ADFORGE_FONT_PATH'):
+        candidates.insert(0, os.environ['ADFORGE_FONT_PATH'])
+    for path in candidates:
+        if os.path.exists(path):
+            try:
+                return ImageFont.truetype(path, font_size)
+            except Exception:
+                continue
+    # Last-resort default (tiny bitmap — acceptable as a safety net only)
+    sys.stderr.write("WARNING: No system font found, using PIL default bitmap font\n")
+    return ImageFont.load_default()
+
+
+def text_content_for(layer, copy_text):
+    """Pick the copy for a text layer by its name, falling back to generated_text"""
+    return copy_text.get(layer.get('name', 'headline'), copy_text.get('generated_text', ''))
+
+
+def layer_box(layer, canvas_width, canvas_height):
+    """Convert a layer's percentage geometry to pixel (x, y, width, height)"""
+    x = int((layer.get('x', 0) / 100) * canvas_width)
+    y = int((layer.get('y', 0) / 100) * canvas_height)
+    lw = int((layer.get('width', 100) / 100) * canvas_width)
+    lh = int((layer.get('height', 100) / 100) * canvas_height)
+    return x, y, lw, lh
+
+
+def text_origin(text_content, font, text_align, x, y, lw, lh):
+    """Where draw.text() must place text to align it inside the layer box"""
+    bbox = font.getbbox(text_content)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+
+    if text_align == 'center':
+        text_x = x + (lw - text_width) // 2
+    elif text_align == 'right':
+        text_x = x + lw - text_width
+    else:  # left
+        text_x = x
+
+    text_y = y + (lh - text_height) // 2
+    return text_x, text_y
+
+
+def text_extent(text_content, font, origin, layer, box):
+    """Canvas rect (x0, y0, x1, y1) a text layer paints: its glyphs plus any background box"""
+    left, top, right, bottom = font.getbbox(text_content)
+    rect = (origin[0] + left - 1, origin[1] + top - 1, origin[0] + right + 1, origin[1] + bottom + 1)
+    if layer.get('background_color'):
+        x, y, lw, lh = box
+        rect = (min(rect[0], x), min(rect[1], y), max(rect[2], x + lw + 1), max(rect[3], y + lh + 1))
+    return rect
+
+
+def merge_rects(rects, canvas_width, canvas_height):
+    """Clip rects to the canvas and merge overlapping ones, so each pixel is replayed once"""
+    merged = []
+    for x0, y0, x1, y1 in rects:
+        rect = (max(x0, 0), max(y0, 0), min(x1, canvas_width), min(y1, canvas_height))
+        if rect[2] <= rect[0] or rect[3] <= rect[1]:
+            continue
+        # Absorb every rect this one touches until none overlap
+        overlapping = True
+        while overlapping:
+            overlapping = False
+            for other in merged:
+                if rect[0] < other[2] and other[0] < rect[2] and rect[1] < other[3] and other[1] < rect[3]:
+                    merged.remove(other)
+                    rect = (min(rect[0], other[0]), min(rect[1], other[1]), max(rect[2], other[2]), max(rect[3], other[3]))
+                    overlapping = True
+                    break
+        merged.append(rect)
+    return merged
+
+
+def paste_clipped(canvas, image, origin, rect, masked=False):
+    """Paste the part of image (placed at origin) that falls inside rect"""
+    x, y = origin
+    x0, y0 = max(rect[0], x), max(rect[1], y)
+    x1, y1 = min(rect[2], x + image.width), min(rect[3], y + image.height)
+    if x1 <= x0 or y1 <= y0:
+        return
+    part = image.crop((x0 - x, y0 - y, x1 - x, y1 - y))
+    canvas.paste(part, (x0, y0), part if masked else None)
+
+
+def text_sprite(layer, box, text_content):
+    """
+    Render a text layer into its own RGBA sprite, returning (sprite, origin)
+
+    Pasting the sprite with its alpha gives the same pixels as drawing the
+    layer straight onto the canvas (background box first, then the glyphs).
+    """
+    from PIL import ImageDraw
+
+    x, y, lw, lh = box
+    font = load_font(layer.get('font_size', 24))
+    origin = text_origin(text_content, font, layer.get('text_align', 'center'), x, y, lw, lh)
+    left, top, right, bottom = text_extent(text_content, font, origin, layer, box)
+    size = (right - left, bottom - top)
+
+    glyphs = Image.new('L', size, 0)
+    ImageDraw.Draw(glyphs).text((origin[0] - left, origin[1] - top), text_content, fill=255, font=font)
+    sprite = Image.new('RGB', size, layer.get('color', '#000000'))
+    alpha = glyphs
+
+    bg_color = layer.get('background_color')
+    if bg_color:
+        box_rect = (x - left, y - top, x + lw + 1 - left, y + lh + 1 - top)
+        backing = sprite.copy()
+        backing.paste(bg_color, box_rect)
+        sprite = Image.composite(sprite, backing, glyphs)
+        alpha = glyphs.copy()
+        alpha.paste(255, box_rect)
+
+    sprite.putalpha(alpha)
+    return sprite, (left, top)
@@ -0,0 +1,201 @@
+"""
+On-demand profiling of a single render job
+Captures cProfile stats and tracemalloc top allocations around
+composite_final_asset() so slow templates can be investigated on real
+production inputs without a separate build.
+
+A job is profiled when its input JSON sets "profile" (true, or
+{"sample_every": N, "top_allocations": K}) or, when "profile" is absent, when
+ADFORGE_PROFILE_SAMPLE_EVERY is set; N means roughly one job in N is captured
+and "profile": false always turns profiling off. Output goes to
+ADFORGE_PROFILE_DIR (default /tmp/adforge-profiles), which only the server
+environment can choose, as:
+    <job>.prof       - pstats file (python3 -m pstats, snakeviz, ...)
+    <job>.collapsed  - collapsed stacks for flamegraph.pl / speedscope
+
+Note: PIL allocates pixel buffers outside the Python allocator, so tracemalloc
+reports Python-level allocations (downloaded bytes, tobytes copies, fonts)
+rather than raster memory.
+"""
+
+import cProfile
+import heapq
+import os
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+
+DEFAULT_PROFILE_DIR = '/tmp/adforge-profiles'
+TRACEMALLOC_FRAMES = 25
+MAX_STACK_DEPTH = 64
+# Call paths expanded when rebuilding collapsed stacks (their number grows
+# exponentially with the call graph, so only the heaviest are split further)
+MAX_STACKS = 20000
+MAX_SAMPLE_EVERY = 10000
+MAX_TOP_ALLOCATIONS = 100
+
+
+def _bounded_int(value, maximum):
+    """value as an int in 1..maximum, or None (bools and floats are not counts)"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if 1 <= number <= maximum else None
+
+
+def profile_settings(option):
+    """
+    Resolve the per-job "profile" input and environment into settings
+
+    Invalid counts turn profiling off for the job (with a warning) rather than
+    failing the render.
+
+    Returns:
+        {'output_dir', 'top_allocations'} when this job should be profiled, else None
+    """
+    if option is False:
+        return None
+    if isinstance(option, dict):
+        sample_every = _bounded_int(option.get('sample_every', 1), MAX_SAMPLE_EVERY)
+        top_allocations = _bounded_int(option.get('top_allocations', 10), MAX_TOP_ALLOCATIONS)
+    elif option:
+        sample_every, top_allocations = 1, 10
+    else:
+        env_sample = os.environ.get('ADFORGE_PROFILE_SAMPLE_EVERY')
+        if not env_sample:
+            return None
+        sample_every, top_allocations = _bounded_int(env_sample, MAX_SAMPLE_EVERY), 10
+
+    if sample_every is None or top_allocations is None:
+        sys.stderr.write(f"WARNING: Ignoring invalid profile settings {option!r}\n")
+        return None
+    if random.randrange(sample_every) != 0:
+        return None
+
+    return {
+        'output_dir': os.environ.get('ADFORGE_PROFILE_DIR', DEFAULT_PROFILE_DIR),
+        'top_allocations': top_allocations,
+    }
+
+
+def _frame_label(func):
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+def write_collapsed_stacks(stats, path, max_stacks=MAX_STACKS):
+    """
+    Write cProfile data as collapsed stacks ("a;b;c <microseconds>")
+
+    cProfile only records caller -> callee edges, so full stacks are rebuilt by
+    walking the call graph from its roots and splitting each function's time
+    between callers in proportion to the time recorded on each edge. Paths are
+    expanded heaviest first, at most max_stacks of them; a path that is not
+    expanded (or reaches MAX_STACK_DEPTH) keeps its whole cumulative time as
+    its own, so the stacks still add up to the profiled time.
+    """
+    # Per caller: (callee, share of the callee's time spent under this caller)
+    children = {}
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        if cumulative <= 0:
+            continue
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, min(edge[3] / cumulative, 1.0)))
+
+    heap = [
+        (-entry[3], index, (func,), 1.0)
+        for index, (func, entry) in enumerate(stats.stats.items()) if not entry[4]
+    ]
+    heapq.heapify(heap)
+    pushed = len(heap)
+    expanded = 0
+    lines = {}
+
+    while heap:
+        _, _, funcs, scale = heapq.heappop(heap)
+        _, _, total_self, total_cumulative, _ = stats.stats[funcs[-1]]
+        own = total_self
+        if expanded < max_stacks and len(funcs) < MAX_STACK_DEPTH:
+            expanded += 1
+            for child, ratio in children.get(funcs[-1], []):
+                child_us = stats.stats[child][3] * scale * ratio * 1e6
+                if child_us < 1 or child in funcs:
+                    continue
+                heapq.heappush(heap, (-child_us, pushed, funcs + (child,), scale * ratio))
+                pushed += 1
+        else:
+            own = total_cumulative
+
+        own_us = int(own * scale * 1e6)
+        if own_us > 0:
+            key = ';'.join(_frame_label(func) for func in funcs)
+            lines[key] = lines.get(key, 0) + own_us
+
+    with open(path, 'w') as f:
+        for key, value in sorted(lines.items()):
+            f.write(f"{key} {value}\n")
+
+
+class RenderProfiler:
+    """Context manager that profiles CPU time and Python allocations of one render"""
+
+    def __init__(self, output_dir=DEFAULT_PROFILE_DIR, top_allocations=10, job_name=None):
+        self.output_dir = output_dir
+        self.top_allocations = top_allocations
+        self.job_name = job_name or f"render_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self._profile = cProfile.Profile()
+        self._snapshot = None
+        self._peak_traced = 0
+        self._started_tracemalloc = False
+        self._elapsed = 0.0
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        self._start = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.disable()
+        self._elapsed = time.perf_counter() - self._start
+        self._snapshot = tracemalloc.take_snapshot()
+        self._peak_traced = tracemalloc.get_traced_memory()[1]
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return False
+
+    def report(self):
+        """Write the pstats and collapsed-stack files and return a summary for the result JSON"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        pstats_path = os.path.join(self.output_dir, f"{self.job_name}.prof")
+        collapsed_path = os.path.join(self.output_dir, f"{self.job_name}.collapsed")
+
+        self._profile.dump_stats(pstats_path)
+        stats = pstats.Stats(self._profile)
+        write_collapsed_stacks(stats, collapsed_path)
+
+        top = []
+        for stat in self._snapshot.statistics('lineno')[:self.top_allocations]:
+            frame = stat.traceback[0]
+            top.append({
+                'location': f"{frame.filename}:{frame.lineno}",
+                'size_bytes': stat.size,
+                'count': stat.count,
+            })
+
+        return {
+            'pstats_path': pstats_path,
+            'collapsed_path': collapsed_path,
+            'wall_ms': round(self._elapsed * 1000, 1),
+            'peak_traced_bytes': self._peak_traced,
+            'top_allocations': top,
+        }
@@ -0,0 +1,267 @@
+"""
+Local aspect-ratio reformat engine
+Derives every target format of a background from one decode, without an AI
+round trip:
+  1. a saliency map (gradient energy + colour contrast, centre-weighted) is
+     computed once on a small analysis copy
+  2. each target ratio is cropped around the most salient window
+  3. when that window would cut into the subject (the region around the
+     saliency peak, e.g. a product spanning a 16:9 frame cropped to 9:16), the
+     crop stops at the subject's extent and the canvas is extended with an
+     edge-aware fill: mirrored (and softened) edges, or a blurred backdrop
+"""
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Long side of the copy the saliency map is computed on
+ANALYSIS_SIZE = 256
+
+# The subject is where the smoothed saliency rises this far from its median
+# towards its peak (0 = everything above the median, 1 = only the peak)
+SUBJECT_LEVEL = 0.5
+# A peak below this multiple of the median is texture, with no subject to keep
+SUBJECT_CONTRAST = 2.0
+# Box-blur radius applied before thresholding, in analysis-grid pixels
+SUBJECT_SMOOTHING = 4
+
+FILL_MODES = ('mirror', 'blur')
+
+# Fills are blurred at 1/FILL_REDUCE of the output size and scaled back up;
+# at these radii that is indistinguishable and several times cheaper
+FILL_REDUCE = 4
+
+
+def saliency_map(image):
+    """
+    Saliency of an RGB image on a ~ANALYSIS_SIZE analysis grid
+
+    Returns:
+        float32 array (h, w) summing to 1
+    """
+    scale = ANALYSIS_SIZE / max(image.size)
+    # np.gradient needs at least two samples along each axis
+    size = (max(int(round(image.width * scale)), 2), max(int(round(image.height * scale)), 2))
+    small = image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+    rgb = np.asarray(small, dtype=np.float32) / 255.0
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+    # Edge energy: where the detail is
+    gy, gx = np.gradient(gray)
+    energy = np.hypot(gx, gy)
+
+    # Colour contrast: distance from the local (heavily blurred) surround
+    surround = small.filter(ImageFilter.GaussianBlur(radius=max(size) / 8))
+    contrast = np.linalg.norm(rgb - np.asarray(surround, dtype=np.float32) / 255.0, axis=2)
+
+    def normalized(values):
+        peak = values.max()
+        return values / peak if peak > 0 else values
+
+    saliency = 0.5 * normalized(energy) + 0.5 * normalized(contrast)
+    saliency *= saliency
+
+    # Mild centre prior: ad backgrounds are usually composed around the middle
+    ys = np.linspace(-1.0, 1.0, size[1], dtype=np.float32)[:, None]
+    xs = np.linspace(-1.0, 1.0, size[0], dtype=np.float32)[None, :]
+    saliency *= 0.7 + 0.3 * np.exp(-(xs * xs + ys * ys) / 0.5)
+
+    total = saliency.sum()
+    if total <= 0:
+        return np.full(saliency.shape, 1.0 / saliency.size, dtype=np.float32)
+    return saliency / total
+
+
+def _box_blur(values, radius):
+    """Separable box blur of a 2-D array, repeating the edge values outward"""
+    size = 2 * radius + 1
+    for axis in (0, 1):
+        pad = [(0, 0), (0, 0)]
+        pad[axis] = (radius + 1, radius)
+        cumulative = np.cumsum(np.pad(values, pad, mode='edge'), axis=axis, dtype=np.float64)
+        length = values.shape[axis]
+        values = (
+            np.take(cumulative, np.arange(size, size + length), axis=axis)
+            - np.take(cumulative, np.arange(length), axis=axis)
+        ) / size
+    return values
+
+
+def _subject_extent(saliency, horizontal, level):
+    """
+    [start, end) of the subject along one axis of the saliency map
+
+    The smoothed map is thresholded between its median and its peak; the
+    subject is the run of columns (rows) with above-threshold pixels that
+    contains the peak. A map without a distinct peak, such as an evenly
+    textured photo, has no subject to protect, so only the peak is returned.
+    """
+    smoothed = _box_blur(saliency, SUBJECT_SMOOTHING)
+    peak = smoothed.max()
+    floor = float(np.median(smoothed))
+    peak_y, peak_x = np.unravel_index(int(np.argmax(smoothed)), smoothed.shape)
+    center = int(peak_x if horizontal else peak_y)
+    if peak <= SUBJECT_CONTRAST * floor:
+        return center, center + 1
+
+    present = (smoothed >= floor + level * (peak - floor)).any(axis=0 if horizontal else 1)
+    gaps = np.flatnonzero(~present)
+    before = gaps[gaps < center]
+    after = gaps[gaps > center]
+    start = int(before[-1]) + 1 if len(before) else 0
+    end = int(after[0]) if len(after) else len(present)
+    return start, end
+
+
+def _best_window(profile, window, subject):
+    """Start of the window of length `window` with the most saliency that still holds the subject"""
+    cumulative = np.concatenate(([0.0], np.cumsum(profile, dtype=np.float64)))
+    sums = cumulative[window:] - cumulative[:-window]
+    starts = np.arange(len(sums))
+    # Prefer windows that contain the whole subject interval when one fits
+    holds = (starts <= subject[0]) & (starts + window >= subject[1])
+    if holds.any():
+        sums = np.where(holds, sums, -1.0)
+    return int(np.argmax(sums))
+
+
+def plan_reformat(saliency, source_size, target_size, level=SUBJECT_LEVEL):
+    """
+    Choose the source crop for one target size
+
+    Args:
+        saliency: Map from saliency_map()
+        source_size: (width, height) of the full-resolution source
+        target_size: (width, height) of the output format
+        level: Subject threshold between the median and peak saliency (see SUBJECT_LEVEL)
+
+    Returns:
+        (crop box in source pixels, 'crop' | 'extend')
+    """
+    sw, sh = source_size
+    tw, th = target_size
+    source_ratio = sw / sh
+    target_ratio = tw / th
+    if abs(source_ratio - target_ratio) < 1e-3:
+        return (0, 0, sw, sh), 'crop'
+
+    # Work along the axis that has to shrink, in analysis-grid units
+    horizontal = target_ratio < source_ratio
+    axis_len = saliency.shape[1] if horizontal else saliency.shape[0]
+    profile = saliency.sum(axis=0 if horizontal else 1)
+    full = sw if horizontal else sh
+    wanted = sh * target_ratio if horizontal else sw / target_ratio
+
+    window = max(int(round(wanted / full * axis_len)), 1)
+    subject = _subject_extent(saliency, horizontal, level)
+    method = 'crop'
+    if subject[1] - subject[0] > window:
+        # Cropping to the ratio would cut the subject: keep its extent, extend the rest
+        window = subject[1] - subject[0]
+        wanted = window / axis_len * full
+        method = 'extend'
+
+    start = _best_window(profile, window, subject) / axis_len * full
+    length = int(round(min(wanted, full)))
+    offset = int(round(min(max(start, 0), full - length)))
+    if horizontal:
+        return (offset, 0, offset + length, sh), method
+    return (0, offset, sw, offset + length), method
+
+
+def _feather_mask(size, box, feather):
+    """Alpha for pasting the sharp image at box: opaque, ramping to 0 at edges that border fill"""
+    width, height = size
+    x0, y0, x1, y1 = box
+    ramp_x = np.ones(x1 - x0, dtype=np.float32)
+    ramp_y = np.ones(y1 - y0, dtype=np.float32)
+    if feather > 0:
+        steps = np.linspace(0.0, 1.0, feather + 2, dtype=np.float32)[1:-1]
+        for ramp, before, after in ((ramp_x, x0 > 0, x1 < width), (ramp_y, y0 > 0, y1 < height)):
+            if before:
+                ramp[:feather] = np.minimum(ramp[:feather], steps)
+            if after:
+                ramp[-feather:] = np.minimum(ramp[-feather:], steps[::-1])
+    return Image.fromarray((np.outer(ramp_y, ramp_x) * 255).astype(np.uint8))
+
+
+def extend_canvas(image, target_size, fill='mirror'):
+    """
+    Centre an image on a larger canvas and fill the margins from its own edges
+
+    'blur' stretches a heavily blurred copy behind it. 'mirror' additionally
+    reflects a band next to each edge (softened, fading into the blur with
+    distance) so texture continues across the seam without repeating objects.
+    """
+    tw, th = target_size
+    left = (tw - image.width) // 2
+    top = (th - image.height) // 2
+    box = (left, top, left + image.width, top + image.height)
+    margin = max(tw - image.width, th - image.height)
+
+    small_size = (max(tw // FILL_REDUCE, 1), max(th // FILL_REDUCE, 1))
+    backdrop = image.resize(small_size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    backdrop = backdrop.filter(ImageFilter.GaussianBlur(radius=max(target_size) / 30 / FILL_REDUCE))
+    backdrop = backdrop.resize(target_size, Image.Resampling.BILINEAR)
+
+    if fill == 'mirror':
+        # Reflect at reduced size too (np.pad on the small copy), then scale up
+        sx, sy = small_size[0] / tw, small_size[1] / th
+        small = image.resize(
+            (max(int(round(image.width * sx)), 1), max(int(round(image.height * sy)), 1)),
+            Image.Resampling.BILINEAR,
+            reducing_gap=2.0,
+        )
+        small_left, small_top = int(round(left * sx)), int(round(top * sy))
+        padded = np.pad(
+            np.asarray(small),
+            (
+                (small_top, max(small_size[1] - small.height - small_top, 0)),
+                (small_left, max(small_size[0] - small.width - small_left, 0)),
+                (0, 0),
+            ),
+            mode='symmetric',
+        )
+        mirrored = Image.fromarray(padded).filter(ImageFilter.GaussianBlur(radius=max(margin / 80 / FILL_REDUCE, 1)))
+        mirrored = mirrored.resize(target_size, Image.Resampling.BILINEAR)
+
+        # Chebyshev distance from the image box, faded out over the mirror band
+        band = max(min(margin / 2, min(image.size) / 4), 1)
+        xs = np.arange(tw)
+        ys = np.arange(th)
+        dist_x = np.maximum(np.maximum(left - xs, xs - (box[2] - 1)), 0)
+        dist_y = np.maximum(np.maximum(top - ys, ys - (box[3] - 1)), 0)
+        fade = np.clip(1.0 - np.maximum(dist_y[:, None], dist_x[None, :]) / band, 0.0, 1.0)
+        backdrop.paste(mirrored, (0, 0), Image.fromarray((fade * 255).astype(np.uint8)))
+
+    feather = int(min(max(margin / 12, 8), 48, image.width // 4, image.height // 4))
+    backdrop.paste(image, box, _feather_mask(target_size, box, feather))
+    return backdrop
+
+
+def reformat_image(image, target_size, saliency=None, fill='mirror', level=SUBJECT_LEVEL):
+    """
+    Reformat an RGB image to target_size by salient crop, extending when needed
+
+    Returns:
+        (output image, {'method', 'crop_box'})
+    """
+    if saliency is None:
+        saliency = saliency_map(image)
+    crop_box, method = plan_reformat(saliency, image.size, target_size, level)
+    cropped = image.crop(crop_box)
+
+    if method == 'crop':
+        output = cropped.resize(target_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    else:
+        tw, th = target_size
+        scale = min(tw / cropped.width, th / cropped.height)
+        fitted = cropped.resize(
+            (min(max(int(round(cropped.width * scale)), 1), tw), min(max(int(round(cropped.height * scale)), 1), th)),
+            Image.Resampling.LANCZOS,
+            reducing_gap=3.0,
+        )
+        output = extend_canvas(fitted, target_size, fill)
+
+    return output, {'method': method, 'crop_box': list(crop_box)}
@@ -0,0 +1,133 @@
+"""
+Still render: one template, one copy, one PNG
+The reference render path; the incremental ones (compositor.variants,
+compositor.animated) must match its pixels.
+"""
+
+import sys
+
+from PIL import Image
+
+from compositor.layers import layer_box, load_font, text_content_for, text_origin
+from compositor.sources import download_image, resize_source
+
+
+def composite_final_asset(
+    template_data,
+    composite_url,
+    copy_text,
+    logo_url=None,
+    output_path='/tmp/final_asset.png',
+    width=1080,
+    height=1080,
+    image_cache=None,
+    encoded_sources=None,
+    ink=None,
+    single_flight=None,
+):
+    """
+    Composite final ad asset using template
+
+    Args:
+        template_data: Template JSON with layers and safe zones
+        composite_url: URL to background/composite image
+        copy_text: Text content for text layers
+        logo_url: Optional URL to logo image
+        output_path: Where to save final composite
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        image_cache: Optional SharedImageCache for decoded source images
+        encoded_sources: Optional {url: bytes} already downloaded (e.g. by admit_render)
+        ink: Optional InkCoverage that records text/logo ink for safe-zone validation
+        single_flight: Optional SingleFlight to coalesce source downloads
+
+    Returns:
+        Path to generated asset
+    """
+
+    canvas_width = width
+    canvas_height = height
+    encoded_sources = encoded_sources or {}
+
+    # Create blank canvas
+    final_image = Image.new('RGB', (canvas_width, canvas_height), color='white')
+    draw = None
+
+    # Get layers from template
+    layers = template_data.get('layers', [])
+
+    # Sort layers by z_index
+    sorted_layers = sorted(layers, key=lambda l: l.get('z_index', 0))
+
+    sys.stderr.write(f"🎨 Compositing {len(sorted_layers)} layers on {canvas_width}x{canvas_height} canvas...\n")
+
+    for layer in sorted_layers:
+        layer_type = layer.get('type')
+
+        # Convert percentages to pixels
+        x, y, lw, lh = layer_box(layer, canvas_width, canvas_height)
+
+        sys.stderr.write(f"  Layer {layer.get('id')}: {layer_type} at ({x}, {y}) size {lw}x{lh}\n")
+
+        if layer_type == 'background':
+            # Paste background/composite
+            bg_image = download_image(composite_url, image_cache, encoded_sources.get(composite_url), single_flight)
+            bg_image = resize_source(bg_image, (canvas_width, canvas_height))
+            final_image.paste(bg_image, (0, 0), bg_image if bg_image.mode == 'RGBA' else None)
+            sys.stderr.write("    ✅ Pasted background\n")
+
+        elif layer_type == 'product':
+            # Product is already in composite, skip
+            sys.stderr.write("    ⏭️  Product already in composite background\n")
+
+        elif layer_type == 'text':
+            # Draw text layer
+            text_content = text_content_for(layer, copy_text)
+            font_size = layer.get('font_size', 24)
+            color = layer.get('color', '#000000')
+            text_align = layer.get('text_align', 'center')
+
+            font = load_font(font_size)
+            if draw is None:
+                from PIL import ImageDraw
+                draw = ImageDraw.Draw(final_image)
+
+            # Calculate text position based on alignment
+            text_x, text_y = text_origin(text_content, font, text_align, x, y, lw, lh)
+
+            # Draw background rectangle if specified
+            bg_color = layer.get('background_color')
+            if bg_color:
+                draw.rectangle([x, y, x + lw, y + lh], fill=bg_color)
+                if ink is not None:
+                    # rectangle() also paints the closing row and column; as in the
+                    # builder, the box's ink is the layer box, so a box equal to
+                    # its safe zone is inside it
+                    ink.add_box(layer.get('id'), 'text', (x, y, x + lw, y + lh))
+
+            # Draw text
+            draw.text((text_x, text_y), text_content, fill=color, font=font)
+            if ink is not None:
+                ink.add_text(layer.get('id'), (text_x, text_y), text_content, font)
+            sys.stderr.write(f"    ✅ Drew text: \"{text_content[:30]}...\"\n")
+
+        elif layer_type == 'logo' and logo_url:
+            # Paste logo
+            logo_image = download_image(logo_url, image_cache, encoded_sources.get(logo_url), single_flight)
+            logo_image = resize_source(logo_image, (lw, lh))
+
+            # Handle transparency
+            if logo_image.mode == 'RGBA':
+                final_image.paste(logo_image, (x, y), logo_image)
+            else:
+                final_image.paste(logo_image, (x, y))
+            if ink is not None:
+                ink.add_image(layer.get('id'), 'logo', (x, y), logo_image)
+
+            sys.stderr.write("    ✅ Pasted logo\n")
+
+    # Save final composite
+    final_image.save(output_path, 'PNG', quality=95)
+    sys.stderr.write(f"\n✅ Final asset saved to: {output_path}\n")
+
+    return output_path
@@ -0,0 +1,214 @@
+"""
+Pixel-accurate safe-zone validation
+Text and logo layers record their actual ink coverage (glyph masks, logo alpha,
+text background boxes) while they are composited, each mask cropped to its
+layer's bounding box. The coverage is then tested against the template's safe
+zones by counting ink in NumPy slices, so the cost scales with the ink area,
+not the canvas:
+  - restricted zones must not contain ink
+  - if any safe zones exist, all ink must fall inside their union
+
+Zones use the template's percentage coordinates ({x, y, width, height, type}),
+converted to pixels exactly like layer boxes (layer_box()), and the same rules
+TemplateSamplePreview applies to layer boxes in the builder.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from compositor.layers import layer_box
+
+# Anti-aliased glyph edges below this alpha do not count as ink
+INK_THRESHOLD = 32
+
+
+def zone_boxes(safe_zones, width, height):
+    """Convert percentage zones to an (N, 4) int array of x0, y0, x1, y1 pixel boxes"""
+    # Rounded like the layers, so a layer with its zone's geometry lands on it exactly
+    rects = [layer_box({'width': 0, 'height': 0, **zone}, width, height) for zone in safe_zones]
+    boxes = np.array([(x, y, x + w, y + h) for x, y, w, h in rects], dtype=np.int64).reshape(-1, 4)
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+    return boxes
+
+
+@lru_cache(maxsize=4096)
+def glyph_mask(font, text):
+    """
+    Boolean ink mask of text and its offset from the draw.text() anchor
+
+    Cached per (font, text): batch validation sees the same copy in many
+    templates/formats, and FreeType rendering dominates its cost.
+    """
+    left, top, right, bottom = font.getbbox(text)
+    if right <= left or bottom <= top:
+        return None, (0, 0)
+    glyphs = Image.new('L', (right - left, bottom - top), 0)
+    ImageDraw.Draw(glyphs).text((-left, -top), text, fill=255, font=font)
+    mask = np.asarray(glyphs) > INK_THRESHOLD
+    mask.flags.writeable = False
+    return mask, (left, top)
+
+
+def _local_boxes(boxes, origin, shape):
+    """Canvas-space boxes translated into a mask's own coordinates and clipped to it"""
+    local = boxes - np.array([origin[0], origin[1], origin[0], origin[1]])
+    local[:, [0, 2]] = local[:, [0, 2]].clip(0, shape[1])
+    local[:, [1, 3]] = local[:, [1, 3]].clip(0, shape[0])
+    return local
+
+
+def _box_counts(mask, origin, boxes):
+    """Ink pixels of a mask at origin inside each canvas-space box"""
+    local = _local_boxes(boxes, origin, mask.shape)
+    return np.array(
+        [np.count_nonzero(mask[y0:y1, x0:x1]) if x1 > x0 and y1 > y0 else 0 for x0, y0, x1, y1 in local],
+        dtype=np.int64,
+    )
+
+
+def _bounds(layer):
+    """Canvas-space (x0, y0, x1, y1) of a recorded layer mask"""
+    x, y = layer['origin']
+    h, w = layer['mask'].shape
+    return x, y, x + w, y + h
+
+
+def _any_overlap(layers):
+    """Whether the bounding boxes of any two recorded layers intersect"""
+    bounds = [_bounds(layer) for layer in layers]
+    for i, (ax0, ay0, ax1, ay1) in enumerate(bounds):
+        for bx0, by0, bx1, by1 in bounds[i + 1:]:
+            if ax0 < bx1 and bx0 < ax1 and ay0 < by1 and by0 < ay1:
+                return True
+    return False
+
+
+class InkCoverage:
+    """Ink masks of the text and logo layers of one render, in canvas coordinates"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.layers = []
+
+    def copy(self):
+        """A new coverage starting from this one's layers (e.g. static logo ink shared by variants)"""
+        coverage = InkCoverage(self.width, self.height)
+        coverage.layers = list(self.layers)
+        return coverage
+
+    def add_mask(self, layer_id, layer_type, origin, mask):
+        """Record a boolean/alpha mask whose top-left corner sits at origin, clipped to the canvas"""
+        mask = np.asarray(mask)
+        if mask.dtype != np.bool_:
+            mask = mask > INK_THRESHOLD
+        x, y = origin
+        left, top = max(x, 0), max(y, 0)
+        right = min(x + mask.shape[1], self.width)
+        bottom = min(y + mask.shape[0], self.height)
+        if right <= left or bottom <= top:
+            return
+        clipped = mask[top - y:bottom - y, left - x:right - x]
+        self.layers.append({'id': layer_id, 'type': layer_type, 'origin': (left, top), 'mask': clipped})
+
+    def add_box(self, layer_id, layer_type, box):
+        """Record a fully opaque rectangle (x0, y0, x1, y1), e.g. a text background"""
+        x0, y0, x1, y1 = box
+        self.add_mask(layer_id, layer_type, (x0, y0), np.ones((max(y1 - y0, 0), max(x1 - x0, 0)), dtype=np.bool_))
+
+    def add_text(self, layer_id, origin, text, font):
+        """Record the glyph coverage of text drawn with its anchor at origin"""
+        mask, (left, top) = glyph_mask(font, text)
+        if mask is not None:
+            self.add_mask(layer_id, 'text', (origin[0] + left, origin[1] + top), mask)
+
+    def add_image(self, layer_id, layer_type, origin, image):
+        """Record a pasted image: its alpha when pasted as RGBA, otherwise its full box"""
+        if image.mode == 'RGBA':
+            self.add_mask(layer_id, layer_type, origin, image.getchannel('A'))
+        else:
+            x, y = origin
+            self.add_box(layer_id, layer_type, (x, y, x + image.width, y + image.height))
+
+    def validate(self, safe_zones, tolerance_percent=0.0):
+        """
+        Test the recorded ink against the template's safe zones
+
+        Args:
+            safe_zones: Template safe zones (percentages, type 'safe' or 'restricted')
+            tolerance_percent: Ink allowed in a restricted zone / outside safe zones
+
+        Returns:
+            Report dict with per-zone overlap percentages and violations
+        """
+        safe_zones = safe_zones or []
+        boxes = zone_boxes(safe_zones, self.width, self.height)
+        restricted = np.array([z.get('type') == 'restricted' for z in safe_zones], dtype=np.bool_)
+        safe = np.array([z.get('type') == 'safe' for z in safe_zones], dtype=np.bool_)
+        zone_area = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1)
+
+        zone_ink = np.zeros(len(safe_zones), dtype=np.int64)
+        zone_layers = [dict() for _ in safe_zones]
+        outside_safe = {}
+        violations = []
+
+        if self.layers and len(safe_zones):
+            safe_boxes = boxes[safe]
+            for layer in self.layers:
+                mask = layer['mask']
+                total = int(np.count_nonzero(mask))
+                if total == 0:
+                    continue
+                inside = _box_counts(mask, layer['origin'], boxes)
+                zone_ink += inside
+                for index in np.flatnonzero(restricted & (inside > 0)):
+                    zone_layers[index][layer['id']] = round(100.0 * float(inside[index]) / total, 2)
+
+                if len(safe_boxes):
+                    # Ink outside the union of safe zones, so a layer spanning
+                    # two adjacent safe zones is still fully inside
+                    covered = np.zeros_like(mask)
+                    for x0, y0, x1, y1 in _local_boxes(safe_boxes, layer['origin'], mask.shape):
+                        covered[y0:y1, x0:x1] = True
+                    outside = int(np.count_nonzero(mask & ~covered))
+                    outside_percent = round(100.0 * outside / total, 2)
+                    outside_safe[layer['id']] = outside_percent
+                    if outside_percent > tolerance_percent:
+                        violations.append(f'Layer "{layer["id"]}" has {outside_percent}% of its ink outside every safe zone')
+
+            if _any_overlap(self.layers):
+                # Overlapping layers (e.g. text on its own background box) would
+                # be counted twice, so recount zone ink from their union
+                x0 = min(_bounds(layer)[0] for layer in self.layers)
+                y0 = min(_bounds(layer)[1] for layer in self.layers)
+                x1 = max(_bounds(layer)[2] for layer in self.layers)
+                y1 = max(_bounds(layer)[3] for layer in self.layers)
+                union = np.zeros((y1 - y0, x1 - x0), dtype=np.bool_)
+                for layer in self.layers:
+                    lx0, ly0, lx1, ly1 = _bounds(layer)
+                    union[ly0 - y0:ly1 - y0, lx0 - x0:lx1 - x0] |= layer['mask']
+                zone_ink = _box_counts(union, (x0, y0), boxes)
+
+        zones = []
+        for index, zone in enumerate(safe_zones):
+            overlap = round(100.0 * float(zone_ink[index]) / float(zone_area[index]), 2)
+            zones.append({
+                'id': zone.get('id'),
+                'name': zone.get('name'),
+                'type': zone.get('type'),
+                'ink_pixels': int(zone_ink[index]),
+                'overlap_percent': overlap,
+                'layers': zone_layers[index],
+            })
+            if bool(restricted[index]) and zone_ink[index] > 0 and overlap > tolerance_percent:
+                violations.append(f'Ink covers {overlap}% of restricted zone "{zone.get("name")}"')
+
+        return {
+            'valid': not violations,
+            'zones': zones,
+            'outside_safe': outside_safe,
+            'violations': violations,
+        }
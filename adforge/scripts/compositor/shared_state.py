@@ -0,0 +1,53 @@
+"""
+Small JSON files shared by concurrent compositor processes
+The admission ledger, the image cache index and the single-flight counters
+are each read, updated and written back under an exclusive flock; the write
+goes to a per-process temp file renamed over the original, so a process
+killed mid-write never leaves a truncated file behind.
+"""
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+
+
+def pid_alive(pid):
+    """Whether a process still exists (one we may not signal counts as alive)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_json_atomic(path, data):
+    """Replace path with data as JSON in one rename"""
+    tmp_path = f"{path}.{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def locked_json(lock_path, path, default):
+    """
+    Hold lock_path exclusively and yield the JSON state in path for update
+
+    A missing or unreadable file starts from default(). The state is written
+    back when the block exits normally; an exception leaves the file as it was.
+    """
+    with open(lock_path, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                state = default()
+            yield state
+            write_json_atomic(path, state)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
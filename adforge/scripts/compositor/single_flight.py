@@ -0,0 +1,227 @@
+"""
+Single-flight coalescing of identical in-flight work
+Concurrent compositor processes often start the same work at the same moment:
+several formats of one campaign download the same composite, several users
+open the same campaign and render identical inputs. The first process to take
+a key's flock (exclusively) becomes the leader and does the work; processes
+that find the lock taken wait for it shared and, once the leader releases it,
+all reuse the leader's result file at the same time instead of repeating the
+download or render.
+
+This only covers the stampede window: a result is shared with the processes
+that were waiting while it was produced, never with later arrivals (that is
+what the image cache is for). If a leader fails, the next waiter takes over.
+
+Configuration:
+    ADFORGE_SINGLE_FLIGHT_DIR        - flight directory; coalescing is off when unset
+    ADFORGE_SINGLE_FLIGHT_TIMEOUT_S  - max wait on a leader before working alone (default 120)
+
+Run `python3 -m compositor.single_flight` from scripts/ to print the counters.
+"""
+
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from compositor.shared_state import locked_json, write_json_atomic
+
+DEFAULT_TIMEOUT_S = 120
+
+# Results older than this are swept by the next leader; waiters read theirs
+# as soon as the leader unlocks, so this only bounds disk use
+RESULT_TTL_S = 300
+
+# Counter name per flight role
+COUNTERS = {'leader': 'leaders', 'coalesced': 'coalesced', 'takeover': 'takeovers'}
+
+POLL_INTERVAL_S = 0.02
+MAX_POLL_INTERVAL_S = 0.25
+
+
+def flight_key(*parts):
+    """Stable key for JSON-serializable parts (a URL, a render input)"""
+    encoded = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:32]
+
+
+class SingleFlight:
+    """Cross-process single-flight groups keyed by (kind, key)"""
+
+    def __init__(self, directory, timeout_s=DEFAULT_TIMEOUT_S):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.timeout_s = timeout_s
+        self.flights = []
+
+    @classmethod
+    def from_env(cls):
+        """Open the flight directory configured by the environment, or None when disabled"""
+        directory = os.environ.get('ADFORGE_SINGLE_FLIGHT_DIR')
+        if not directory:
+            return None
+        timeout = float(os.environ.get('ADFORGE_SINGLE_FLIGHT_TIMEOUT_S', DEFAULT_TIMEOUT_S))
+        return cls(directory, timeout)
+
+    @contextmanager
+    def _counters(self):
+        """Hold the counters lock and yield the counters for update"""
+        with locked_json(
+            os.path.join(self.directory, 'counters.lock'),
+            os.path.join(self.directory, 'counters.json'),
+            dict,
+        ) as counters:
+            yield counters
+
+    def _count(self, kind, role, waited_s):
+        with self._counters() as counters:
+            entry = counters.setdefault(kind, {name: 0 for name in COUNTERS.values()})
+            entry[COUNTERS[role]] = entry.get(COUNTERS[role], 0) + 1
+            entry['wait_ms'] = entry.get('wait_ms', 0) + round(waited_s * 1000)
+        self.flights.append({'kind': kind, 'role': role, 'wait_ms': round(waited_s * 1000)})
+
+    def _sweep(self):
+        """Remove results left behind by finished flights"""
+        cutoff = time.time() - RESULT_TTL_S
+        for name in os.listdir(self.directory):
+            if '.result' not in name:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+            except OSError:
+                continue
+
+    @staticmethod
+    def _try_lock(lock, operation):
+        """Take the flight lock (LOCK_EX or LOCK_SH) without blocking"""
+        try:
+            fcntl.flock(lock, operation | fcntl.LOCK_NB)
+            return True
+        except OSError as e:
+            if e.errno not in (errno.EAGAIN, errno.EACCES):
+                raise
+            return False
+
+    def _wait_for_lock(self, lock, operation, deadline):
+        """Poll for the flight lock; False if it is still held at the deadline"""
+        interval = POLL_INTERVAL_S
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            if self._try_lock(lock, operation):
+                return True
+            interval = min(interval * 2, MAX_POLL_INTERVAL_S)
+        return False
+
+    @staticmethod
+    def _finished_since(meta_path, started):
+        """The leader's {'finished_at', 'meta'} if its result was finished after started, else None"""
+        try:
+            with open(meta_path) as f:
+                finished = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return finished if finished['finished_at'] >= started else None
+
+    def _consume(self, kind, lock, result_path, finished, consume, waited_s):
+        try:
+            value = consume(result_path, finished['meta'])
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+        self._count(kind, 'coalesced', waited_s)
+        return value, 'coalesced'
+
+    def _work_alone(self, kind, key, result_path, produce, started):
+        """Leader is stuck: do the work alone rather than fail the job"""
+        sys.stderr.write(f"⏱️  {kind} flight {key[:8]} still running after {self.timeout_s:.0f}s, working alone\n")
+        solo_path = f"{result_path}.{os.getpid()}"
+        try:
+            value, _ = produce(solo_path)
+        finally:
+            if os.path.exists(solo_path):
+                os.unlink(solo_path)
+        self._count(kind, 'takeover', time.time() - started)
+        return value, 'takeover'
+
+    def run(self, kind, key, produce, consume):
+        """
+        Run produce() once across concurrent callers of the same (kind, key)
+
+        Args:
+            kind: Flight family, e.g. 'download' or 'render' (used in counters)
+            key: Identity of the work, e.g. flight_key(url)
+            produce: produce(result_path) -> (value, meta); does the work and
+                writes the shareable result to result_path
+            consume: consume(result_path, meta) -> value; rebuilds the value
+                from a leader's result (called under a shared lock, so every
+                waiter consumes at once and no new leader can replace it)
+
+        Returns:
+            (value, role) with role 'leader', 'coalesced' or 'takeover'
+        """
+        base = os.path.join(self.directory, f"{kind}-{key}")
+        result_path = f"{base}.result"
+        meta_path = f"{base}.result.json"
+        started = time.time()
+
+        with open(f"{base}.lock", 'a') as lock:
+            role = 'leader'
+            waited_s = 0.0
+            if not self._try_lock(lock, fcntl.LOCK_EX):
+                deadline = time.monotonic() + self.timeout_s
+                if not self._wait_for_lock(lock, fcntl.LOCK_SH, deadline):
+                    return self._work_alone(kind, key, result_path, produce, started)
+                waited_s = time.time() - started
+
+                # Reuse the result only if it was finished while this caller waited
+                finished = self._finished_since(meta_path, started)
+                if finished is not None:
+                    return self._consume(kind, lock, result_path, finished, consume, waited_s)
+
+                # The leader failed: the first waiter to lock exclusively takes over
+                fcntl.flock(lock, fcntl.LOCK_UN)
+                if not self._wait_for_lock(lock, fcntl.LOCK_EX, deadline):
+                    return self._work_alone(kind, key, result_path, produce, started)
+                waited_s = time.time() - started
+                finished = self._finished_since(meta_path, started)
+                if finished is not None:
+                    # Another waiter took over and finished first
+                    return self._consume(kind, lock, result_path, finished, consume, waited_s)
+                role = 'takeover'
+
+            try:
+                self._sweep()
+                for path in (meta_path, result_path):
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                value, meta = produce(result_path)
+                write_json_atomic(meta_path, {'finished_at': time.time(), 'meta': meta})
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+        self._count(kind, role, waited_s)
+        return value, role
+
+    def counters(self):
+        """Coalescing counters across all compositor processes"""
+        with self._counters() as counters:
+            return dict(counters)
+
+    def report(self):
+        """This process's flights plus the shared counters"""
+        return {'flights': self.flights, 'counters': self.counters()}
+
+
+if __name__ == '__main__':
+    flight = SingleFlight.from_env()
+    if flight is None:
+        print(json.dumps({'enabled': False}))
+        sys.exit(0)
+    print(json.dumps({'enabled': True, 'counters': flight.counters()}, indent=2))
@@ -0,0 +1,123 @@
+"""
+Source images for the compositor
+Downloading (optionally coalesced across processes), decoding into the
+canonical RGB/RGBA form, header-only probing for admission control, and
+resizing to a layer box.
+"""
+
+from PIL import Image
+
+
+def fetch_image_bytes(url, single_flight=None):
+    """Download encoded image bytes without decoding them (once across concurrent jobs when coalescing)"""
+    if single_flight is not None:
+        from compositor.single_flight import flight_key
+
+        def produce(result_path):
+            data = fetch_image_bytes(url)
+            with open(result_path, 'wb') as f:
+                f.write(data)
+            return data, {'bytes': len(data)}
+
+        def consume(result_path, meta):
+            with open(result_path, 'rb') as f:
+                return f.read()
+
+        data, _ = single_flight.run('download', flight_key(url), produce, consume)
+        return data
+
+    import urllib.request
+
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+
+def download_image(url, image_cache=None, encoded=None, single_flight=None):
+    """Download image from URL and return PIL Image (via the shared cache when enabled)"""
+    if image_cache is not None:
+        cached = image_cache.get(url)
+        if cached is not None:
+            return cached
+
+    from io import BytesIO
+
+    if encoded is None:
+        encoded = fetch_image_bytes(url, single_flight)
+    # Cached images are already normalized, so this runs once per source
+    image = normalize_image(Image.open(BytesIO(encoded)))
+
+    if image_cache is not None:
+        shared = image_cache.put(url, image)
+        if shared is not None:
+            return shared
+    return image
+
+
+# EXIF orientation tag (ExifTags.Base.Orientation)
+EXIF_ORIENTATION = 0x0112
+ALPHA_MODES = ('RGBA', 'RGBa', 'LA', 'La', 'PA')
+SIXTEEN_BIT_MODES = ('I;16', 'I;16L', 'I;16B', 'I;16N', 'I')
+
+
+def normalize_image(image):
+    """
+    Bring a freshly opened source into the compositor's canonical form
+
+    Decided from the header (mode, transparency info, EXIF) alone: the EXIF
+    orientation is applied, sources with transparency (alpha channel, palette
+    or colour-key tRNS) become straight RGBA and everything else RGB, so no
+    layer converts implicitly when it is pasted. RGBA stays straight rather
+    than premultiplied because paste() expects straight alpha and resize()
+    already resamples RGBA premultiplied; an alpha channel that is fully
+    opaque is dropped. 16-bit greyscale is scaled to 8 bits instead of clipped.
+
+    Each step rebinds image, so at most the previous raster and its copy are
+    alive at once (what estimate_peak_bytes() budgets for).
+    """
+    orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+    if orientation != 1:
+        from PIL import ImageOps
+        image = ImageOps.exif_transpose(image)
+
+    if image.mode in ALPHA_MODES or 'transparency' in image.info:
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        if image.getchannel('A').getextrema() == (255, 255):
+            image = image.convert('RGB')
+    elif image.mode in SIXTEEN_BIT_MODES:
+        image = image.point(lambda value: value / 257)
+        image = image.convert('RGB')
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.load()
+    return image
+
+
+def probe_source(data):
+    """
+    Read a source's header without decoding pixels
+
+    Only EXIF found in the header counts: PngImageFile.getexif() decodes the
+    whole image to look for an eXIf chunk after the pixel data.
+
+    Returns:
+        ((width, height), whether normalize_image() copies the decoded raster,
+         whether it may stay RGBA, which resize() copies once more to premultiply)
+    """
+    from io import BytesIO
+
+    with Image.open(BytesIO(data)) as image:
+        exif = Image.Exif()
+        if image.info.get('exif'):
+            exif.load(image.info['exif'])
+        alpha = image.mode in ALPHA_MODES or 'transparency' in image.info
+        # Plain RGB without EXIF rotation is the only form normalize_image() keeps as decoded
+        in_place = image.mode == 'RGB' and not alpha and exif.get(EXIF_ORIENTATION, 1) == 1
+        return image.size, not in_place, alpha
+
+
+def resize_source(image, size):
+    """Resize a normalized source to its layer box: RGBA (paste through its alpha) or RGB"""
+    resized = image.resize(size, Image.Resampling.LANCZOS)
+    # Sources mapped from the shared cache come back as RGBX
+    return resized if resized.mode in ('RGB', 'RGBA') else resized.convert('RGB')
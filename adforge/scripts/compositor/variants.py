@@ -0,0 +1,220 @@
+"""
+Batch paths: many copy variants of one template
+Incremental rendering of copy variants, and safe-zone validation of variants
+without rendering them.
+"""
+
+import sys
+import time
+
+from PIL import Image
+
+from compositor.layers import layer_box, load_font, merge_rects, paste_clipped, text_content_for, text_extent, text_origin
+from compositor.sources import download_image, resize_source
+
+
+def render_copy_variants(
+    template_data,
+    composite_url,
+    variants,
+    logo_url=None,
+    width=1080,
+    height=1080,
+    image_cache=None,
+    encoded_sources=None,
+    safe_zone_tolerance=0.0,
+    single_flight=None,
+):
+    """
+    Render many copy variants of one template incrementally
+
+    The layers below the first text layer are flattened once into a base.
+    Each variant then restores only the dirty rectangles (the previous and
+    current text extents) from that base and replays the layers from the
+    first text layer up inside them, so per-variant cost scales with the
+    text area rather than the canvas. Output matches composite_final_asset().
+
+    Args:
+        template_data: Template JSON with layers and safe zones
+        composite_url: URL to background/composite image
+        variants: List of {id?, copy_text, output_path}
+        logo_url: Optional URL to logo image
+        width: Canvas width in pixels
+        height: Canvas height in pixels
+        image_cache: Optional SharedImageCache for decoded source images
+        encoded_sources: Optional {url: bytes} already downloaded (e.g. by admit_render)
+        safe_zone_tolerance: Passed to safe-zone validation when the template has zones
+        single_flight: Optional SingleFlight to coalesce source downloads
+
+    Returns:
+        List of per-variant result dicts
+    """
+    from PIL import ImageDraw
+
+    encoded_sources = encoded_sources or {}
+    safe_zones = template_data.get('safe_zones')
+    sorted_layers = sorted(template_data.get('layers', []), key=lambda l: l.get('z_index', 0))
+    first_text = next(
+        (index for index, layer in enumerate(sorted_layers) if layer.get('type') == 'text'),
+        len(sorted_layers),
+    )
+
+    static_ink = None
+    if safe_zones:
+        from compositor.safe_zones import InkCoverage
+        static_ink = InkCoverage(width, height)
+
+    # Decode and resize every static layer once: {layer index: (image, origin, masked)}
+    prepared = {}
+    for index, layer in enumerate(sorted_layers):
+        layer_type = layer.get('type')
+        x, y, lw, lh = layer_box(layer, width, height)
+        if layer_type == 'background':
+            bg_image = download_image(composite_url, image_cache, encoded_sources.get(composite_url), single_flight)
+            bg_image = resize_source(bg_image, (width, height))
+            prepared[index] = (bg_image, (0, 0), bg_image.mode == 'RGBA')
+        elif layer_type == 'logo' and logo_url:
+            logo_image = download_image(logo_url, image_cache, encoded_sources.get(logo_url), single_flight)
+            logo_image = resize_source(logo_image, (lw, lh))
+            prepared[index] = (logo_image, (x, y), logo_image.mode == 'RGBA')
+            if static_ink is not None:
+                static_ink.add_image(layer.get('id'), 'logo', (x, y), logo_image)
+
+    # Base: everything below the first text layer. Canvas: base plus the
+    # static layers above it, i.e. the render with every text layer empty
+    base = Image.new('RGB', (width, height), color='white')
+    full_rect = (0, 0, width, height)
+    for index in range(first_text):
+        if index in prepared:
+            image, origin, masked = prepared[index]
+            paste_clipped(base, image, origin, full_rect, masked)
+    canvas = base.copy()
+    for index in range(first_text, len(sorted_layers)):
+        if index in prepared:
+            image, origin, masked = prepared[index]
+            paste_clipped(canvas, image, origin, full_rect, masked)
+    draw = ImageDraw.Draw(canvas)
+
+    sys.stderr.write(
+        f"🎨 Rendering {len(variants)} copy variants on {width}x{height} canvas "
+        f"(base: {first_text} of {len(sorted_layers)} layers)...\n"
+    )
+
+    results = []
+    previous_rects = []
+    for number, variant in enumerate(variants):
+        started = time.perf_counter()
+        copy_text = variant.get('copy_text', {})
+        ink = static_ink.copy() if static_ink is not None else None
+
+        # Lay out this variant's text first so its extents are known before restoring
+        texts = {}
+        current_rects = []
+        for index in range(first_text, len(sorted_layers)):
+            layer = sorted_layers[index]
+            if layer.get('type') != 'text':
+                continue
+            box = layer_box(layer, width, height)
+            text_content = text_content_for(layer, copy_text)
+            font = load_font(layer.get('font_size', 24))
+            origin = text_origin(text_content, font, layer.get('text_align', 'center'), *box)
+            texts[index] = (text_content, font, origin, box)
+            current_rects.append(text_extent(text_content, font, origin, layer, box))
+
+        dirty = merge_rects(previous_rects + current_rects, width, height)
+        for rect in dirty:
+            canvas.paste(base.crop(rect), rect[:2])
+
+        # Replay every layer from the first text layer up, inside the dirty rects
+        for index in range(first_text, len(sorted_layers)):
+            layer = sorted_layers[index]
+            if index in texts:
+                text_content, font, origin, (x, y, lw, lh) = texts[index]
+                if layer.get('background_color'):
+                    draw.rectangle([x, y, x + lw, y + lh], fill=layer.get('background_color'))
+                    if ink is not None:
+                        ink.add_box(layer.get('id'), 'text', (x, y, x + lw, y + lh))
+                draw.text(origin, text_content, fill=layer.get('color', '#000000'), font=font)
+                if ink is not None:
+                    ink.add_text(layer.get('id'), origin, text_content, font)
+            elif index in prepared:
+                image, origin, masked = prepared[index]
+                for rect in dirty:
+                    paste_clipped(canvas, image, origin, rect, masked)
+
+        rendered = time.perf_counter()
+        output_path = variant.get('output_path', f'/tmp/final_asset_variant_{number}.png')
+        canvas.save(output_path, 'PNG', quality=95)
+        previous_rects = current_rects
+
+        result = {
+            'id': variant.get('id', number),
+            'output_path': output_path,
+            'dirty_pixels': sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in dirty),
+            'render_ms': round((rendered - started) * 1000, 1),
+            'encode_ms': round((time.perf_counter() - rendered) * 1000, 1),
+        }
+        if ink is not None:
+            result['safe_zones'] = ink.validate(safe_zones, safe_zone_tolerance)
+        results.append(result)
+        sys.stderr.write(
+            f"  ✅ Variant {result['id']}: {result['dirty_pixels']} dirty px, "
+            f"render {result['render_ms']} ms + encode {result['encode_ms']} ms\n"
+        )
+
+    return results
+
+
+def validate_safe_zone_variants(template_data, variants, width=1080, height=1080, tolerance_percent=0.0):
+    """
+    Validate many copy/template variants against safe zones without rendering them
+
+    Only ink is rasterized: glyph masks of text layers, text background boxes,
+    and logo layer boxes (the logo itself is not downloaded, so its whole box
+    counts as ink). Backgrounds and products are never ink.
+
+    Args:
+        template_data: Default template for variants that do not carry their own
+        variants: List of {id?, copy_text, template_data?, width?, height?}
+        width: Default canvas width in pixels
+        height: Default canvas height in pixels
+        tolerance_percent: Ink allowed in a restricted zone / outside safe zones
+
+    Returns:
+        Batch report dict with one safe-zone report per variant
+    """
+    from compositor.safe_zones import InkCoverage
+
+    started = time.perf_counter()
+    reports = []
+    for index, variant in enumerate(variants):
+        variant_template = variant.get('template_data') or template_data
+        canvas_width = variant.get('width', width)
+        canvas_height = variant.get('height', height)
+        copy_text = variant.get('copy_text', {})
+        ink = InkCoverage(canvas_width, canvas_height)
+
+        for layer in variant_template.get('layers', []):
+            x, y, lw, lh = layer_box(layer, canvas_width, canvas_height)
+            if layer.get('type') == 'text':
+                if layer.get('background_color'):
+                    ink.add_box(layer.get('id'), 'text', (x, y, x + lw, y + lh))
+                text_content = text_content_for(layer, copy_text)
+                font = load_font(layer.get('font_size', 24))
+                origin = text_origin(text_content, font, layer.get('text_align', 'center'), x, y, lw, lh)
+                ink.add_text(layer.get('id'), origin, text_content, font)
+            elif layer.get('type') == 'logo':
+                ink.add_box(layer.get('id'), 'logo', (x, y, x + lw, y + lh))
+
+        report = ink.validate(variant_template.get('safe_zones'), tolerance_percent)
+        report['id'] = variant.get('id', index)
+        reports.append(report)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'variants': reports,
+        'valid': sum(1 for report in reports if report['valid']),
+        'invalid': sum(1 for report in reports if not report['valid']),
+        'elapsed_ms': round(elapsed * 1000, 1),
+        'variants_per_second': round(len(reports) / elapsed) if elapsed > 0 else None,
+    }
@@ -1,13 +1,110 @@
 #!/usr/bin/env python3
 """
-Inspect the category page to understand its structure
+Inspect the category page to understand its structure, and audit the
+performance of each category tab against configurable budgets.
+
+For every tab (Guidelines, Composites, Final Assets, Templates, Products) the
+page is loaded cold in a fresh browser context and the probe collects:
+  - Navigation Timing (TTFB, DOMContentLoaded, load)
+  - Largest Contentful Paint and long tasks (count, total blocking time)
+  - every image request with its transfer size and timing, plus the rendered
+    size of each <img> against its natural size (oversized Drive images)
+The results are written as JSON and HTML reports; the exit code is 1 when
+any budget is exceeded so the audit can gate CI.
+
+Usage:
+    python3 scripts/inspect-category-page.py --stub            # audit against stub_backend.py
+    python3 scripts/inspect-category-page.py --budgets budgets.json --tabs final-assets
+    python3 scripts/inspect-category-page.py --inspect         # original structure dump
+
+With --stub the Next.js app must be running with
+NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54329 (see stub_backend.py).
+
+Budgets file format (all keys optional):
+    {"default": {"lcp_ms": 2500, ...}, "tabs": {"final-assets": {"image_bytes": 5000000}}}
 """
 
 from playwright.sync_api import sync_playwright
+import argparse
+import html
+import json
+import os
 import sys
+import time
+
+ADFORGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ADFORGE_ROOT)
+
+from stub_backend import STUB_CATEGORY_ID, STUB_EMAIL, STUB_PASSWORD, StubBackend  # noqa: E402
+
+CATEGORY_ID = os.environ.get('ADFORGE_CATEGORY_ID', STUB_CATEGORY_ID)
+APP_URL = os.environ.get('ADFORGE_BASE_URL', 'http://localhost:3000')
+BASE_URL = f'{APP_URL}/categories/{CATEGORY_ID}'
+REPORT_DIR = '/tmp/category-perf'
+
+# Tab query value -> label shown in the report
+TABS = {
+    'guidelines': 'Guidelines',
+    'composites': 'Composites',
+    'final-assets': 'Final Assets',
+    'templates': 'Templates',
+    'assets': 'Products',
+}
+
+DEFAULT_BUDGETS = {
+    'ttfb_ms': 800,
+    'dom_content_loaded_ms': 2000,
+    'lcp_ms': 2500,
+    'long_tasks': 10,
+    'total_blocking_time_ms': 300,
+    'image_requests': 60,
+    'image_bytes': 3_000_000,
+    'images_complete_ms': 4000,
+    # Natural pixels / rendered device pixels of the worst <img> on the tab
+    'max_image_oversize': 2.0,
+}
+
+# Installed before any page script runs; buffered observers also catch entries
+# recorded before registration.
+OBSERVER_SCRIPT = """
+window.__perf = { lcp: null, longTasks: [] };
+new PerformanceObserver((list) => {
+  const entries = list.getEntries();
+  window.__perf.lcp = entries[entries.length - 1].startTime;
+}).observe({ type: 'largest-contentful-paint', buffered: true });
+new PerformanceObserver((list) => {
+  for (const entry of list.getEntries()) {
+    window.__perf.longTasks.push({ start: entry.startTime, duration: entry.duration });
+  }
+}).observe({ type: 'longtask', buffered: true });
+"""
+
+COLLECT_SCRIPT = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  const resources = performance.getEntriesByType('resource')
+    .filter((r) => r.initiatorType === 'img' || /\\.(png|jpe?g|webp|gif|avif)(\\?|$)/i.test(r.name))
+    .map((r) => ({ url: r.name, start: r.startTime, end: r.responseEnd, transferSize: r.transferSize, decodedSize: r.decodedBodySize }));
+  const images = Array.from(document.images).map((img) => ({
+    url: img.currentSrc || img.src,
+    natural: [img.naturalWidth, img.naturalHeight],
+    rendered: [img.clientWidth, img.clientHeight],
+  }));
+  return {
+    navigation: nav ? {
+      ttfb: nav.responseStart,
+      domContentLoaded: nav.domContentLoadedEventEnd,
+      load: nav.loadEventEnd,
+    } : null,
+    lcp: window.__perf.lcp,
+    longTasks: window.__perf.longTasks,
+    resources,
+    images,
+    devicePixelRatio: window.devicePixelRatio,
+  };
+}
+"""
 
-CATEGORY_ID = 'a7510dad-d33d-4e77-8ed2-6b41fb92990f'
-BASE_URL = f'http://localhost:3000/categories/{CATEGORY_ID}'
 
 def inspect_page():
     """Inspect page structure and take screenshots"""
@@ -27,7 +124,6 @@ def inspect_page():
             # Navigate
             print('1. Navigating...')
             page.goto(BASE_URL, wait_until='networkidle', timeout=60000)
-            page.wait_for_timeout(2000)
             print('   ✓ Loaded')
 
             # Take initial screenshot
@@ -70,6 +166,235 @@ def inspect_page():
 
     return 0
 
+
+def load_budgets(path):
+    """Merge a budgets file over the defaults, returning (default, per-tab overrides)"""
+    if not path:
+        return dict(DEFAULT_BUDGETS), {}
+    with open(path) as f:
+        config = json.load(f)
+    return {**DEFAULT_BUDGETS, **config.get('default', {})}, config.get('tabs', {})
+
+
+def login(browser, storage_state_path):
+    """Sign in once and save the session for every tab's fresh context"""
+    context = browser.new_context(base_url=APP_URL)
+    page = context.new_page()
+    page.goto('/auth/login')
+    page.fill('input[type="email"]', os.environ.get('ADFORGE_EMAIL', STUB_EMAIL))
+    page.fill('input[type="password"]', os.environ.get('ADFORGE_PASSWORD', STUB_PASSWORD))
+    page.click('button[type="submit"]')
+    page.wait_for_url(lambda url: '/auth/' not in url)
+    context.storage_state(path=storage_state_path)
+    context.close()
+
+
+def summarize_tab(raw, transfers):
+    """Turn the in-page measurements into the metrics the budgets are checked against"""
+    dpr = raw['devicePixelRatio'] or 1
+    navigation = raw['navigation'] or {}
+    long_tasks = raw['longTasks']
+
+    images = []
+    for img in raw['images']:
+        natural_px = img['natural'][0] * img['natural'][1]
+        rendered_px = img['rendered'][0] * img['rendered'][1] * dpr * dpr
+        oversize = natural_px / rendered_px if rendered_px else 0
+        images.append({**img, 'oversize': round(oversize, 2)})
+
+    requests = []
+    timings = {r['url']: r for r in raw['resources']}
+    for url, transfer in transfers.items():
+        timing = timings.get(url, {})
+        requests.append({
+            'url': url,
+            'status': transfer['status'],
+            'transfer_bytes': transfer['bytes'],
+            'start_ms': round(timing.get('start', 0)),
+            'end_ms': round(timing.get('end', 0)),
+        })
+    requests.sort(key=lambda r: r['start_ms'])
+
+    return {
+        'metrics': {
+            'ttfb_ms': round(navigation.get('ttfb', 0)),
+            'dom_content_loaded_ms': round(navigation.get('domContentLoaded', 0)),
+            'load_ms': round(navigation.get('load', 0)),
+            'lcp_ms': round(raw['lcp'] or 0),
+            'long_tasks': len(long_tasks),
+            'total_blocking_time_ms': round(sum(max(0, t['duration'] - 50) for t in long_tasks)),
+            'image_requests': len(requests),
+            'image_bytes': sum(r['transfer_bytes'] for r in requests),
+            'images_complete_ms': max((r['end_ms'] for r in requests), default=0),
+            'max_image_oversize': max((img['oversize'] for img in images), default=0),
+        },
+        'image_requests': requests,
+        'images': sorted(images, key=lambda img: img['oversize'], reverse=True),
+    }
+
+
+def audit_tab(browser, storage_state_path, tab, report_dir):
+    """Cold-load one tab in a fresh context and measure it"""
+    context = browser.new_context(
+        base_url=APP_URL,
+        viewport={'width': 1920, 'height': 1080},
+        storage_state=storage_state_path,
+    )
+    context.add_init_script(OBSERVER_SCRIPT)
+    page = context.new_page()
+
+    transfers = {}
+
+    def on_response(response):
+        if response.request.resource_type != 'image':
+            return
+        try:
+            sizes = response.request.sizes()
+            size = sizes['responseBodySize'] + sizes['responseHeadersSize']
+        except Exception:
+            size = 0
+        transfers[response.url] = {'status': response.status, 'bytes': size}
+
+    page.on('response', on_response)
+
+    try:
+        page.goto(f'/categories/{CATEGORY_ID}?tab={tab}', wait_until='networkidle', timeout=60000)
+        page.wait_for_function('Array.from(document.images).every((img) => img.complete)', timeout=30000)
+        raw = page.evaluate(COLLECT_SCRIPT)
+        screenshot = os.path.join(report_dir, f'{tab}.png')
+        page.screenshot(path=screenshot, full_page=True)
+    finally:
+        context.close()
+
+    result = summarize_tab(raw, transfers)
+    result['screenshot'] = screenshot
+    return result
+
+
+def check_budgets(metrics, budgets):
+    """List every metric over its budget"""
+    violations = []
+    for key, limit in budgets.items():
+        value = metrics.get(key)
+        if value is not None and value > limit:
+            violations.append({'metric': key, 'value': value, 'budget': limit})
+    return violations
+
+
+def write_html(report, path):
+    """Render the report as a single self-contained HTML page"""
+    rows = []
+    for tab, result in report['tabs'].items():
+        failed = {v['metric'] for v in result['violations']}
+        cells = ''.join(
+            f'<td class="{"bad" if key in failed else ""}">{value}</td>'
+            for key, value in result['metrics'].items()
+        )
+        rows.append(f'<tr><th>{html.escape(TABS.get(tab, tab))}</th>{cells}</tr>')
+    headers = ''.join(f'<th>{html.escape(key)}</th>' for key in next(iter(report['tabs'].values()))['metrics'])
+
+    details = []
+    for tab, result in report['tabs'].items():
+        image_rows = ''.join(
+            f'<tr><td>{img["oversize"]}×</td><td>{img["natural"][0]}×{img["natural"][1]}</td>'
+            f'<td>{img["rendered"][0]}×{img["rendered"][1]}</td><td>{html.escape(img["url"])}</td></tr>'
+            for img in result['images'][:20]
+        )
+        request_rows = ''.join(
+            f'<tr><td>{r["start_ms"]}</td><td>{r["end_ms"]}</td><td>{r["transfer_bytes"]:,}</td>'
+            f'<td>{r["status"]}</td><td>{html.escape(r["url"])}</td></tr>'
+            for r in result['image_requests']
+        )
+        details.append(
+            f'<h2>{html.escape(TABS.get(tab, tab))}</h2>'
+            f'<h3>Largest images vs rendered size</h3><table><tr><th>oversize</th><th>natural</th><th>rendered</th><th>url</th></tr>{image_rows}</table>'
+            f'<h3>Image waterfall</h3><table><tr><th>start ms</th><th>end ms</th><th>bytes</th><th>status</th><th>url</th></tr>{request_rows}</table>'
+        )
+
+    status = '❌ Budgets exceeded' if report['failed'] else '✅ Within budget'
+    page = f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Category performance report</title>
+<style>
+body {{ font-family: system-ui, sans-serif; margin: 2rem; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5rem; font-size: 0.85rem; }}
+th, td {{ border: 1px solid #ddd; padding: 4px 8px; text-align: left; }}
+td.bad {{ background: #fdd; font-weight: bold; }}
+</style></head><body>
+<h1>Category performance report</h1>
+<p>{html.escape(report['category_url'])} — {html.escape(report['generated_at'])} — {status}</p>
+<table><tr><th>tab</th>{headers}</tr>{''.join(rows)}</table>
+{''.join(details)}
+</body></html>
+"""
+    with open(path, 'w') as f:
+        f.write(page)
+
+
+def audit_tabs(tabs, budgets_path, report_dir, use_stub):
+    """Audit every tab, write JSON/HTML reports and return the exit code"""
+    os.makedirs(report_dir, exist_ok=True)
+    default_budgets, tab_budgets = load_budgets(budgets_path)
+
+    stub = StubBackend().start() if use_stub else None
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            storage_state_path = os.path.join(report_dir, 'storage_state.json')
+            login(browser, storage_state_path)
+
+            report = {
+                'category_url': BASE_URL,
+                'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'tabs': {},
+                'failed': False,
+            }
+
+            for tab in tabs:
+                print(f'📏 Auditing {TABS.get(tab, tab)}...')
+                result = audit_tab(browser, storage_state_path, tab, report_dir)
+                budgets = {**default_budgets, **tab_budgets.get(tab, {})}
+                result['budgets'] = budgets
+                result['violations'] = check_budgets(result['metrics'], budgets)
+                report['tabs'][tab] = result
+                report['failed'] = report['failed'] or bool(result['violations'])
+
+                metrics = result['metrics']
+                print(f"   LCP {metrics['lcp_ms']} ms, TBT {metrics['total_blocking_time_ms']} ms, "
+                      f"{metrics['image_requests']} images / {metrics['image_bytes']:,} bytes, "
+                      f"worst oversize {metrics['max_image_oversize']}×")
+                for violation in result['violations']:
+                    print(f"   ✗ {violation['metric']} = {violation['value']} (budget {violation['budget']})")
+
+            browser.close()
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    json_path = os.path.join(report_dir, 'category-perf-report.json')
+    html_path = os.path.join(report_dir, 'category-perf-report.html')
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    write_html(report, html_path)
+
+    print(f'\n📄 Reports: {json_path}\n           {html_path}')
+    if report['failed']:
+        print('❌ Performance budgets exceeded')
+        return 1
+    print('✅ All tabs within budget')
+    return 0
+
+
 if __name__ == '__main__':
-    exit_code = inspect_page()
+    parser = argparse.ArgumentParser(description='Category page structure inspection and performance audit')
+    parser.add_argument('--inspect', action='store_true', help='Only dump page structure (original behaviour)')
+    parser.add_argument('--tabs', nargs='+', choices=list(TABS), default=list(TABS), help='Tabs to audit')
+    parser.add_argument('--budgets', help='JSON budgets file overriding the defaults')
+    parser.add_argument('--report-dir', default=REPORT_DIR, help='Where reports and screenshots go')
+    parser.add_argument('--stub', action='store_true', help='Serve data from the local stub backend')
+    args = parser.parse_args()
+
+    if args.inspect:
+        exit_code = inspect_page()
+    else:
+        exit_code = audit_tabs(args.tabs, args.budgets, args.report_dir, args.stub)
     sys.exit(exit_code)
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of POST /api/categories/[id]/final-assets
+
+Drives the real route (Supabase lookups, the composite_final_asset.py spawn,
+the Drive upload and the final_assets insert) at increasing concurrency, with
+stub_backend.py standing in for Supabase REST/auth, the Drive API and image
+hosting, each with its own configurable latency. Every step is a closed loop:
+N workers each send the next request as soon as their last one returns.
+
+Per step it reports throughput, latency percentiles, the error rate and status
+mix, and - sampled from /proc while the step runs - how many compositor
+processes were alive and their total RSS, plus the Next.js server's RSS. The
+first step whose throughput grows by less than --knee-gain over the previous
+one is reported as the point where throughput stops scaling.
+
+Usage:
+    python3 scripts/load-test-final-assets.py --start-server --concurrency 1 2 4 8 16
+    python3 scripts/load-test-final-assets.py --start-server --no-build --rest-latency-ms 40 --upload-latency-ms 400
+    python3 scripts/load-test-final-assets.py --base-url http://localhost:3000   # server already running
+
+NEXT_PUBLIC_* variables are inlined when the app is built, so a production
+build made with the real .env talks to real Supabase whatever env it is
+started with. --start-server therefore runs `npm run build` with the stub env
+(this overwrites .next: rebuild before deploying) and starts the standalone
+server the way the Dockerfile does (next.config.ts sets output: 'standalone',
+which `next start` does not serve). --no-build reuses the last stub build;
+--dev runs `next dev`, which reads the env at start-up and needs no build.
+
+A server started separately must be built and started with the stub env (see
+--print-env):
+    NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54329 NEXT_PUBLIC_SUPABASE_ANON_KEY=stub-anon-key
+    GOOGLE_DRIVE_API_URL=http://127.0.0.1:54329/drive/v3 GOOGLE_DRIVE_ACCESS_TOKEN=stub-drive-token
+    GOOGLE_DRIVE_FOLDER_ID=stub-root-folder
+
+Before the first step the harness sends the app one authenticated request and
+refuses to run unless the stub sees the app's session lookup, so a build that
+still points at another Supabase project never receives load.
+
+Compositor knobs (ADFORGE_RENDER_MEMORY_BUDGET_MB, ADFORGE_IMAGE_CACHE_DIR,
+ADFORGE_SINGLE_FLIGHT_DIR, ...) are passed through to a server it starts, so
+the same run can compare container sizings.
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from urllib.parse import urlparse
+
+ADFORGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ADFORGE_ROOT)
+
+from stub_backend import DEFAULT_PORT, STUB_CATEGORY_ID, STUB_EMAIL, STUB_PASSWORD, StubBackend  # noqa: E402
+
+REPORT_DIR = '/tmp/final-assets-load'
+COMPOSITOR_SCRIPT = 'composite_final_asset.py'
+SAMPLE_INTERVAL_S = 0.25
+PERCENTILES = (50, 90, 95, 99)
+FORMATS = ['1:1', '9:16', '16:9', '4:5']
+
+
+def stub_env(stub_url):
+    """Environment that points the app at the stub backend"""
+    return {
+        'NEXT_PUBLIC_SUPABASE_URL': stub_url,
+        'NEXT_PUBLIC_SUPABASE_ANON_KEY': 'stub-anon-key',
+        'SUPABASE_SERVICE_ROLE_KEY': 'stub-service-key',
+        'GOOGLE_DRIVE_API_URL': f'{stub_url}/drive/v3',
+        'GOOGLE_DRIVE_ACCESS_TOKEN': 'stub-drive-token',
+        'GOOGLE_DRIVE_FOLDER_ID': 'stub-root-folder',
+    }
+
+
+def session_cookie(supabase_url, email, password, anon_key='stub-anon-key'):
+    """
+    Log in with the password grant and encode the session the way @supabase/ssr stores it
+
+    Returns:
+        (cookie name, cookie value)
+    """
+    request = urllib.request.Request(
+        f'{supabase_url}/auth/v1/token?grant_type=password',
+        data=json.dumps({'email': email, 'password': password}).encode(),
+        headers={'Content-Type': 'application/json', 'apikey': anon_key},
+        method='POST',
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        session = json.load(response)
+    project_ref = urlparse(supabase_url).hostname.split('.')[0]
+    encoded = base64.urlsafe_b64encode(json.dumps(session).encode()).rstrip(b'=').decode()
+    return f'sb-{project_ref}-auth-token', f'base64-{encoded}'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    index = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def _proc_rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _proc_table():
+    """{pid: (ppid, argv)} for every process we can read"""
+    table = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/cmdline', 'rb') as f:
+                argv = f.read().decode(errors='replace').split('\0')
+            with open(f'/proc/{name}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        table[int(name)] = (ppid, argv)
+    return table
+
+
+class ProcessSampler:
+    """
+    Samples compositor and server processes from /proc on a background thread
+
+    Compositors are found by script name; the server is server_pid and its
+    descendants (when the harness started it) or any `next` process.
+    """
+
+    def __init__(self, server_pid=None):
+        self.server_pid = server_pid
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _server_pids(self, table):
+        if self.server_pid is None:
+            return {pid for pid, (_, argv) in table.items() if 'node' in argv[0] and any('next' in arg for arg in argv[1:])}
+        pids = {self.server_pid}
+        changed = True
+        while changed:
+            children = {pid for pid, (ppid, _) in table.items() if ppid in pids} - pids
+            changed = bool(children)
+            pids |= children
+        return pids
+
+    def sample(self):
+        table = _proc_table()
+        compositors = [pid for pid, (_, argv) in table.items() if any(arg.endswith(COMPOSITOR_SCRIPT) for arg in argv[1:3])]
+        server = self._server_pids(table) - set(compositors)
+        return {
+            't': time.monotonic(),
+            'compositors': len(compositors),
+            'compositor_rss_kb': sum(_proc_rss_kb(pid) for pid in compositors),
+            'server_rss_kb': sum(_proc_rss_kb(pid) for pid in server),
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append(self.sample())
+            self._stop.wait(SAMPLE_INTERVAL_S)
+
+    def start(self):
+        self.samples = []
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+class RouteClient:
+    """Keep-alive client for the final-assets route, one per worker"""
+
+    def __init__(self, base_url, category_id, cookie, timeout_s):
+        parsed = urlparse(base_url)
+        cls = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        self._connection = lambda: cls(parsed.netloc, timeout=timeout_s)
+        self.connection = self._connection()
+        self.path = f'/api/categories/{category_id}/final-assets'
+        self.headers = {'Content-Type': 'application/json', 'Cookie': f'{cookie[0]}={cookie[1]}'}
+
+    def post(self, body):
+        """Send one generation request; returns (status, latency_s, error)"""
+        started = time.perf_counter()
+        try:
+            self.connection.request('POST', self.path, body=json.dumps(body), headers=self.headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            error = None
+            if response.status >= 400:
+                try:
+                    error = json.loads(data).get('error')
+                except ValueError:
+                    error = data[:200].decode(errors='replace')
+            return response.status, time.perf_counter() - started, error
+        except (http.client.HTTPException, OSError) as e:
+            self.connection.close()
+            self.connection = self._connection()
+            return None, time.perf_counter() - started, f'{type(e).__name__}: {e}'
+
+
+def run_step(args, concurrency, cookie, sampler, stub):
+    """Run one closed-loop concurrency step and summarise it"""
+    results = []
+    lock = threading.Lock()
+    warm_until = time.monotonic() + args.warmup
+    deadline = warm_until + args.duration
+    counter = iter(range(10 ** 9))
+
+    def worker():
+        client = RouteClient(args.base_url, args.category_id, cookie, args.timeout)
+        while time.monotonic() < deadline:
+            n = next(counter)
+            body = {**args.body, 'name': f'Load test {concurrency}x #{n}', 'format': args.formats[n % len(args.formats)]}
+            sent_at = time.monotonic()
+            status, latency, error = client.post(body)
+            # Requests started during warm-up are sent but not measured
+            if sent_at >= warm_until:
+                with lock:
+                    results.append((status, latency, error))
+
+    stub_requests = stub.state.request_count if stub else None
+    drive_files = len(stub.state.drive_files) if stub else None
+    sampler.start()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - warm_until
+    samples = sampler.stop()
+
+    ok = sorted(latency for status, latency, _ in results if status is not None and status < 400)
+    statuses = Counter(str(status) if status is not None else 'connection_error' for status, _, _ in results)
+    errors = Counter(error for _, _, error in results if error)
+    step = {
+        'concurrency': concurrency,
+        'requests': len(results),
+        'ok': len(ok),
+        'error_rate': round(1 - len(ok) / len(results), 4) if results else None,
+        'throughput_rps': round(len(ok) / elapsed, 3) if elapsed > 0 else 0.0,
+        'latency_ms': {f'p{p}': round(percentile(ok, p) * 1000) if ok else None for p in PERCENTILES},
+        'statuses': dict(statuses),
+        'top_errors': dict(errors.most_common(5)),
+        'compositors_max': max((s['compositors'] for s in samples), default=0),
+        'compositors_mean': round(sum(s['compositors'] for s in samples) / len(samples), 2) if samples else 0,
+        'compositor_rss_max_mb': round(max((s['compositor_rss_kb'] for s in samples), default=0) / 1024),
+        'server_rss_max_mb': round(max((s['server_rss_kb'] for s in samples), default=0) / 1024),
+    }
+    step['latency_ms']['max'] = round(ok[-1] * 1000) if ok else None
+    if stub:
+        step['backend_requests'] = stub.state.request_count - stub_requests
+        step['drive_files_created'] = len(stub.state.drive_files) - drive_files
+    return step
+
+
+def find_knee(steps, min_gain):
+    """First step whose throughput gain over the previous step is below min_gain (e.g. 0.1 = 10%)"""
+    for previous, step in zip(steps, steps[1:]):
+        if previous['throughput_rps'] > 0 and step['throughput_rps'] < previous['throughput_rps'] * (1 + min_gain):
+            return step['concurrency']
+    return None
+
+
+def build_app(env):
+    """`npm run build` with the stub env, so the inlined NEXT_PUBLIC_* values point at the stub"""
+    sys.stderr.write('🏗️  Building the app against the stub (npm run build)...\n')
+    build = subprocess.run(['npm', 'run', 'build'], cwd=ADFORGE_ROOT, env={**os.environ, **env}, stdout=subprocess.DEVNULL)
+    if build.returncode != 0:
+        sys.exit(f'❌ npm run build exited with {build.returncode}')
+
+
+def standalone_server():
+    """
+    Lay out .next/standalone the way the Dockerfile does and return its server.js
+
+    server.js serves from its own directory and the route spawns scripts/
+    relative to it, so static assets, public/ and scripts/ must sit beside it.
+    """
+    standalone = os.path.join(ADFORGE_ROOT, '.next', 'standalone')
+    server_js = os.path.join(standalone, 'server.js')
+    if not os.path.exists(server_js):
+        sys.exit(f'❌ {server_js} not found (build with output: \'standalone\', or drop --no-build)')
+    for source, target in (('.next/static', '.next/static'), ('public', 'public')):
+        if os.path.isdir(os.path.join(ADFORGE_ROOT, source)):
+            shutil.copytree(os.path.join(ADFORGE_ROOT, source), os.path.join(standalone, target), dirs_exist_ok=True)
+    scripts = os.path.join(standalone, 'scripts')
+    if not os.path.islink(scripts):
+        # File tracing may have copied part of scripts/; use the real tree
+        shutil.rmtree(scripts, ignore_errors=True)
+        os.symlink(os.path.join(ADFORGE_ROOT, 'scripts'), scripts)
+    return server_js
+
+
+def start_server(args, env):
+    """Build against the stub and start the standalone server (or `next dev`), then wait for it"""
+    parsed = urlparse(args.base_url)
+    port = str(parsed.port or 3000)
+    if args.dev:
+        command, cwd = ['npx', 'next', 'dev', '-p', port], ADFORGE_ROOT
+        server_env = env
+    else:
+        if not args.no_build:
+            build_app(env)
+        server_js = standalone_server()
+        command, cwd = ['node', server_js], os.path.dirname(server_js)
+        server_env = {**env, 'PORT': port, 'HOSTNAME': parsed.hostname or '127.0.0.1'}
+    server = subprocess.Popen(
+        command,
+        cwd=cwd,
+        env={**os.environ, **server_env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 180
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f'❌ `{" ".join(command)}` exited with {server.returncode}')
+        try:
+            urllib.request.urlopen(f'{args.base_url}/auth/login', timeout=2).close()
+            return server
+        except urllib.error.HTTPError:
+            return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    sys.exit(f'❌ {args.base_url} did not come up within 180s')
+
+
+def verify_stub_backend(args, cookie, stub):
+    """
+    Exit unless the running app sends its Supabase calls to the stub
+
+    The middleware looks up the session of every request, so one
+    authenticated page load must reach the stub's auth endpoint.
+    """
+    before = stub.state.request_count
+    request = urllib.request.Request(f'{args.base_url}/categories', headers={'Cookie': f'{cookie[0]}={cookie[1]}'})
+    try:
+        urllib.request.urlopen(request, timeout=args.timeout).close()
+    except urllib.error.HTTPError:
+        pass
+    except OSError as e:
+        sys.exit(f'❌ Could not reach {args.base_url}: {e}')
+    if stub.state.request_count == before:
+        sys.exit(
+            f'❌ {args.base_url} did not call the stub at {stub.url}: its Supabase URL was inlined at build time '
+            'and points elsewhere. Rebuild with the stub env (--start-server, or see --print-env).'
+        )
+
+
+def print_table(steps, knee):
+    header = f"{'conc':>5} {'req':>6} {'rps':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'err%':>6} {'procs':>6} {'py MB':>6} {'node MB':>8}"
+    sys.stderr.write(f'\n{header}\n{"-" * len(header)}\n')
+    for step in steps:
+        latency = step['latency_ms']
+        sys.stderr.write(
+            f"{step['concurrency']:>5} {step['requests']:>6} {step['throughput_rps']:>7.2f} "
+            f"{latency['p50'] or '-':>7} {latency['p95'] or '-':>7} {latency['p99'] or '-':>7} "
+            f"{(step['error_rate'] or 0) * 100:>6.1f} {step['compositors_max']:>6} "
+            f"{step['compositor_rss_max_mb']:>6} {step['server_rss_max_mb']:>8}\n"
+        )
+    if knee is not None:
+        sys.stderr.write(f'\n📈 Throughput stops scaling at concurrency {knee}\n')
+    else:
+        sys.stderr.write('\n📈 Throughput still scaling at the highest concurrency tested\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the final-assets route against local stand-ins')
+    parser.add_argument('--base-url', default=os.environ.get('ADFORGE_BASE_URL', 'http://localhost:3000'))
+    parser.add_argument('--start-server', action='store_true', help='Build against the stub and start the standalone server')
+    parser.add_argument('--no-build', action='store_true', help='With --start-server, reuse the last stub build')
+    parser.add_argument('--dev', action='store_true', help='With --start-server, use `next dev` instead (no build)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=30, help='Seconds per step (after warm-up)')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds per step not measured')
+    parser.add_argument('--timeout', type=float, default=120, help='Per-request timeout')
+    parser.add_argument('--formats', nargs='+', default=FORMATS, help='Formats requested round-robin')
+    parser.add_argument('--body', type=json.loads, default={}, help='Extra JSON merged into every request body')
+    parser.add_argument('--knee-gain', type=float, default=0.1, help='Throughput gain below which scaling has stopped')
+    parser.add_argument('--stub-port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--supabase-url', help='Use this backend instead of starting the stub')
+    parser.add_argument('--email', default=STUB_EMAIL)
+    parser.add_argument('--password', default=STUB_PASSWORD)
+    parser.add_argument('--category-id', default=STUB_CATEGORY_ID)
+    parser.add_argument('--auth-latency-ms', type=float, default=20)
+    parser.add_argument('--rest-latency-ms', type=float, default=30)
+    parser.add_argument('--drive-latency-ms', type=float, default=80, help='Drive metadata calls (folder lookups, permissions)')
+    parser.add_argument('--upload-latency-ms', type=float, default=300)
+    parser.add_argument('--image-latency-ms', type=float, default=50)
+    parser.add_argument('--report-dir', default=REPORT_DIR)
+    parser.add_argument('--print-env', action='store_true', help='Print the env a separately started server needs')
+    args = parser.parse_args()
+
+    if args.print_env:
+        for name, value in stub_env(f'http://127.0.0.1:{args.stub_port}').items():
+            print(f'{name}={value}')
+        return
+
+    stub = None
+    supabase_url = args.supabase_url
+    if supabase_url is None:
+        stub = StubBackend(port=args.stub_port, route_latency_ms={
+            '/auth/v1/': args.auth_latency_ms,
+            '/rest/v1/': args.rest_latency_ms,
+            '/upload/drive/': args.upload_latency_ms,
+            '/drive/v3/': args.drive_latency_ms,
+            '/images/': args.image_latency_ms,
+        }).start()
+        supabase_url = stub.url
+        sys.stderr.write(f'🧪 Stub backend on {stub.url}\n')
+
+    server = start_server(args, stub_env(supabase_url)) if args.start_server else None
+    try:
+        cookie = session_cookie(supabase_url, args.email, args.password)
+        if stub is not None:
+            verify_stub_backend(args, cookie, stub)
+        sampler = ProcessSampler(server.pid if server else None)
+        steps = []
+        for concurrency in args.concurrency:
+            sys.stderr.write(f'🚦 Concurrency {concurrency}: {args.warmup:.0f}s warm-up + {args.duration:.0f}s...\n')
+            step = run_step(args, concurrency, cookie, sampler, stub)
+            steps.append(step)
+            sys.stderr.write(
+                f"   {step['throughput_rps']:.2f} req/s, p95 {step['latency_ms']['p95']} ms, "
+                f"{(step['error_rate'] or 0) * 100:.1f}% errors, up to {step['compositors_max']} compositors\n"
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if stub is not None:
+            stub.stop()
+
+    knee = find_knee(steps, args.knee_gain)
+    print_table(steps, knee)
+
+    os.makedirs(args.report_dir, exist_ok=True)
+    report_path = os.path.join(args.report_dir, f'load_{time.strftime("%Y%m%d_%H%M%S")}.json')
+    report = {
+        'base_url': args.base_url,
+        'latency_ms': {
+            'auth': args.auth_latency_ms, 'rest': args.rest_latency_ms, 'drive': args.drive_latency_ms,
+            'upload': args.upload_latency_ms, 'images': args.image_latency_ms,
+        },
+        'compositor_env': {name: value for name, value in os.environ.items() if name.startswith('ADFORGE_')},
+        'steps': steps,
+        'knee_concurrency': knee,
+    }
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    sys.stderr.write(f'📄 Report written to {report_path}\n')
+    print(json.dumps({'knee_concurrency': knee, 'report': report_path}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Background reformat engine
+Derives other aspect ratios of a background locally (salient crop, edge-aware
+extend) instead of regenerating each format with Gemini.
+
+The source is decoded and analysed once; every requested format is cut from
+that single decode. Called by backgrounds/[backgroundId]/reformat/route.ts with
+JSON on stdin:
+    {"source_path": "/tmp/bg.jpg",
+     "formats": {"9:16": {"width": 1080, "height": 1920}, ...},
+     "output_dir": "/tmp", "fill": "mirror"}
+"""
+
+import sys
+import json
+import os
+import time
+from PIL import Image, ImageOps
+
+
+def reformat_background(source_path, formats, output_dir='/tmp', fill='mirror', quality=92):
+    """
+    Write one JPEG per target format from a single decode of the source
+
+    Args:
+        source_path: Path to the source background image
+        formats: {format: {'width': w, 'height': h}}
+        output_dir: Directory for the generated files
+        fill: Margin fill when a format cannot be reached by cropping ('mirror' or 'blur')
+        quality: JPEG quality of the outputs
+
+    Returns:
+        List of {format, output_path, width, height, method, crop_box, elapsed_ms}
+    """
+    from compositor.reformat import FILL_MODES, reformat_image, saliency_map
+
+    if fill not in FILL_MODES:
+        raise ValueError(f"Unknown fill '{fill}', expected one of {', '.join(FILL_MODES)}")
+
+    started = time.perf_counter()
+    with Image.open(source_path) as opened:
+        source = ImageOps.exif_transpose(opened).convert('RGB')
+    saliency = saliency_map(source)
+    sys.stderr.write(
+        f"🖼️  Source {source.width}x{source.height} decoded and analysed in "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms\n"
+    )
+
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    outputs = []
+    for fmt, dims in formats.items():
+        format_started = time.perf_counter()
+        target_size = (int(dims['width']), int(dims['height']))
+        output, plan = reformat_image(source, target_size, saliency=saliency, fill=fill)
+
+        output_path = os.path.join(output_dir, f"{stem}_{fmt.replace(':', 'x')}.jpg")
+        output.save(output_path, 'JPEG', quality=quality, optimize=True)
+        elapsed_ms = round((time.perf_counter() - format_started) * 1000)
+
+        sys.stderr.write(f"  ✅ {fmt} {target_size[0]}x{target_size[1]} via {plan['method']} ({elapsed_ms} ms)\n")
+        outputs.append({
+            'format': fmt,
+            'output_path': output_path,
+            'width': target_size[0],
+            'height': target_size[1],
+            'method': plan['method'],
+            'crop_box': plan['crop_box'],
+            'elapsed_ms': elapsed_ms,
+        })
+
+    return outputs
+
+
+if __name__ == '__main__':
+    # Read input from stdin (JSON)
+    try:
+        input_data = json.loads(sys.stdin.read())
+    except json.JSONDecodeError as e:
+        print(json.dumps({'success': False, 'error': f'Invalid JSON input: {e}'}))
+        sys.exit(1)
+
+    started = time.perf_counter()
+    outputs = reformat_background(
+        source_path=input_data['source_path'],
+        formats=input_data['formats'],
+        output_dir=input_data.get('output_dir', '/tmp'),
+        fill=input_data.get('fill', 'mirror'),
+    )
+
+    # Output result as JSON on stdout (only this line goes to stdout)
+    print(json.dumps({
+        'success': True,
+        'outputs': outputs,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000),
+    }))
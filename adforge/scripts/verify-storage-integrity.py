@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Parallel storage-integrity audit of Drive-backed records
+
+Reads every backgrounds / composites / final_assets record stored on Google
+Drive from Supabase and checks the referenced file with files.get (size,
+md5Checksum, trashed) - metadata only, nothing is downloaded unless Drive has
+no checksum for a file, in which case its content is streamed through MD5 in
+fixed-size chunks.
+
+Unlike /api/admin/verify-storage-sync (one files.get at a time, 100 ms sleeps):
+  - records are checked by a bounded pool of workers over keep-alive connections
+  - an adaptive rate limiter paces Drive calls, halving the rate on 429 /
+    rateLimitExceeded (honouring Retry-After) and creeping back up on success
+  - progress is checkpointed so an interrupted or budgeted (--max-records)
+    audit resumes where it stopped
+
+Each record ends up as one of:
+    ok         - size and MD5 match the baseline in metadata.storage_integrity
+    baselined  - no baseline yet (--write-baseline stores the observed one)
+    mismatch   - size or MD5 differ from the baseline (replaced or corrupted)
+    empty      - Drive reports a zero-byte file
+    trashed    - file is in the Drive trash
+    missing    - files.get answers 404
+    error      - still failing after retries (checked again on the next run)
+
+Usage:
+    python3 scripts/verify-storage-integrity.py
+    python3 scripts/verify-storage-integrity.py --workers 32 --write-baseline
+    python3 scripts/verify-storage-integrity.py --resume --checkpoint /tmp/audit.json
+    python3 scripts/verify-storage-integrity.py --stub    # against stub_backend.py
+
+Environment:
+    NEXT_PUBLIC_SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+    GOOGLE_DRIVE_ACCESS_TOKEN, or GOOGLE_DRIVE_CLIENT_EMAIL + GOOGLE_DRIVE_PRIVATE_KEY
+        (service account; needs the google-auth package)
+    GOOGLE_DRIVE_API_URL   Drive v3 base URL (default https://www.googleapis.com/drive/v3)
+
+The exit code is 1 when any record is not ok/baselined, so the audit can gate CI.
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlencode, urlparse
+
+ADFORGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TABLES = ['backgrounds', 'composites', 'final_assets']
+DRIVE_API_URL = 'https://www.googleapis.com/drive/v3'
+DEFAULT_CHECKPOINT = '/tmp/storage-integrity-checkpoint.json'
+DEFAULT_REPORT = '/tmp/storage-integrity-report.json'
+
+DEFAULT_WORKERS = 16
+PAGE_SIZE = 1000
+MAX_ATTEMPTS = 6
+STREAM_CHUNK = 256 * 1024
+CHECKPOINT_INTERVAL_S = 2.0
+DELETE_BATCH = 100
+
+# Statuses that count as healthy for the exit code
+HEALTHY = {'ok', 'baselined'}
+# Statuses the old sync route treats as orphans (record deleted with --delete-orphans)
+ORPHANED = {'missing', 'trashed'}
+# Drive 403 reasons that mean "slow down", not "forbidden"
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+
+class HttpError(Exception):
+    """Non-2xx response, with the parsed Retry-After when the server sent one"""
+
+    def __init__(self, status, body=b'', retry_after=None):
+        super().__init__(f'HTTP {status}: {body[:200]!r}')
+        self.status = status
+        self.body = body
+        self.retry_after = retry_after
+
+    @property
+    def reason(self):
+        """First error reason from a Google-style error body"""
+        try:
+            return json.loads(self.body)['error']['errors'][0]['reason']
+        except (ValueError, KeyError, IndexError, TypeError):
+            return None
+
+    @property
+    def throttled(self):
+        return self.status == 429 or (self.status == 403 and self.reason in RATE_LIMIT_REASONS)
+
+    @property
+    def transient(self):
+        return self.throttled or self.status >= 500
+
+
+class HttpClient:
+    """Thread-local keep-alive connections per host"""
+
+    def __init__(self, timeout_s=30):
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+
+    def _connection(self, parsed):
+        connections = self._local.__dict__.setdefault('connections', {})
+        key = (parsed.scheme, parsed.netloc)
+        if key not in connections:
+            cls = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+            connections[key] = cls(parsed.netloc, timeout=self.timeout_s)
+        return key, connections[key]
+
+    def request(self, method, url, headers=None, body=None, on_chunk=None):
+        """
+        Send one request, reconnecting once if the kept-alive socket was closed
+
+        Returns:
+            Response body bytes, or b'' when on_chunk consumed the body in chunks
+        """
+        parsed = urlparse(url)
+        path = parsed.path + (f'?{parsed.query}' if parsed.query else '')
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = dict(headers or {})
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+
+        for attempt in range(2):
+            key, connection = self._connection(parsed)
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                if response.status >= 300 or on_chunk is None:
+                    data = response.read()
+                else:
+                    while True:
+                        chunk = response.read(STREAM_CHUNK)
+                        if not chunk:
+                            break
+                        on_chunk(chunk)
+                    data = b''
+                break
+            except (http.client.HTTPException, ConnectionError, OSError):
+                connection.close()
+                self._local.connections.pop(key, None)
+                if attempt == 1:
+                    raise
+
+        if response.status >= 300:
+            retry_after = response.getheader('Retry-After')
+            raise HttpError(response.status, data, float(retry_after) if retry_after and retry_after.isdigit() else None)
+        return data
+
+
+class AdaptiveRateLimiter:
+    """
+    Pace calls to a shared rate that adapts to throttling (AIMD)
+
+    A throttled response halves the rate (once per burst: the other 429s of
+    the same burst are already in flight) and pauses all callers for the
+    server's Retry-After; every success adds step / rate, so the rate climbs
+    back by about `step` calls/s per second of clean responses.
+    """
+
+    def __init__(self, rate, min_rate=1.0, max_rate=None, step=2.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 4
+        self.step = step
+        self.throttled = 0
+        self._next_slot = time.monotonic()
+        self._last_cut = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until this caller's slot comes up"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def success(self):
+        with self._lock:
+            self.rate = min(self.rate + self.step / self.rate, self.max_rate)
+
+    def throttle(self, retry_after=None):
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self._last_cut >= 1.0:
+                self._last_cut = now
+                self.rate = max(self.rate / 2, self.min_rate)
+            if retry_after:
+                self._next_slot = max(self._next_slot, time.monotonic() + retry_after)
+
+
+def drive_access_token():
+    """OAuth token for Drive from the environment or the service account"""
+    token = os.environ.get('GOOGLE_DRIVE_ACCESS_TOKEN')
+    if token:
+        return token
+    try:
+        from google.auth.transport.requests import Request
+        from google.oauth2 import service_account
+    except ImportError:
+        sys.exit('❌ Set GOOGLE_DRIVE_ACCESS_TOKEN or install google-auth for service-account credentials')
+
+    credentials = service_account.Credentials.from_service_account_info(
+        {
+            'type': 'service_account',
+            'client_email': os.environ['GOOGLE_DRIVE_CLIENT_EMAIL'],
+            'private_key': os.environ['GOOGLE_DRIVE_PRIVATE_KEY'].replace('\\n', '\n'),
+            'token_uri': 'https://oauth2.googleapis.com/token',
+        },
+        scopes=['https://www.googleapis.com/auth/drive.readonly'],
+    )
+    credentials.refresh(Request())
+    return credentials.token
+
+
+class Checkpoint:
+    """
+    Resumable audit state, written atomically (tmp file + os.replace)
+
+    Per table it keeps a watermark - the last id of the longest prefix of
+    records (in id order) that have all been checked - plus the running
+    counts and findings. Records past the watermark are rechecked on resume.
+    """
+
+    def __init__(self, path, state=None):
+        self.path = path
+        self.state = state or {'version': 1, 'started_at': time.time(), 'complete': False, 'tables': {}}
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+    @classmethod
+    def load(cls, path, resume):
+        if resume:
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+                if not state.get('complete'):
+                    return cls(path, state)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        return cls(path)
+
+    def table(self, name):
+        return self.state['tables'].setdefault(name, {
+            'watermark': None, 'complete': False, 'counts': {}, 'findings': [],
+        })
+
+    def advance(self, name, record_id, result):
+        """Mark a record (and so every record before it) as checked"""
+        with self._lock:
+            table = self.table(name)
+            table['watermark'] = record_id
+            table['counts'][result['status']] = table['counts'].get(result['status'], 0) + 1
+            if result['status'] != 'ok':
+                table['findings'].append(result)
+
+    def save(self, force=False):
+        with self._lock:
+            if not force and time.monotonic() - self._saved_at < CHECKPOINT_INTERVAL_S:
+                return
+            self._saved_at = time.monotonic()
+            tmp_path = f'{self.path}.{os.getpid()}'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.path)
+
+
+class StorageVerifier:
+    """Checks Drive-backed Supabase records against Drive metadata"""
+
+    def __init__(self, supabase_url, service_key, drive_url, drive_token, workers=DEFAULT_WORKERS,
+                 rate=None, write_baseline=False):
+        self.supabase_url = supabase_url.rstrip('/')
+        self.supabase_headers = {'apikey': service_key, 'Authorization': f'Bearer {service_key}'}
+        self.drive_url = drive_url.rstrip('/')
+        self.drive_headers = {'Authorization': f'Bearer {drive_token}'}
+        self.workers = workers
+        # Drive allows ~12k queries/min per user; start well below and let AIMD find the ceiling
+        self.limiter = AdaptiveRateLimiter(rate or workers * 5.0)
+        self.write_baseline = write_baseline
+        self.http = HttpClient()
+        self.calls = Counter()
+
+    # ─── Supabase ────────────────────────────────────────────────────────────
+
+    def _rest(self, method, table, params, body=None, prefer=None):
+        headers = dict(self.supabase_headers)
+        if prefer:
+            headers['Prefer'] = prefer
+        url = f'{self.supabase_url}/rest/v1/{table}?{urlencode(params, safe="(),.*")}'
+        data = self.http.request(method, url, headers, body)
+        return json.loads(data) if data else None
+
+    def records(self, table, after=None):
+        """Drive-backed records of a table in id order, paged by keyset from `after`"""
+        while True:
+            params = [
+                ('select', 'id,gdrive_file_id,storage_path,metadata'),
+                ('storage_provider', 'eq.gdrive'),
+                ('gdrive_file_id', 'not.is.null'),
+                ('order', 'id.asc'),
+                ('limit', str(PAGE_SIZE)),
+            ]
+            if after is not None:
+                params.append(('id', f'gt.{after}'))
+            page = self._rest('GET', table, params)
+            yield from page
+            if len(page) < PAGE_SIZE:
+                return
+            after = page[-1]['id']
+
+    def store_baseline(self, table, record, baseline):
+        metadata = {**(record.get('metadata') or {}), 'storage_integrity': baseline}
+        self._rest('PATCH', table, [('id', f'eq.{record["id"]}')], {'metadata': metadata})
+
+    def delete_records(self, table, ids):
+        for start in range(0, len(ids), DELETE_BATCH):
+            batch = ','.join(ids[start:start + DELETE_BATCH])
+            self._rest('DELETE', table, [('id', f'in.({batch})')])
+
+    # ─── Drive ───────────────────────────────────────────────────────────────
+
+    def _drive(self, file_id, params, on_chunk=None):
+        """One rate-limited Drive call, retried with backoff on throttling and 5xx"""
+        url = f'{self.drive_url}/files/{quote(file_id, safe="")}?{urlencode(params)}'
+        for attempt in range(MAX_ATTEMPTS):
+            self.limiter.acquire()
+            try:
+                data = self.http.request('GET', url, self.drive_headers, on_chunk=on_chunk)
+                self.limiter.success()
+                self.calls['drive'] += 1
+                return data
+            except HttpError as e:
+                if not e.transient or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                if e.throttled:
+                    self.calls['throttled'] += 1
+                    self.limiter.throttle(e.retry_after)
+                delay = e.retry_after or min(0.5 * 2 ** attempt, 30)
+            except OSError:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                delay = min(0.5 * 2 ** attempt, 30)
+            # Jitter so throttled workers do not retry in lockstep
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def stream_md5(self, file_id):
+        """MD5 and size of a file's content, hashed chunk by chunk as it streams in"""
+        digest = hashlib.md5()
+        size = 0
+
+        def consume(chunk):
+            nonlocal size
+            digest.update(chunk)
+            size += len(chunk)
+
+        self._drive(file_id, {'alt': 'media', 'supportsAllDrives': 'true'}, on_chunk=consume)
+        self.calls['streamed'] += 1
+        return digest.hexdigest(), size
+
+    def check(self, table, record):
+        """Verify one record's Drive file, returning its result dict"""
+        result = {'table': table, 'id': record['id'], 'file_id': record['gdrive_file_id'],
+                  'storage_path': record.get('storage_path')}
+        try:
+            meta = json.loads(self._drive(record['gdrive_file_id'], {
+                'fields': 'id,size,md5Checksum,trashed,mimeType', 'supportsAllDrives': 'true',
+            }))
+        except HttpError as e:
+            result['status'] = 'missing' if e.status == 404 else 'error'
+            if e.status != 404:
+                result['error'] = str(e)
+            return result
+        except (OSError, ValueError) as e:
+            return {**result, 'status': 'error', 'error': str(e)}
+
+        if meta.get('trashed'):
+            return {**result, 'status': 'trashed'}
+
+        md5, size = meta.get('md5Checksum'), meta.get('size')
+        if md5 is None:
+            try:
+                md5, size = self.stream_md5(record['gdrive_file_id'])
+            except (HttpError, OSError) as e:
+                return {**result, 'status': 'error', 'error': f'streaming checksum failed: {e}'}
+        observed = {'md5': md5, 'size': int(size)}
+        result['observed'] = observed
+
+        baseline = (record.get('metadata') or {}).get('storage_integrity')
+        if observed['size'] == 0:
+            result['status'] = 'empty'
+        elif baseline is None:
+            result['status'] = 'baselined'
+            if self.write_baseline:
+                try:
+                    self.store_baseline(table, record, {**observed, 'verified_at': time.time()})
+                except (HttpError, OSError) as e:
+                    return {**result, 'status': 'error', 'error': f'storing baseline failed: {e}'}
+        elif baseline.get('md5') != observed['md5'] or baseline.get('size') != observed['size']:
+            result['status'] = 'mismatch'
+            result['expected'] = {'md5': baseline.get('md5'), 'size': baseline.get('size')}
+        else:
+            result['status'] = 'ok'
+        return result
+
+    # ─── Audit ───────────────────────────────────────────────────────────────
+
+    def audit_table(self, table, checkpoint, budget):
+        """
+        Check a table's records with the worker pool, advancing the checkpoint in id order
+
+        Returns:
+            Number of records checked (stops early once `budget` is spent)
+        """
+        state = checkpoint.table(table)
+        if state['complete']:
+            return 0
+
+        checked = 0
+        pending = deque()
+        in_flight = threading.BoundedSemaphore(self.workers * 2)
+        last_log = time.monotonic()
+        started = time.monotonic()
+
+        def drain(block):
+            nonlocal checked, last_log
+            while pending and (block or pending[0][1].done()):
+                record_id, future = pending.popleft()
+                checkpoint.advance(table, record_id, future.result())
+                checked += 1
+                checkpoint.save()
+                if time.monotonic() - last_log > 5:
+                    last_log = time.monotonic()
+                    rate = checked / (last_log - started)
+                    sys.stderr.write(f'   ✓ {checked} checked ({rate:.0f}/s, Drive pacing {self.limiter.rate:.0f}/s)\n')
+
+        def run(record):
+            try:
+                return self.check(table, record)
+            finally:
+                in_flight.release()
+
+        exhausted = True
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for record in self.records(table, state['watermark']):
+                if budget is not None and checked + len(pending) >= budget:
+                    exhausted = False
+                    break
+                in_flight.acquire()
+                pending.append((record['id'], pool.submit(run, record)))
+                drain(block=False)
+            drain(block=True)
+        state['complete'] = exhausted
+
+        checkpoint.save(force=True)
+        return checked
+
+    def audit(self, tables, checkpoint, max_records=None):
+        started = time.monotonic()
+        remaining = max_records
+        for table in tables:
+            if remaining is not None and remaining <= 0:
+                break
+            sys.stderr.write(f'\n📊 Checking {table}...\n')
+            checked = self.audit_table(table, checkpoint, remaining)
+            counts = checkpoint.table(table)['counts']
+            sys.stderr.write(f'   {checked} checked this run; totals {counts}\n')
+            if remaining is not None:
+                remaining -= checked
+
+        checkpoint.state['complete'] = all(checkpoint.table(table)['complete'] for table in tables)
+        checkpoint.save(force=True)
+
+        totals = Counter()
+        for table in tables:
+            totals.update(checkpoint.table(table)['counts'])
+        return {
+            'complete': checkpoint.state['complete'],
+            'elapsed_s': round(time.monotonic() - started, 2),
+            'totals': dict(totals),
+            'tables': {table: checkpoint.table(table) for table in tables},
+            'drive_calls': self.calls['drive'],
+            'throttled': self.calls['throttled'],
+            'streamed': self.calls['streamed'],
+            'final_rate': round(self.limiter.rate, 1),
+        }
+
+    def delete_orphans(self, report):
+        """Delete records whose file is missing or trashed (what verify-storage-sync does)"""
+        deleted = {}
+        for table, state in report['tables'].items():
+            ids = [finding['id'] for finding in state['findings'] if finding['status'] in ORPHANED]
+            if ids:
+                self.delete_records(table, ids)
+                sys.stderr.write(f'   🗑️  Deleted {len(ids)} orphaned {table} records\n')
+            deleted[table] = len(ids)
+        return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel Drive storage-integrity audit')
+    parser.add_argument('--tables', nargs='+', default=DEFAULT_TABLES, help='Tables to audit')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent Drive checks')
+    parser.add_argument('--rate', type=float, help='Initial Drive calls per second (adapts to 429s)')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='Checkpoint file')
+    parser.add_argument('--resume', action='store_true', help='Continue an unfinished audit from the checkpoint')
+    parser.add_argument('--max-records', type=int, help='Stop after this many records (resume later)')
+    parser.add_argument('--write-baseline', action='store_true', help='Store size/MD5 for records without a baseline')
+    parser.add_argument('--delete-orphans', action='store_true', help='Delete records whose file is missing or trashed')
+    parser.add_argument('--report', default=DEFAULT_REPORT, help='Where the JSON report goes')
+    parser.add_argument('--stub', action='store_true', help='Audit the fixtures of a local stub_backend.py')
+    args = parser.parse_args()
+
+    backend = None
+    if args.stub:
+        sys.path.insert(0, ADFORGE_ROOT)
+        from stub_backend import StubBackend
+
+        backend = StubBackend(port=0).start()
+        supabase_url, service_key = backend.url, 'stub-service-key'
+        drive_url, drive_token = f'{backend.url}/drive/v3', 'stub-drive-token'
+    else:
+        supabase_url = os.environ['NEXT_PUBLIC_SUPABASE_URL']
+        service_key = os.environ['SUPABASE_SERVICE_ROLE_KEY']
+        drive_url = os.environ.get('GOOGLE_DRIVE_API_URL', DRIVE_API_URL)
+        drive_token = drive_access_token()
+
+    verifier = StorageVerifier(supabase_url, service_key, drive_url, drive_token, args.workers, args.rate,
+                               args.write_baseline)
+    checkpoint = Checkpoint.load(args.checkpoint, args.resume)
+    sys.stderr.write(f'🔍 Storage integrity audit ({args.workers} workers, checkpoint {args.checkpoint})\n')
+    try:
+        report = verifier.audit(args.tables, checkpoint, args.max_records)
+        if args.delete_orphans and report['complete']:
+            report['deleted'] = verifier.delete_orphans(report)
+    finally:
+        if backend is not None:
+            backend.stop()
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    sys.stderr.write(
+        f"\n✅ {sum(report['totals'].values())} records in {report['elapsed_s']} s "
+        f"({report['drive_calls']} Drive calls, {report['throttled']} throttled) -> {args.report}\n"
+    )
+    if not report['complete']:
+        sys.stderr.write('   Audit incomplete; rerun with --resume to continue\n')
+    print(json.dumps({'complete': report['complete'], 'totals': report['totals']}))
+    sys.exit(0 if set(report['totals']) <= HEALTHY else 1)
+
+
+if __name__ == '__main__':
+    main()
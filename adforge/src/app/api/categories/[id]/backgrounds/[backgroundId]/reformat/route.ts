@@ -3,14 +3,84 @@ import { createServerSupabaseClient } from '@/lib/supabase/server'
 import { regenerateBackgroundInFormat } from '@/lib/ai/gemini'
 import { downloadFile, uploadFile } from '@/lib/storage'
 import { formatToFolderName, getFormatDimensions, FORMATS } from '@/lib/formats'
+import { spawn } from 'child_process'
+import { writeFile, readFile, unlink } from 'fs/promises'
+import path from 'path'
+
+type ReformatOutput = {
+  format: string
+  output_path: string
+  width: number
+  height: number
+  method: 'crop' | 'extend'
+  crop_box: number[]
+  elapsed_ms: number
+}
+
+/**
+ * Run scripts/reformat_background.py once for all target formats
+ * (one decode + saliency pass, then a salient crop or edge-aware extend per format)
+ */
+function reformatLocally(
+  sourcePath: string,
+  targetFormats: string[],
+  fill: string
+): Promise<Record<string, ReformatOutput>> {
+  const inputData = {
+    source_path: sourcePath,
+    output_dir: path.dirname(sourcePath),
+    fill,
+    formats: Object.fromEntries(targetFormats.map((fmt) => [fmt, getFormatDimensions(fmt)])),
+  }
+  const pythonScript = path.join(process.cwd(), 'scripts', 'reformat_background.py')
+
+  return new Promise((resolve, reject) => {
+    const python = spawn('python3', [pythonScript])
+    let stdout = ''
+    let stderr = ''
+
+    python.stdin.write(JSON.stringify(inputData))
+    python.stdin.end()
+
+    python.stdout.on('data', (data) => {
+      stdout += data.toString()
+    })
+
+    python.stderr.on('data', (data) => {
+      stderr += data.toString()
+    })
+
+    python.on('close', (code) => {
+      if (code !== 0) {
+        console.error('❌ Reformat script failed:', stderr)
+        reject(new Error(`Reformat script failed: ${stderr}`))
+        return
+      }
+      console.log(stderr.trim())
+      try {
+        const lines = stdout.trim().split('\n')
+        const result = JSON.parse(lines[lines.length - 1])
+        resolve(Object.fromEntries(result.outputs.map((o: ReformatOutput) => [o.format, o])))
+      } catch (e) {
+        reject(new Error(`Invalid reformat script output: ${stdout}`))
+      }
+    })
+  })
+}
 
 /**
  * POST /api/categories/[id]/backgrounds/[backgroundId]/reformat
  *
- * Downloads the source background image from GDrive, sends it to Gemini
- * as inline_data with a target aspect ratio, and saves each result.
+ * Downloads the source background image from GDrive and derives each target
+ * format from it, then saves each result.
  *
- * Body: { formats: string[] }  e.g. ["16:9", "9:16", "4:5"]
+ * By default the formats are produced locally by scripts/reformat_background.py
+ * (salient crop, or edge-aware extend when cropping would cut the subject), all
+ * from one decode. engine: 'ai' keeps the slower, paid Gemini regeneration as
+ * an opt-in quality path.
+ *
+ * Body: { formats: string[], engine?: 'local' | 'ai', fill?: 'mirror' | 'blur' }
+ *   e.g. { formats: ["16:9", "9:16", "4:5"] }
  */
 export async function POST(
   request: NextRequest,
@@ -44,7 +114,15 @@ export async function POST(
 
     // Parse request body
     const body = await request.json()
-    const { formats } = body
+    const { formats, engine = 'local', fill = 'mirror' } = body
+
+    if (engine !== 'local' && engine !== 'ai') {
+      return NextResponse.json({ error: `Unknown engine: ${engine}` }, { status: 400 })
+    }
+
+    if (fill !== 'mirror' && fill !== 'blur') {
+      return NextResponse.json({ error: `Unknown fill: ${fill}` }, { status: 400 })
+    }
 
     const validFormatKeys = Object.keys(FORMATS)
     const targetFormats: string[] = (formats && Array.isArray(formats))
@@ -74,9 +152,21 @@ export async function POST(
     const sourceMimeType = 'image/jpeg'
     const sourceBase64 = `data:${sourceMimeType};base64,${sourceBuffer.toString('base64')}`
 
-    console.log(`Source image: ${(sourceBuffer.length / 1024).toFixed(0)}KB, reformatting to: ${targetFormats.join(', ')}`)
+    console.log(`Source image: ${(sourceBuffer.length / 1024).toFixed(0)}KB, reformatting to: ${targetFormats.join(', ')} (${engine})`)
 
-    // Generate each format sequentially (each call is heavy)
+    // Local engine: every format comes out of one Python run
+    let localOutputs: Record<string, ReformatOutput> = {}
+    const localSourcePath = `/tmp/reformat_${backgroundId}_${Date.now()}.jpg`
+    if (engine === 'local') {
+      await writeFile(localSourcePath, sourceBuffer)
+      try {
+        localOutputs = await reformatLocally(localSourcePath, targetFormats, fill)
+      } finally {
+        await unlink(localSourcePath).catch(() => {})
+      }
+    }
+
+    // Save each format sequentially (Gemini calls are heavy; uploads share one Drive client)
     const results: Array<{
       format: string
       backgroundId: string
@@ -91,24 +181,47 @@ export async function POST(
       console.log(`  Reformatting to ${fmt}...`)
 
       try {
-        // Call Gemini with the source image
-        const generated = await regenerateBackgroundInFormat(
-          sourceBase64,
-          sourceMimeType,
-          fmt,
-          '2K'
-        )
+        let buffer: Buffer
+        let mimeType: string
+        let promptUsed: string | null
+        let metadata: Record<string, any> = {}
+
+        if (engine === 'ai') {
+          // Call Gemini with the source image
+          const generated = await regenerateBackgroundInFormat(
+            sourceBase64,
+            sourceMimeType,
+            fmt,
+            '2K'
+          )
+          const base64Data = generated.imageData.replace(/^data:image\/\w+;base64,/, '')
+          buffer = Buffer.from(base64Data, 'base64')
+          mimeType = generated.mimeType || 'image/jpeg'
+          promptUsed = generated.promptUsed
+        } else {
+          const output = localOutputs[fmt]
+          buffer = await readFile(output.output_path)
+          await unlink(output.output_path).catch(() => {})
+          mimeType = 'image/jpeg'
+          promptUsed = background.prompt_used ?? null
+          metadata = {
+            reformat: {
+              engine: 'local',
+              method: output.method,
+              fill: output.method === 'extend' ? fill : null,
+              crop_box: output.crop_box,
+              source_background_id: background.id,
+            },
+          }
+        }
 
         // Save the generated image
         const folderName = formatToFolderName(fmt)
         const slug = background.slug || background.name.toLowerCase().replace(/[^a-z0-9]+/g, '-')
         const fileName = `${categorySlug}/backgrounds/${folderName}/${slug}-${fmt.replace(':', 'x')}_${Date.now()}.jpg`
 
-        const base64Data = generated.imageData.replace(/^data:image\/\w+;base64,/, '')
-        const buffer = Buffer.from(base64Data, 'base64')
-
         const storageFile = await uploadFile(buffer, fileName, {
-          contentType: generated.mimeType || 'image/jpeg',
+          contentType: mimeType,
           provider: 'gdrive',
         })
 
@@ -123,7 +236,7 @@ export async function POST(
             name: newName,
             slug: `${slug}-${fmt.replace(':', 'x')}-${Date.now()}`,
             description: background.description || `Reformatted from ${background.name}`,
-            prompt_used: generated.promptUsed,
+            prompt_used: promptUsed,
             format: fmt,
             width: fmtDims.width,
             height: fmtDims.height,
@@ -131,7 +244,7 @@ export async function POST(
             storage_path: storageFile.path,
             storage_url: storageFile.publicUrl,
             gdrive_file_id: storageFile.fileId || null,
-            metadata: {},
+            metadata,
           })
           .select()
           .single()
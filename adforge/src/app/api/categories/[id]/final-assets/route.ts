@@ -5,6 +5,67 @@ import { spawn } from 'child_process'
 import { unlink, readFile } from 'fs/promises'
 import path from 'path'
 
+// Upper bound for profile.sample_every (profile roughly one job in N)
+const MAX_PROFILE_SAMPLE_EVERY = 10000
+
+// Bounds for animation specs; every frame is held in memory until it is encoded
+const ANIMATION_FORMATS = ['webp', 'gif']
+const ANIMATION_EASINGS = ['linear', 'ease_in', 'ease_out', 'ease_in_out']
+const MAX_ANIMATION_FPS = 30
+const MAX_ANIMATION_DURATION_MS = 15000
+
+const isFiniteNumber = (value: unknown): value is number =>
+  typeof value === 'number' && Number.isFinite(value)
+
+// Why an animation spec is rejected, or null when the compositor can render it
+// (see scripts/compositor/animation.py for the keyframe fields)
+function animationError(animation: any): string | null {
+  if (typeof animation !== 'object' || animation === null || Array.isArray(animation)) {
+    return 'animation must be an object'
+  }
+  const { format, fps, duration_ms: durationMs, keyframes, loop, lossless } = animation
+  if (format !== undefined && !ANIMATION_FORMATS.includes(format)) {
+    return `animation.format must be one of ${ANIMATION_FORMATS.join(', ')}`
+  }
+  if (fps !== undefined && !(isFiniteNumber(fps) && fps > 0 && fps <= MAX_ANIMATION_FPS)) {
+    return `animation.fps must be a number in (0, ${MAX_ANIMATION_FPS}]`
+  }
+  if (durationMs !== undefined && !(Number.isInteger(durationMs) && durationMs > 0 && durationMs <= MAX_ANIMATION_DURATION_MS)) {
+    return `animation.duration_ms must be an integer in 1-${MAX_ANIMATION_DURATION_MS}`
+  }
+  if (loop !== undefined && !(Number.isInteger(loop) && loop >= 0)) {
+    return 'animation.loop must be a non-negative integer'
+  }
+  if (lossless !== undefined && typeof lossless !== 'boolean') {
+    return 'animation.lossless must be a boolean'
+  }
+  if (keyframes === undefined) {
+    return null
+  }
+  if (typeof keyframes !== 'object' || keyframes === null || Array.isArray(keyframes)) {
+    return 'animation.keyframes must map layer ids to keyframe lists'
+  }
+  for (const [layerId, frames] of Object.entries(keyframes)) {
+    if (!Array.isArray(frames)) {
+      return `animation.keyframes.${layerId} must be a list`
+    }
+    for (const frame of frames as any[]) {
+      const valid =
+        typeof frame === 'object' && frame !== null && !Array.isArray(frame) &&
+        (frame.t === undefined || (isFiniteNumber(frame.t) && frame.t >= 0)) &&
+        (frame.opacity === undefined || (isFiniteNumber(frame.opacity) && frame.opacity >= 0 && frame.opacity <= 1)) &&
+        (frame.dx === undefined || isFiniteNumber(frame.dx)) &&
+        (frame.dy === undefined || isFiniteNumber(frame.dy)) &&
+        (frame.text === undefined || typeof frame.text === 'string') &&
+        (frame.easing === undefined || ANIMATION_EASINGS.includes(frame.easing))
+      if (!valid) {
+        return `animation.keyframes.${layerId} has an invalid keyframe ({ t >= 0, opacity 0-1, dx, dy, text, easing })`
+      }
+    }
+  }
+  return null
+}
+
 // GET - Fetch all final assets for category
 export async function GET(
   request: NextRequest,
@@ -60,8 +121,37 @@ export async function POST(
       compositeId,
       copyDocId,
       logoUrl,
+      profile,
+      allowSafeZoneViolations = false,
+      // Keyframed Stories animation ({ duration_ms, fps, format: 'webp' | 'gif', keyframes })
+      animation,
     } = body
 
+    // Opt-in profiling: true/false, or { sample_every: N }. The output directory
+    // is server configuration (ADFORGE_PROFILE_DIR), never taken from the client
+    if (profile !== undefined && typeof profile !== 'boolean') {
+      const sampleEvery = profile?.sample_every
+      const valid =
+        typeof profile === 'object' &&
+        Object.keys(profile).every((key) => key === 'sample_every') &&
+        Number.isInteger(sampleEvery) &&
+        sampleEvery >= 1 &&
+        sampleEvery <= MAX_PROFILE_SAMPLE_EVERY
+      if (!valid) {
+        return NextResponse.json(
+          { error: `profile must be a boolean or { sample_every: 1-${MAX_PROFILE_SAMPLE_EVERY} }` },
+          { status: 400 }
+        )
+      }
+    }
+
+    if (animation !== undefined && animation !== null) {
+      const error = animationError(animation)
+      if (error) {
+        return NextResponse.json({ error }, { status: 400 })
+      }
+    }
+
     const FORMAT_DIMENSIONS: Record<string, { width: number; height: number }> = {
       '1:1':  { width: 1080, height: 1080 },
       '16:9': { width: 1920, height: 1080 },
@@ -163,12 +253,21 @@ export async function POST(
       format,
       width,
       height,
-      output_path: `/tmp/final_asset_${Date.now()}.png`
+      output_path: `/tmp/final_asset_${Date.now()}.${animation ? animation.format || 'webp' : 'png'}`,
+      ...(animation ? { mode: 'animated', animation } : {}),
+      // Opt-in cProfile/tracemalloc capture (validated above); false turns off env sampling
+      ...(profile !== undefined
+        ? { profile: typeof profile === 'boolean' ? profile : { sample_every: profile.sample_every } }
+        : {}),
     }
 
     const pythonScript = path.join(process.cwd(), 'scripts', 'composite_final_asset.py')
 
-    const result = await new Promise<string>((resolve, reject) => {
+    const { outputPath, safeZones, animationReport } = await new Promise<{
+      outputPath: string
+      safeZones?: any
+      animationReport?: any
+    }>((resolve, reject) => {
       const python = spawn('python3', [pythonScript])
       let stdout = ''
       let stderr = ''
@@ -187,7 +286,16 @@ export async function POST(
       python.on('close', (code) => {
         if (code !== 0) {
           console.error('❌ Python script failed:', stderr)
-          reject(new Error(`Python script failed: ${stderr}`))
+          // Expected failures (e.g. the render memory queue timing out) come back as JSON
+          let failure: any = null
+          try {
+            failure = JSON.parse(stdout.trim().split('\n').pop() || '')
+          } catch {}
+          if (failure?.code === 'admission_timeout') {
+            reject(Object.assign(new Error(failure.error), { status: 503 }))
+          } else {
+            reject(new Error(`Python script failed: ${stderr}`))
+          }
         } else {
           console.log('✅ Python script output:', stdout)
           // Parse last line as JSON result
@@ -195,28 +303,54 @@ export async function POST(
           const resultLine = lines[lines.length - 1]
           try {
             const result = JSON.parse(resultLine)
-            resolve(result.output_path)
+            if (result.profile) {
+              console.log('📊 Render profile:', result.profile.pstats_path, `(${result.profile.wall_ms} ms)`)
+            }
+            if (result.single_flight) {
+              const roles = result.single_flight.flights.map((f: any) => `${f.kind}:${f.role}`).join(', ')
+              console.log('🔗 Single-flight:', roles, result.single_flight.counters)
+            }
+            if (result.animation) {
+              console.log('🎞️  Animation:', `${result.animation.frames} frames (${result.animation.format})`, `render ${result.animation.render_ms} ms`)
+            }
+            resolve({ outputPath: result.output_path, safeZones: result.safe_zones, animationReport: result.animation })
           } catch (e) {
-            resolve(inputData.output_path)
+            resolve({ outputPath: inputData.output_path })
           }
         }
       })
     })
 
+    // Templates without safe zones have nothing to validate (safeZones is undefined)
+    if (safeZones && !safeZones.valid && !allowSafeZoneViolations) {
+      console.warn('⚠️  Safe zone violations:', safeZones.violations)
+      await unlink(outputPath).catch(() => {})
+      return NextResponse.json(
+        {
+          error: 'Final asset places text or logo ink in a restricted safe zone',
+          safeZones,
+        },
+        { status: 422 }
+      )
+    }
+
     // 6. Upload to Google Drive
     console.log('📤 Uploading final asset to Google Drive...')
 
     const timestamp = Date.now()
     const formatFolder = format.replace(':', 'x') // '1:1' → '1x1', '16:9' → '16x9'
-    const storagePath = `${categorySlug}/final-assets/${formatFolder}/asset_${timestamp}.png`
+    // Animations may come back as .gif when the WebP encoder lacks animation support,
+    // also when this job reused another job's render; trust the reported format
+    const extension = animationReport?.format || path.extname(outputPath).slice(1) || 'png'
+    const storagePath = `${categorySlug}/final-assets/${formatFolder}/asset_${timestamp}.${extension}`
 
     // Read the file as a Buffer
-    const fileBuffer = await readFile(result)
+    const fileBuffer = await readFile(outputPath)
 
     const { fileId, publicUrl } = await uploadFile(
       fileBuffer,
       storagePath,
-      { provider: 'gdrive' }
+      { provider: 'gdrive', contentType: `image/${extension}` }
     )
 
     // 7. Save to database
@@ -238,7 +372,9 @@ export async function POST(
           layers: template.template_data.layers,
           source_composite: compositeUrl,
           source_copy: copyText.generated_text,
-          safe_zones_validated: true,
+          safe_zones_validated: safeZones ? safeZones.valid : null,
+          ...(safeZones ? { safe_zones_report: safeZones } : {}),
+          ...(animationReport ? { animation: { ...animation, ...animationReport } } : {}),
         },
         storage_provider: 'gdrive',
         storage_path: storagePath,
@@ -254,7 +390,7 @@ export async function POST(
     }
 
     // 8. Cleanup temp file
-    await unlink(result).catch(() => {})
+    await unlink(outputPath).catch(() => {})
 
     console.log('✅ Final asset generated successfully!')
 
@@ -267,7 +403,7 @@ export async function POST(
     console.error('❌ Error generating final asset:', error)
     return NextResponse.json(
       { error: error.message || 'Failed to generate final asset' },
-      { status: 500 }
+      { status: error.status || 500 }
     )
   }
 }
@@ -74,6 +74,7 @@ export function BackgroundGallery({
   const [regenDialogOpen, setRegenDialogOpen] = useState(false)
   const [regenBackground, setRegenBackground] = useState<Background | null>(null)
   const [regenFormats, setRegenFormats] = useState<string[]>([])
+  const [regenWithAi, setRegenWithAi] = useState(false)
   const [isRegenerating, setIsRegenerating] = useState(false)
 
   const fetchBackgrounds = async () => {
@@ -192,8 +193,8 @@ export function BackgroundGallery({
 
     setIsRegenerating(true)
     try {
-      // Call the reformat API — sends the actual image to Gemini
-      // to create a variation in the target aspect ratio
+      // Call the reformat API — crops/extends the actual image locally,
+      // or sends it to Gemini for a regenerated variation when opted in
       const response = await fetch(
         `/api/categories/${categoryId}/backgrounds/${regenBackground.id}/reformat`,
         {
@@ -201,6 +202,7 @@ export function BackgroundGallery({
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({
             formats: regenFormats,
+            engine: regenWithAi ? 'ai' : 'local',
           }),
         }
       )
@@ -394,8 +396,8 @@ export function BackgroundGallery({
           <DialogHeader>
             <DialogTitle>Generate Other Formats</DialogTitle>
             <DialogDescription>
-              Send &quot;{regenBackground?.name}&quot; to Gemini to create variations in different aspect ratios.
-              The actual image is used as input — no design details will be lost.
+              Create variations of &quot;{regenBackground?.name}&quot; in different aspect ratios by cropping
+              around the subject, extending the edges where a crop would cut it off.
             </DialogDescription>
           </DialogHeader>
 
@@ -448,6 +450,21 @@ export function BackgroundGallery({
                   })}
                 </div>
               </div>
+
+              <div className="flex items-start gap-2">
+                <Checkbox
+                  id="regen-with-ai"
+                  checked={regenWithAi}
+                  disabled={isRegenerating}
+                  onCheckedChange={(checked) => setRegenWithAi(checked === true)}
+                />
+                <label htmlFor="regen-with-ai" className="text-sm cursor-pointer">
+                  Regenerate with Gemini
+                  <span className="block text-xs text-muted-foreground">
+                    Slower and uses AI credits; redraws the scene for each format instead of cropping.
+                  </span>
+                </label>
+              </div>
             </div>
           )}
 
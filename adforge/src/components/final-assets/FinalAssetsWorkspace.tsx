@@ -6,7 +6,7 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/com
 import { Input } from '@/components/ui/input'
 import { Label } from '@/components/ui/label'
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select'
-import { Loader2, Download, Sparkles } from 'lucide-react'
+import { Loader2, Download, Sparkles, AlertTriangle } from 'lucide-react'
 import { toast } from 'sonner'
 import Image from 'next/image'
 
@@ -67,6 +67,18 @@ interface BrandAsset {
   storage_url: string
 }
 
+// Returned with a 422 when text or logo ink lands in a restricted safe zone
+interface SafeZoneReport {
+  valid: boolean
+  violations: string[]
+  zones: Array<{
+    id: string
+    name: string
+    type: 'safe' | 'restricted'
+    overlap_percent: number
+  }>
+}
+
 interface FinalAssetsWorkspaceProps {
   categoryId: string
   format?: string
@@ -82,6 +94,7 @@ export function FinalAssetsWorkspace({ categoryId, format = '1:1' }: FinalAssets
 
   const [loading, setLoading] = useState(true)
   const [generating, setGenerating] = useState(false)
+  const [safeZoneReport, setSafeZoneReport] = useState<SafeZoneReport | null>(null)
   const generatingRef = useRef(false)
   const [assetName, setAssetName] = useState('')
 
@@ -222,7 +235,7 @@ export function FinalAssetsWorkspace({ categoryId, format = '1:1' }: FinalAssets
     }
   }
 
-  const handleGenerate = async () => {
+  const handleGenerate = async (allowSafeZoneViolations = false) => {
     if (generatingRef.current) return
     generatingRef.current = true
 
@@ -256,15 +269,23 @@ export function FinalAssetsWorkspace({ categoryId, format = '1:1' }: FinalAssets
           copyDocId: selectedCopyDocId,
           ...(selectedTemplateId && { templateId: selectedTemplateId }),
           ...(logo && { logoUrl: logo.storage_url }),
+          ...(allowSafeZoneViolations && { allowSafeZoneViolations: true }),
         })
       })
 
       const data = await response.json()
 
+      if (response.status === 422 && data.safeZones) {
+        setSafeZoneReport(data.safeZones)
+        toast.error('Text or logo lands in a restricted safe zone — see the report below')
+        return
+      }
+
       if (data.error) {
         throw new Error(data.error)
       }
 
+      setSafeZoneReport(null)
       toast.success('Final ad generated successfully! 🎉')
       setAssetName('')
       fetchFinalAssets()
@@ -446,7 +467,7 @@ export function FinalAssetsWorkspace({ categoryId, format = '1:1' }: FinalAssets
             </div>
 
             <Button
-              onClick={handleGenerate}
+              onClick={() => handleGenerate()}
               disabled={generating || !assetName.trim() || !selectedCompositeId || !selectedCopyDocId}
               className="w-full"
             >
@@ -462,6 +483,43 @@ export function FinalAssetsWorkspace({ categoryId, format = '1:1' }: FinalAssets
                 </>
               )}
             </Button>
+
+            {/* Safe zone violations from the last attempt */}
+            {safeZoneReport && (
+              <div className="border border-amber-300 bg-amber-50 rounded-lg p-3 space-y-2">
+                <p className="text-sm font-medium flex items-center gap-2 text-amber-800">
+                  <AlertTriangle className="h-4 w-4" />
+                  Safe zone violations
+                </p>
+                <ul className="text-xs text-amber-900 list-disc pl-5 space-y-1">
+                  {safeZoneReport.violations.map((violation) => (
+                    <li key={violation}>{violation}</li>
+                  ))}
+                </ul>
+                {safeZoneReport.zones.some((zone) => zone.type === 'restricted' && zone.overlap_percent > 0) && (
+                  <p className="text-xs text-muted-foreground">
+                    Restricted zone coverage:{' '}
+                    {safeZoneReport.zones
+                      .filter((zone) => zone.type === 'restricted' && zone.overlap_percent > 0)
+                      .map((zone) => `${zone.name} ${zone.overlap_percent}%`)
+                      .join(', ')}
+                  </p>
+                )}
+                <div className="flex gap-2">
+                  <Button
+                    size="sm"
+                    variant="outline"
+                    onClick={() => handleGenerate(true)}
+                    disabled={generating}
+                  >
+                    Generate anyway
+                  </Button>
+                  <Button size="sm" variant="ghost" onClick={() => setSafeZoneReport(null)} disabled={generating}>
+                    Dismiss
+                  </Button>
+                </div>
+              </div>
+            )}
             </div>
 
             {/* Right Column - Previews */}
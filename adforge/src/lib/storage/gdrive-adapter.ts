@@ -20,16 +20,31 @@ export class GoogleDriveAdapter implements StorageAdapter {
   private folderId: string
 
   constructor() {
-    // Initialize Google Drive API client
-    const auth = new google.auth.GoogleAuth({
-      credentials: {
-        client_email: process.env.GOOGLE_DRIVE_CLIENT_EMAIL,
-        private_key: process.env.GOOGLE_DRIVE_PRIVATE_KEY?.replace(/\\n/g, '\n'),
-      },
-      scopes: ['https://www.googleapis.com/auth/drive'],
-    })
+    // Initialize Google Drive API client. GOOGLE_DRIVE_ACCESS_TOKEN and
+    // GOOGLE_DRIVE_API_URL (e.g. http://127.0.0.1:54329/drive/v3) point it at
+    // a pre-issued token and another Drive endpoint, such as stub_backend.py
+    // in load tests
+    const accessToken = process.env.GOOGLE_DRIVE_ACCESS_TOKEN
+    let auth
+    if (accessToken) {
+      auth = new google.auth.OAuth2()
+      auth.setCredentials({ access_token: accessToken })
+    } else {
+      auth = new google.auth.GoogleAuth({
+        credentials: {
+          client_email: process.env.GOOGLE_DRIVE_CLIENT_EMAIL,
+          private_key: process.env.GOOGLE_DRIVE_PRIVATE_KEY?.replace(/\\n/g, '\n'),
+        },
+        scopes: ['https://www.googleapis.com/auth/drive'],
+      })
+    }
 
-    this.drive = google.drive({ version: 'v3', auth })
+    const apiUrl = process.env.GOOGLE_DRIVE_API_URL
+    this.drive = google.drive({
+      version: 'v3',
+      auth,
+      ...(apiUrl ? { rootUrl: apiUrl.replace(/drive\/v3\/?$/, '') } : {}),
+    })
     this.folderId = process.env.GOOGLE_DRIVE_FOLDER_ID || ''
 
     if (!this.folderId) {
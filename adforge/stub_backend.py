@@ -0,0 +1,631 @@
+"""
+AdForge Local Stub Backend
+A localhost stand-in for the Supabase (auth + PostgREST) and Google Drive
+endpoints the app talks to, so UI tests and audits run without network access
+or real credentials.
+
+Run the Next.js app against it:
+    python3 stub_backend.py --port 54329
+    NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54329 \
+    NEXT_PUBLIC_SUPABASE_ANON_KEY=stub-anon-key npm run dev
+
+Served endpoints:
+    POST /auth/v1/token?grant_type=password|refresh_token, /auth/v1/signup, /auth/v1/logout
+    GET  /auth/v1/user
+    GET|HEAD|POST|PATCH|DELETE /rest/v1/<table>   (eq/neq/in/is filters, order, limit, count)
+    GET  /images/<name>.png?w=&h=                  (solid-colour PNG of the requested size)
+    GET  /drive/v3/files/<id>[?alt=media]          (Drive files.get metadata or content)
+    GET|POST /drive/v3/files                       (files.list by name/parent, folder create)
+    POST /upload/drive/v3/files?uploadType=multipart, /drive/v3/files/<id>/permissions
+
+Point Drive clients at it with GOOGLE_DRIVE_API_URL=http://127.0.0.1:54329/drive/v3.
+"""
+
+import argparse
+import base64
+import copy
+import hashlib
+import json
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+DEFAULT_PORT = 54329
+STUB_EMAIL = 'e2e@adforge.test'
+STUB_PASSWORD = 'adforge-e2e-password'
+STUB_USER_ID = '00000000-0000-4000-8000-00000000e2e0'
+STUB_CATEGORY_ID = 'a7510dad-d33d-4e77-8ed2-6b41fb92990f'
+TOKEN_PREFIX = 'stub'
+
+FORMAT_SIZES = {
+    '1:1': (1080, 1080),
+    '16:9': (1920, 1080),
+    '9:16': (1080, 1920),
+    '4:5': (1080, 1350),
+}
+
+
+def png_bytes(width, height, rgb=(200, 200, 200)):
+    """Encode a solid-colour RGB PNG with the standard library only"""
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    row = b'\x00' + bytes(rgb) * width
+    raw = row * height
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', header)
+        + chunk(b'IDAT', zlib.compress(raw, 9))
+        + chunk(b'IEND', b'')
+    )
+
+
+def _jwt(payload):
+    """Build an unsigned JWT-shaped token (supabase-js only decodes, never verifies)"""
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b'=').decode()
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode(payload)}.{TOKEN_PREFIX}"
+
+
+DRIVE_FOLDER_MIME = 'application/vnd.google-apps.folder'
+
+
+def drive_file(file_id, name, content=None, image=None, mime_type='image/png', trashed=False, checksum=True, parents=None):
+    """
+    A stub Drive file; image=(width, height, rgb) renders its PNG content on first use
+
+    checksum=False leaves md5Checksum/size out of files.get, as Drive does for
+    some files, so clients have to hash the content themselves.
+    """
+    return {'id': file_id, 'name': name, 'mimeType': mime_type, 'trashed': trashed, 'content': content, 'image': image,
+            'checksum': checksum, 'parents': parents or []}
+
+
+def default_drive_files(tables):
+    """Drive files backing every fixture row that has a gdrive_file_id"""
+    files = {}
+    for rows in tables.values():
+        for row in rows:
+            query = parse_qs(urlparse(row.get('storage_url') or '').query)
+            if row.get('gdrive_file_id') and 'w' in query and 'h' in query:
+                seed = zlib.crc32(urlparse(row['storage_url']).path.encode())
+                image = (int(query['w'][0]), int(query['h'][0]), (seed & 0xff, (seed >> 8) & 0xff, (seed >> 16) & 0xff))
+                files[row['gdrive_file_id']] = drive_file(row['gdrive_file_id'], f"{row['id']}.png", image=image)
+    return files
+
+
+def default_fixtures(base_url):
+    """Seed rows for one user with a fully populated category"""
+    def image(name, width, height):
+        return f"{base_url}/images/{name}.png?w={width}&h={height}"
+
+    created = '2026-01-15T10:00:00+00:00'
+    owner = {'user_id': STUB_USER_ID, 'category_id': STUB_CATEGORY_ID, 'created_at': created}
+
+    tables = {
+        'categories': [{
+            'id': STUB_CATEGORY_ID,
+            'user_id': STUB_USER_ID,
+            'name': 'Vitamin C Gummies',
+            'slug': 'vitamin-c-gummies',
+            'description': 'Stub category for local testing',
+            'look_and_feel': 'Bright, citrus, playful',
+            'brand_doc_name': None,
+            'brand_voice': None,
+            'created_at': created,
+            'updated_at': created,
+        }],
+        'products': [],
+        'product_images': [],
+        'angled_shots': [],
+        'backgrounds': [],
+        'composites': [],
+        'copy_docs': [],
+        'guidelines': [],
+        'templates': [],
+        'final_assets': [],
+        'brand_assets': [],
+        'brand_voices': [],
+        'brand_guidelines': [],
+        'asset_references': [],
+        'deletion_queue': [],
+    }
+
+    for n in range(2):
+        product_id = f"00000000-0000-4000-8000-0000000001{n:02d}"
+        tables['products'].append({**owner, 'id': product_id, 'name': f"Gummy Pack {n + 1}", 'slug': f"gummy-pack-{n + 1}", 'description': 'Stub product'})
+        tables['product_images'].append({
+            'id': f"00000000-0000-4000-8000-0000000002{n:02d}", 'product_id': product_id, 'user_id': STUB_USER_ID,
+            'file_name': f"pack-{n + 1}.png", 'file_path': f"products/pack-{n + 1}.png",
+            'storage_provider': 'gdrive', 'storage_url': image(f"product-{n + 1}", 1600, 1600),
+            'is_primary': True, 'created_at': created,
+        })
+
+    for n, (fmt, (width, height)) in enumerate(FORMAT_SIZES.items()):
+        tag = fmt.replace(':', 'x')
+        common = {**owner, 'format': fmt, 'width': width, 'height': height, 'storage_provider': 'gdrive'}
+        tables['angled_shots'].append({
+            **common, 'id': f"00000000-0000-4000-8000-0000000003{n:02d}", 'product_id': tables['products'][0]['id'],
+            'angle_name': 'front', 'display_name': 'Front', 'storage_url': image(f"angle-{tag}", width, height),
+        })
+        tables['backgrounds'].append({
+            **common, 'id': f"00000000-0000-4000-8000-0000000004{n:02d}", 'gdrive_file_id': f"drive-background-{tag}",
+            'storage_path': f"vitamin-c-gummies/backgrounds/{tag}/citrus.png", 'name': f"Citrus {fmt}",
+            'slug': f"citrus-{tag}", 'prompt': 'Sunny citrus kitchen', 'storage_url': image(f"background-{tag}", width, height),
+        })
+        tables['composites'].append({
+            **common, 'id': f"00000000-0000-4000-8000-0000000005{n:02d}", 'gdrive_file_id': f"drive-composite-{tag}",
+            'storage_path': f"vitamin-c-gummies/composites/{tag}/composite.png", 'name': f"Composite {fmt}",
+            'slug': f"composite-{tag}", 'background_id': tables['backgrounds'][-1]['id'],
+            'storage_url': image(f"composite-{tag}", width, height),
+        })
+        tables['final_assets'].append({
+            **common, 'id': f"00000000-0000-4000-8000-0000000006{n:02d}", 'gdrive_file_id': f"drive-final-{tag}",
+            'name': f"Final {fmt}",
+            'composite_id': tables['composites'][-1]['id'], 'composition_data': {},
+            'storage_path': f"vitamin-c-gummies/final-assets/{tag}/asset.png",
+            'storage_url': image(f"final-{tag}", width, height),
+        })
+
+    tables['copy_docs'].append({
+        **owner, 'id': '00000000-0000-4000-8000-000000000700', 'copy_type': 'headline',
+        'original_text': 'Boost your day', 'generated_text': 'Sunshine in every bite', 'language': 'en',
+    })
+    tables['templates'].append({
+        **owner, 'id': '00000000-0000-4000-8000-000000000800', 'name': 'Default 1:1', 'format': '1:1',
+        'width': 1080, 'height': 1080,
+        'template_data': {
+            'layers': [
+                {'id': 'bg', 'type': 'background', 'x': 0, 'y': 0, 'width': 100, 'height': 100, 'z_index': 0},
+                {'id': 'text', 'type': 'text', 'name': 'headline', 'x': 10, 'y': 80, 'width': 80, 'height': 15, 'z_index': 2, 'font_size': 48},
+            ],
+            'safe_zones': [],
+        },
+    })
+    tables['guidelines'].append({
+        **owner, 'id': '00000000-0000-4000-8000-000000000900', 'name': 'Brand guide', 'format': '1:1',
+        'storage_url': image('guideline', 1080, 1080),
+    })
+    return tables
+
+
+class StubState:
+    """Mutable tables, Drive files and per-path latency shared by all handler threads"""
+
+    def __init__(self, tables, latency_ms=0, route_latency_ms=None, drive_files=None, drive_rate_limit=None):
+        self.tables = tables
+        self.drive_files = drive_files if drive_files is not None else default_drive_files(tables)
+        self.latency_ms = latency_ms
+        self.route_latency_ms = route_latency_ms or {}
+        # Drive requests allowed per second before answering 429 (None = unlimited)
+        self.drive_rate_limit = drive_rate_limit
+        self.drive_window = []
+        self.drive_throttled = 0
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    def drive_throttle(self):
+        """Record a Drive request; True when it exceeds drive_rate_limit over the last second"""
+        if not self.drive_rate_limit:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            self.drive_window = [t for t in self.drive_window if now - t < 1.0]
+            if len(self.drive_window) >= self.drive_rate_limit:
+                self.drive_throttled += 1
+                return True
+            self.drive_window.append(now)
+            return False
+
+    def delay_for(self, path):
+        for prefix, delay in self.route_latency_ms.items():
+            if path.startswith(prefix):
+                return delay / 1000
+        return self.latency_ms / 1000
+
+
+def _parse_filter(value):
+    """Split a PostgREST filter value like 'eq.abc' into (operator, operand)"""
+    operator, _, operand = value.partition('.')
+    return operator, unquote(operand)
+
+
+def _matches(row, column, operator, operand):
+    if operator == 'not':
+        return not _matches(row, column, *_parse_filter(operand))
+    value = row.get(column)
+    if operator == 'eq':
+        return str(value).lower() == operand.lower() if isinstance(value, bool) else str(value) == operand
+    if operator == 'neq':
+        return str(value) != operand
+    if operator == 'in':
+        return str(value) in [item.strip('"') for item in operand.strip('()').split(',')]
+    if operator == 'is':
+        return value is None if operand == 'null' else str(value).lower() == operand
+    if operator in ('gt', 'gte', 'lt', 'lte'):
+        if value is None:
+            return False
+        left, right = str(value), operand
+        return {'gt': left > right, 'gte': left >= right, 'lt': left < right, 'lte': left <= right}[operator]
+    if operator in ('like', 'ilike'):
+        needle = operand.replace('*', '').replace('%', '')
+        return needle.lower() in str(value).lower() if operator == 'ilike' else needle in str(value)
+    return True
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Routes auth, PostgREST and image requests onto the shared StubState"""
+
+    server_version = 'AdForgeStub/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send(self, status, body=None, headers=None, content_type='application/json'):
+        payload = b''
+        if body is not None:
+            payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Headers', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, HEAD, POST, PATCH, DELETE, OPTIONS')
+        self.send_header('Access-Control-Expose-Headers', 'Content-Range')
+        self.send_header('Timing-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(payload)
+
+    def _body(self):
+        if 'chunked' in (self.headers.get('Transfer-Encoding') or '').lower():
+            # Streamed uploads (Node fetch with a stream body) arrive chunked
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    while self.rfile.readline().strip():
+                        pass
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        return raw
+
+    def _json_body(self):
+        raw = self._body()
+        return json.loads(raw) if raw else {}
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        with self.state.lock:
+            self.state.request_count += 1
+        delay = self.state.delay_for(url.path)
+        if delay:
+            time.sleep(delay)
+
+        if self.command == 'OPTIONS':
+            return self._send(204)
+        if url.path.startswith('/auth/v1/'):
+            return self._auth(url)
+        if url.path.startswith('/rest/v1/'):
+            return self._rest(url)
+        if url.path.startswith('/images/'):
+            return self._image(url)
+        if url.path.startswith(('/drive/v3/files', '/upload/drive/v3/files')):
+            return self._drive(url)
+        if url.path == '/health':
+            return self._send(200, {'ok': True, 'requests': self.state.request_count})
+        return self.handle_extra(url)
+
+    def handle_extra(self, url):
+        """Hook for subclasses that serve additional endpoints"""
+        return self._send(404, {'message': f"No stub for {self.command} {url.path}"})
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = do_OPTIONS = _dispatch
+
+    # ─── Auth ────────────────────────────────────────────────────────────────
+
+    def _user(self):
+        return {
+            'id': STUB_USER_ID,
+            'aud': 'authenticated',
+            'role': 'authenticated',
+            'email': STUB_EMAIL,
+            'app_metadata': {'provider': 'email', 'providers': ['email']},
+            'user_metadata': {},
+            'created_at': '2026-01-01T00:00:00Z',
+        }
+
+    def _session(self):
+        expires_at = int(time.time()) + 3600
+        access_token = _jwt({
+            'sub': STUB_USER_ID, 'email': STUB_EMAIL, 'role': 'authenticated',
+            'aud': 'authenticated', 'exp': expires_at, 'session_id': str(uuid.uuid4()),
+        })
+        return {
+            'access_token': access_token,
+            'token_type': 'bearer',
+            'expires_in': 3600,
+            'expires_at': expires_at,
+            'refresh_token': f"{TOKEN_PREFIX}-refresh-{uuid.uuid4().hex}",
+            'user': self._user(),
+        }
+
+    def _auth(self, url):
+        path = url.path[len('/auth/v1'):]
+        if path == '/token' and self.command == 'POST':
+            grant = parse_qs(url.query).get('grant_type', [''])[0]
+            body = self._json_body()
+            if grant == 'password':
+                if body.get('email') != STUB_EMAIL or body.get('password') != STUB_PASSWORD:
+                    return self._send(400, {'error': 'invalid_grant', 'error_description': 'Invalid login credentials'})
+                return self._send(200, self._session())
+            if grant == 'refresh_token' and str(body.get('refresh_token', '')).startswith(TOKEN_PREFIX):
+                return self._send(200, self._session())
+            return self._send(400, {'error': 'invalid_grant', 'error_description': 'Unsupported grant'})
+        if path == '/signup' and self.command == 'POST':
+            return self._send(200, self._session())
+        if path == '/logout':
+            return self._send(204)
+        if path == '/user':
+            token = (self.headers.get('Authorization') or '').removeprefix('Bearer ').strip()
+            if token.endswith(f".{TOKEN_PREFIX}"):
+                return self._send(200, self._user())
+            return self._send(401, {'code': 401, 'msg': 'Invalid JWT'})
+        return self._send(404, {'msg': f"No auth stub for {path}"})
+
+    # ─── PostgREST ───────────────────────────────────────────────────────────
+
+    def _rest(self, url):
+        table = url.path[len('/rest/v1/'):].strip('/')
+        rows = self.state.tables.setdefault(table, [])
+        params = parse_qs(url.query, keep_blank_values=True)
+        reserved = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+        filters = [
+            (column, *_parse_filter(value))
+            for column, values in params.items() if column not in reserved
+            for value in values
+        ]
+        prefer = self.headers.get('Prefer') or ''
+        wants_object = 'vnd.pgrst.object' in (self.headers.get('Accept') or '')
+
+        with self.state.lock:
+            matched = [row for row in rows if all(_matches(row, *f) for f in filters)]
+
+            if self.command == 'POST':
+                body = self._json_body()
+                new_rows = body if isinstance(body, list) else [body]
+                created = []
+                for new_row in new_rows:
+                    row = {'id': str(uuid.uuid4()), 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime()), **new_row}
+                    rows.append(row)
+                    created.append(copy.deepcopy(row))
+                return self._respond_rows(created, wants_object, prefer, status=201)
+
+            if self.command == 'PATCH':
+                changes = self._json_body()
+                for row in matched:
+                    row.update(changes)
+                return self._respond_rows(copy.deepcopy(matched), wants_object, prefer)
+
+            if self.command == 'DELETE':
+                remaining = [row for row in rows if row not in matched]
+                rows[:] = remaining
+                return self._respond_rows(copy.deepcopy(matched), wants_object, prefer)
+
+            result = copy.deepcopy(matched)
+
+        for order in params.get('order', []):
+            for clause in reversed(order.split(',')):
+                column, *modifiers = clause.split('.')
+                result.sort(key=lambda row: (row.get(column) is None, str(row.get(column))), reverse='desc' in modifiers)
+
+        total = len(result)
+        offset = int(params.get('offset', ['0'])[0])
+        if 'limit' in params:
+            result = result[offset:offset + int(params['limit'][0])]
+        else:
+            result = result[offset:]
+
+        headers = {}
+        if 'count=' in prefer:
+            end = offset + len(result) - 1
+            headers['Content-Range'] = f"{offset}-{end}/{total}" if result else f"*/{total}"
+
+        if wants_object:
+            if len(result) != 1:
+                return self._send(406, {
+                    'code': 'PGRST116',
+                    'details': f"The result contains {len(result)} rows",
+                    'hint': None,
+                    'message': 'JSON object requested, multiple (or no) rows returned',
+                }, headers)
+            return self._send(200, result[0], headers)
+        return self._send(200, result, headers)
+
+    def _respond_rows(self, rows, wants_object, prefer, status=200):
+        if 'return=representation' not in prefer:
+            return self._send(204 if status == 200 else status)
+        if wants_object:
+            return self._send(status, rows[0] if rows else None)
+        return self._send(status, rows)
+
+    # ─── Images ──────────────────────────────────────────────────────────────
+
+    def _image(self, url):
+        query = parse_qs(url.query)
+        width = int(query.get('w', ['512'])[0])
+        height = int(query.get('h', ['512'])[0])
+        seed = zlib.crc32(url.path.encode())
+        rgb = (seed & 0xff, (seed >> 8) & 0xff, (seed >> 16) & 0xff)
+        return self._send(200, png_bytes(width, height, rgb), {'Cache-Control': 'public, max-age=3600'}, 'image/png')
+
+
+    # ─── Drive ───────────────────────────────────────────────────────────────
+
+    def _drive(self, url):
+        if self.state.drive_throttle():
+            self._body()
+            return self._send(429, {'error': {
+                'code': 429, 'message': 'Rate Limit Exceeded',
+                'errors': [{'domain': 'usageLimits', 'reason': 'rateLimitExceeded', 'message': 'Rate Limit Exceeded'}],
+            }}, {'Retry-After': '1'})
+        if url.path.startswith('/upload/'):
+            return self._drive_upload()
+        if url.path.rstrip('/') == '/drive/v3/files':
+            return self._drive_list() if self.command == 'GET' else self._drive_create(self._json_body(), None)
+
+        file_id, _, sub = unquote(url.path[len('/drive/v3/files/'):]).partition('/')
+        entry = self.state.drive_files.get(file_id)
+        if entry is None:
+            return self._send(404, {'error': {'code': 404, 'message': f"File not found: {file_id}.", 'errors': [{'reason': 'notFound'}]}})
+
+        if sub == 'permissions':
+            self._body()
+            return self._send(200, {'kind': 'drive#permission', 'id': 'anyoneWithLink', 'type': 'anyone', 'role': 'reader'})
+        if self.command == 'DELETE':
+            with self.state.lock:
+                self.state.drive_files.pop(file_id, None)
+            return self._send(204)
+
+        with self.state.lock:
+            if entry['content'] is None and entry.get('image'):
+                entry['content'] = png_bytes(*entry['image'])
+        content = entry['content'] or b''
+
+        if parse_qs(url.query).get('alt') == ['media']:
+            return self._send(200, content, content_type=entry['mimeType'])
+        return self._send(200, self._drive_metadata(entry))
+
+    def _drive_metadata(self, entry):
+        metadata = {'kind': 'drive#file', 'id': entry['id'], 'name': entry['name'], 'mimeType': entry['mimeType'], 'trashed': entry['trashed']}
+        if entry.get('checksum', True) and not entry['mimeType'].startswith('application/vnd.google-apps.'):
+            # Google-native documents have neither; blobs always report both
+            if 'md5Checksum' in entry:
+                metadata['size'], metadata['md5Checksum'] = entry['size'], entry['md5Checksum']
+            else:
+                content = entry['content'] or b''
+                metadata['size'] = str(len(content))
+                metadata['md5Checksum'] = hashlib.md5(content).hexdigest()
+        return metadata
+
+    def _drive_list(self):
+        """files.list for the name / parent / folder / trashed clauses the storage adapter sends"""
+        q = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+        clauses = {
+            'name': re.search(r"name\s*=\s*'([^']*)'", q),
+            'parent': re.search(r"'([^']*)'\s+in\s+parents", q),
+            'mime': re.search(r"mimeType\s*=\s*'([^']*)'", q),
+        }
+        with self.state.lock:
+            files = [
+                {'id': entry['id'], 'name': entry['name']}
+                for entry in self.state.drive_files.values()
+                if not (clauses['name'] and entry['name'] != clauses['name'].group(1))
+                and not (clauses['parent'] and clauses['parent'].group(1) not in entry.get('parents', []))
+                and not (clauses['mime'] and entry['mimeType'] != clauses['mime'].group(1))
+                and not ('trashed=false' in q.replace(' ', '') and entry['trashed'])
+            ]
+        return self._send(200, {'kind': 'drive#fileList', 'files': files})
+
+    def _drive_create(self, metadata, content):
+        """Store a new file; uploaded content is kept as size + MD5 only so long load tests stay small"""
+        entry = drive_file(
+            uuid.uuid4().hex, metadata.get('name', 'untitled'), mime_type=metadata.get('mimeType', 'application/octet-stream'),
+            parents=metadata.get('parents'),
+        )
+        if content is not None:
+            entry['size'] = str(len(content))
+            entry['md5Checksum'] = hashlib.md5(content).hexdigest()
+        with self.state.lock:
+            self.state.drive_files[entry['id']] = entry
+        return self._send(200, self._drive_metadata(entry))
+
+    def _drive_upload(self):
+        """uploadType=multipart: a JSON metadata part followed by the media part"""
+        boundary = re.search(r'boundary="?([^";]+)"?', self.headers.get('Content-Type') or '')
+        if boundary is None:
+            return self._send(400, {'error': {'code': 400, 'message': 'Only multipart uploads are stubbed'}})
+        parts = []
+        for part in self._body().split(b'--' + boundary.group(1).encode())[1:-1]:
+            _, _, content = part.lstrip(b'\r\n').partition(b'\r\n\r\n')
+            parts.append(content[:-2] if content.endswith(b'\r\n') else content)
+        metadata = json.loads(parts[0]) if parts else {}
+        return self._drive_create(metadata, parts[1] if len(parts) > 1 else b'')
+
+
+class StubBackend:
+    """Run the stub server on a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, latency_ms=0, route_latency_ms=None, handler=StubHandler, tables=None,
+                 drive_files=None, drive_rate_limit=None):
+        self.host = host
+        self.port = port
+        self.url = f"http://{host}:{port}"
+        self._default_tables = tables is None
+        self.state = StubState(tables or default_fixtures(self.url), latency_ms, route_latency_ms, drive_files, drive_rate_limit)
+        self._handler = handler
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler)
+        self._server.daemon_threads = True
+        self._server.state = self.state
+        if self.port == 0:
+            self.port = self._server.server_address[1]
+            self.url = f"http://{self.host}:{self.port}"
+            if self._default_tables:
+                self.state.tables = default_fixtures(self.url)
+                self.state.drive_files = default_drive_files(self.state.tables)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Supabase/Drive stand-in for AdForge')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay added to every response')
+    args = parser.parse_args()
+
+    backend = StubBackend(args.host, args.port, args.latency_ms).start()
+    print(f"🧪 Stub backend listening on {backend.url} (login: {STUB_EMAIL} / {STUB_PASSWORD})", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        backend.stop()
+
+
+if __name__ == '__main__':
+    main()
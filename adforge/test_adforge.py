@@ -1,218 +1,77 @@
 """
 AdForge Application Testing Script
 Tests authentication, category management, products, and navigation
+
+Uses the shared harness in conftest.py (one browser, saved login, stub backend):
+    pytest test_adforge.py -n auto
 """
-from playwright.sync_api import sync_playwright, expect
-import time
-import os
-
-def test_adforge():
-    """Comprehensive test of AdForge application"""
-
-    screenshots_dir = '/tmp/adforge_screenshots'
-    os.makedirs(screenshots_dir, exist_ok=True)
-
-    with sync_playwright() as p:
-        # Launch browser in headless mode
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080}
-        )
-        page = context.new_page()
-
-        print("Starting AdForge application tests...")
-
-        # Test 1: Authentication Flow - Unauthenticated Access
-        print("\n=== Test 1: Authentication Flow ===")
-        try:
-            page.goto('http://localhost:3000')
-            page.wait_for_load_state('networkidle')
-            time.sleep(1)  # Additional wait for redirects
-
-            current_url = page.url
-            print(f"Current URL after accessing root: {current_url}")
-
-            if '/auth/login' in current_url:
-                print("✓ Correctly redirected to login page")
-                page.screenshot(path=f'{screenshots_dir}/01_login_page.png', full_page=True)
-            else:
-                print(f"✗ Expected redirect to login, but got: {current_url}")
-                page.screenshot(path=f'{screenshots_dir}/01_unexpected_page.png', full_page=True)
-        except Exception as e:
-            print(f"✗ Error testing authentication: {e}")
-            page.screenshot(path=f'{screenshots_dir}/01_error.png', full_page=True)
-
-        # Test 2: Check if we can access protected routes
-        print("\n=== Test 2: Protected Routes ===")
-        try:
-            page.goto('http://localhost:3000/categories')
-            page.wait_for_load_state('networkidle')
-            time.sleep(1)
-
-            current_url = page.url
-            print(f"Accessing /categories redirects to: {current_url}")
-
-            if '/auth/login' in current_url:
-                print("✓ Categories page is protected - redirects to login")
-            else:
-                print(f"✗ Categories page should be protected")
-
-            page.screenshot(path=f'{screenshots_dir}/02_protected_categories.png', full_page=True)
-        except Exception as e:
-            print(f"✗ Error testing protected routes: {e}")
-            page.screenshot(path=f'{screenshots_dir}/02_error.png', full_page=True)
-
-        # Test 3: Login Page Structure
-        print("\n=== Test 3: Login Page Structure ===")
-        try:
-            page.goto('http://localhost:3000/auth/login')
-            page.wait_for_load_state('networkidle')
-            time.sleep(1)
-
-            # Inspect login page elements
-            print("Inspecting login page elements...")
-
-            # Look for common login elements
-            email_input = page.locator('input[type="email"]').count()
-            password_input = page.locator('input[type="password"]').count()
-            buttons = page.locator('button').all()
-
-            print(f"Email inputs found: {email_input}")
-            print(f"Password inputs found: {password_input}")
-            print(f"Buttons found: {len(buttons)}")
-
-            for i, button in enumerate(buttons):
-                try:
-                    text = button.inner_text()
-                    print(f"  Button {i+1}: {text}")
-                except:
-                    print(f"  Button {i+1}: (no text)")
-
-            page.screenshot(path=f'{screenshots_dir}/03_login_structure.png', full_page=True)
-
-            if email_input > 0 and password_input > 0:
-                print("✓ Login form elements present")
-            else:
-                print("⚠ Login form may be incomplete")
-
-        except Exception as e:
-            print(f"✗ Error inspecting login page: {e}")
-            page.screenshot(path=f'{screenshots_dir}/03_error.png', full_page=True)
-
-        # Test 4: API Endpoints (unauthenticated)
-        print("\n=== Test 4: API Endpoints (Unauthenticated) ===")
-        try:
-            # Test categories API
-            response = page.request.get('http://localhost:3000/api/categories')
-            print(f"GET /api/categories - Status: {response.status}")
-
-            if response.status == 401:
-                print("✓ Categories API requires authentication")
-            elif response.status == 200:
-                print("⚠ Categories API returned 200 (may need auth check)")
-            else:
-                print(f"⚠ Unexpected status: {response.status}")
-
-        except Exception as e:
-            print(f"✗ Error testing API: {e}")
-
-        # Test 5: Navigation Elements Discovery
-        print("\n=== Test 5: Page Content Discovery ===")
-        try:
-            page.goto('http://localhost:3000/auth/login')
-            page.wait_for_load_state('networkidle')
-            time.sleep(1)
-
-            # Get all links
-            links = page.locator('a').all()
-            print(f"\nLinks found on login page: {len(links)}")
-            for i, link in enumerate(links[:5]):  # Show first 5
-                try:
-                    href = link.get_attribute('href')
-                    text = link.inner_text().strip()
-                    if text:
-                        print(f"  {i+1}. '{text}' → {href}")
-                except:
-                    pass
-
-            # Get page title
-            title = page.title()
-            print(f"\nPage title: {title}")
-
-        except Exception as e:
-            print(f"✗ Error discovering content: {e}")
-
-        # Test 6: Check for Sign Up page
-        print("\n=== Test 6: Sign Up Page ===")
-        try:
-            page.goto('http://localhost:3000/auth/signup')
-            page.wait_for_load_state('networkidle')
-            time.sleep(1)
-
-            current_url = page.url
-            print(f"Sign up page URL: {current_url}")
-
-            page.screenshot(path=f'{screenshots_dir}/06_signup_page.png', full_page=True)
-
-            if '/signup' in current_url:
-                print("✓ Sign up page exists")
-            else:
-                print(f"⚠ Redirected to: {current_url}")
-
-        except Exception as e:
-            print(f"✗ Error accessing signup page: {e}")
-            page.screenshot(path=f'{screenshots_dir}/06_error.png', full_page=True)
-
-        # Test 7: Full page content inspection
-        print("\n=== Test 7: Login Page HTML Structure ===")
-        try:
-            page.goto('http://localhost:3000/auth/login')
-            page.wait_for_load_state('networkidle')
-            time.sleep(1)
-
-            # Get page HTML structure
-            all_headings = page.locator('h1, h2, h3').all()
-            print(f"\nHeadings found: {len(all_headings)}")
-            for heading in all_headings:
-                try:
-                    tag = heading.evaluate('el => el.tagName')
-                    text = heading.inner_text().strip()
-                    if text:
-                        print(f"  <{tag}>: {text}")
-                except:
-                    pass
-
-            # Look for form elements
-            forms = page.locator('form').count()
-            print(f"\nForms found: {forms}")
-
-            # Check for error messages or alerts
-            alerts = page.locator('[role="alert"]').count()
-            print(f"Alert elements: {alerts}")
-
-        except Exception as e:
-            print(f"✗ Error inspecting HTML: {e}")
-
-        # Summary
-        print("\n" + "="*60)
-        print("TEST SUMMARY")
-        print("="*60)
-        print(f"Screenshots saved to: {screenshots_dir}")
-        print("\nKey Findings:")
-        print("- Authentication: App redirects unauthenticated users to login")
-        print("- Protected Routes: Categories page requires authentication")
-        print("- Login Page: Accessible at /auth/login")
-        print(f"- Screenshots: Check {screenshots_dir} for visual inspection")
-
-        # Close browser
-        browser.close()
-        print("\nTests completed!")
+import sys
 
-if __name__ == '__main__':
-    print("AdForge Application Testing")
-    print("=" * 60)
-    print("Testing application at http://localhost:3000")
-    print("Make sure the dev server is running!")
-    print("=" * 60)
+import pytest
+
+try:
+    from playwright.sync_api import expect
+except ImportError:
+    pytestmark = pytest.mark.skip(reason='playwright is not installed')
+
+
+def test_root_redirects_to_login(anon_page, screenshots_dir):
+    """Test 1: Unauthenticated access to / ends on the login page"""
+    anon_page.goto('/')
+    anon_page.wait_for_url('**/auth/login**')
+    anon_page.screenshot(path=f'{screenshots_dir}/01_login_page.png', full_page=True)
+
+
+def test_categories_page_is_protected(anon_page, screenshots_dir):
+    """Test 2: /categories requires authentication"""
+    anon_page.goto('/categories')
+    anon_page.wait_for_url('**/auth/login**')
+    anon_page.screenshot(path=f'{screenshots_dir}/02_protected_categories.png', full_page=True)
+
+
+def test_login_page_structure(anon_page, screenshots_dir):
+    """Test 3: Login form has email, password and a submit button"""
+    anon_page.goto('/auth/login')
+    expect(anon_page.locator('input[type="email"]')).to_be_visible()
+    expect(anon_page.locator('input[type="password"]')).to_be_visible()
+    expect(anon_page.locator('button[type="submit"]')).to_have_text('Sign In')
+    anon_page.screenshot(path=f'{screenshots_dir}/03_login_structure.png', full_page=True)
+
+
+def test_categories_api_requires_auth(anon_page):
+    """Test 4: GET /api/categories is rejected without a session"""
+    response = anon_page.request.get('/api/categories', max_redirects=0)
+    assert response.status in (401, 307), f'Unexpected status: {response.status}'
 
-    test_adforge()
+
+def test_login_page_links_to_signup(anon_page):
+    """Test 5: Login page exposes the sign-up link and a title"""
+    anon_page.goto('/auth/login')
+    expect(anon_page.locator('a[href="/auth/signup"]')).to_be_visible()
+    assert anon_page.title()
+
+
+def test_signup_page(anon_page, screenshots_dir):
+    """Test 6: Sign-up page is reachable"""
+    anon_page.goto('/auth/signup')
+    expect(anon_page.get_by_text('Create an Account')).to_be_visible()
+    assert '/signup' in anon_page.url
+    anon_page.screenshot(path=f'{screenshots_dir}/06_signup_page.png', full_page=True)
+
+
+def test_login_page_html_structure(anon_page):
+    """Test 7: Login page renders the sign-in card with a single form"""
+    anon_page.goto('/auth/login')
+    expect(anon_page.locator('form')).to_have_count(1)
+    expect(anon_page.get_by_text('Welcome to AdForge')).to_be_visible()
+
+
+def test_authenticated_user_lands_on_categories(page, screenshots_dir):
+    """Test 8: The saved login opens the dashboard instead of the login page"""
+    page.goto('/')
+    page.wait_for_url('**/categories')
+    page.screenshot(path=f'{screenshots_dir}/08_categories.png', full_page=True)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, *sys.argv[1:]]))
@@ -0,0 +1,158 @@
+"""
+Render memory admission (scripts/compositor/admission.py)
+FIFO order of the cross-process ledger, the oversized-job-runs-alone rule and
+queue timeouts, including how the compositor reports one, and the peak
+estimate's source copies. No browser needed:
+    pytest test_admission.py
+"""
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'scripts'))
+
+from compositor.admission import AdmissionTimeout, MemoryBudget, estimate_peak_bytes  # noqa: E402
+from compositor.sources import EXIF_ORIENTATION, probe_source  # noqa: E402
+
+BUDGET = 100
+
+
+def _budget(tmp_path, timeout_s=10):
+    return MemoryBudget(BUDGET, str(tmp_path), queue_timeout_s=timeout_s)
+
+
+def _occupy(tmp_path, nbytes):
+    """Reserve nbytes as a running job of this (live) process; returns its job id"""
+    with _budget(tmp_path)._ledger() as ledger:
+        ledger['running']['occupier'] = {'pid': os.getpid(), 'bytes': nbytes, 'admitted_at': time.time()}
+    return 'occupier'
+
+
+def _vacate(tmp_path, job_id):
+    with _budget(tmp_path)._ledger() as ledger:
+        del ledger['running'][job_id]
+
+
+def _admit_in_thread(tmp_path, nbytes, admitted):
+    def run():
+        budget = _budget(tmp_path)
+        budget.admit(nbytes)
+        admitted.append(nbytes)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_admits_immediately_when_it_fits(tmp_path):
+    budget = _budget(tmp_path)
+    assert budget.admit(60) < 0.5
+    assert budget.usage()['used_bytes'] == 60
+    budget.release()
+    assert budget.usage() == {'budget_bytes': BUDGET, 'used_bytes': 0, 'running': 0, 'queued': 0, 'queued_bytes': 0}
+
+
+def test_later_small_job_waits_behind_queue_head(tmp_path):
+    occupier = _occupy(tmp_path, 50)
+    admitted = []
+    big = _admit_in_thread(tmp_path, 60, admitted)
+    time.sleep(0.1)
+    # 50 + 10 would fit, but the 60 byte job arrived first
+    small = _admit_in_thread(tmp_path, 10, admitted)
+    time.sleep(0.5)
+    assert admitted == []
+    assert _budget(tmp_path).usage()['queued'] == 2
+
+    _vacate(tmp_path, occupier)
+    big.join(5)
+    small.join(5)
+    assert admitted == [60, 10]
+
+
+def test_oversized_job_runs_alone(tmp_path):
+    occupier = _occupy(tmp_path, 10)
+    admitted = []
+    oversized = _admit_in_thread(tmp_path, 5 * BUDGET, admitted)
+    time.sleep(0.3)
+    assert admitted == []
+
+    _vacate(tmp_path, occupier)
+    oversized.join(5)
+    assert admitted == [5 * BUDGET]
+
+
+def test_times_out_and_leaves_the_queue(tmp_path):
+    _occupy(tmp_path, 90)
+    budget = _budget(tmp_path, timeout_s=0.3)
+    with pytest.raises(AdmissionTimeout):
+        budget.admit(20)
+    assert budget.usage()['queued'] == 0
+
+
+def test_compositor_reports_timeout_as_json(tmp_path):
+    _occupy(tmp_path, 1)
+    env = {
+        **os.environ,
+        'ADFORGE_RENDER_MEMORY_BUDGET_MB': '1',
+        'ADFORGE_RENDER_BUDGET_DIR': str(tmp_path),
+        'ADFORGE_RENDER_QUEUE_TIMEOUT_S': '0.3',
+    }
+    job = {
+        'template_data': {'layers': []},
+        'composite_url': 'http://127.0.0.1/unused.png',
+        'copy_text': {},
+        'output_path': str(tmp_path / 'out.png'),
+        'width': 16,
+        'height': 16,
+    }
+    proc = subprocess.run(
+        [sys.executable, os.path.join(HERE, 'scripts', 'composite_final_asset.py')],
+        input=json.dumps(job), capture_output=True, text=True, env=env, timeout=30,
+    )
+    assert proc.returncode == 1
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    assert result['success'] is False and result['code'] == 'admission_timeout'
+    assert 'Traceback' not in proc.stderr
+
+
+def _encoded(image, fmt, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def test_probe_tells_which_sources_are_copied():
+    rotated = Image.new('RGB', (40, 20))
+    exif = rotated.getexif()
+    exif[EXIF_ORIENTATION] = 6
+    assert probe_source(_encoded(Image.new('RGB', (40, 20)), 'JPEG')) == ((40, 20), False, False)
+    assert probe_source(_encoded(rotated, 'JPEG', exif=exif.tobytes())) == ((40, 20), True, False)
+    assert probe_source(_encoded(Image.new('I;16', (8, 8)), 'PNG')) == ((8, 8), True, False)
+    assert probe_source(_encoded(Image.new('RGBA', (8, 8)), 'PNG')) == ((8, 8), True, True)
+    assert probe_source(_encoded(Image.new('P', (8, 8)), 'PNG', transparency=0)) == ((8, 8), True, True)
+
+
+def test_estimate_counts_normalization_and_premultiply_copies():
+    template = {'layers': [{'id': 'bg', 'type': 'background'}]}
+    decoded = 1000 * 1000 * 4
+    intermediate = 100 * 1000 * 4
+    canvas = 100 * 100 * 4
+
+    def estimate(copied, alpha):
+        return estimate_peak_bytes(
+            template, 100, 100, background_size=(1000, 1000), background_copied=copied, background_alpha=alpha,
+        )
+
+    plain = estimate(False, False)
+    # Converting holds the source and its copy, more than resizing a plain source
+    assert estimate(True, False) - plain == 2 * decoded - (decoded + intermediate + canvas)
+    # Resizing RGBA holds a premultiplied copy next to the source
+    assert estimate(True, True) - plain == decoded
@@ -0,0 +1,104 @@
+"""
+Incremental copy variants (scripts/compositor/variants.py)
+render_copy_variants() must give every variant exactly the pixels and the
+safe-zone report of a full composite_final_asset() render of the same copy,
+while only repainting the text it changes. No browser needed:
+    pytest test_copy_variants.py
+"""
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'scripts'))
+
+from compositor.render import composite_final_asset  # noqa: E402
+from compositor.safe_zones import InkCoverage  # noqa: E402
+from compositor.variants import render_copy_variants  # noqa: E402
+
+WIDTH, HEIGHT = 240, 160
+
+TEMPLATE = {
+    'layers': [
+        {'id': 'bg', 'type': 'background', 'x': 0, 'y': 0, 'width': 100, 'height': 100, 'z_index': 0},
+        {'id': 'headline', 'type': 'text', 'name': 'headline', 'x': 5, 'y': 10, 'width': 90, 'height': 20,
+         'z_index': 1, 'font_size': 18, 'color': '#ffffff', 'text_align': 'center'},
+        {'id': 'cta', 'type': 'text', 'name': 'cta', 'x': 30, 'y': 70, 'width': 40, 'height': 15,
+         'z_index': 2, 'font_size': 14, 'color': '#ffffff', 'background_color': '#e63946'},
+        # Above the headline, so it has to be replayed wherever the headline changes
+        {'id': 'logo', 'type': 'logo', 'x': 80, 'y': 5, 'width': 15, 'height': 25, 'z_index': 3},
+    ],
+    'safe_zones': [
+        {'id': 'body', 'name': 'Body', 'type': 'safe', 'x': 0, 'y': 0, 'width': 100, 'height': 90},
+        {'id': 'footer', 'name': 'Footer', 'type': 'restricted', 'x': 0, 'y': 90, 'width': 100, 'height': 10},
+    ],
+}
+
+VARIANTS = [
+    {'headline': 'A much longer headline', 'cta': 'Shop now'},
+    {'headline': 'Short', 'cta': 'Go'},
+    {'headline': '', 'cta': 'Buy today'},
+]
+
+
+def _sources(tmp_path):
+    gradient = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    gradient[..., 0] = np.linspace(0, 255, WIDTH, dtype=np.uint8)[None, :]
+    gradient[..., 2] = np.linspace(255, 0, HEIGHT, dtype=np.uint8)[:, None]
+    background = tmp_path / 'bg.png'
+    Image.fromarray(gradient).save(background)
+
+    logo = Image.new('RGBA', (40, 40), (0, 0, 0, 0))
+    logo.paste((20, 200, 90, 255), (8, 8, 32, 32))
+    logo_path = tmp_path / 'logo.png'
+    logo.save(logo_path)
+    return background.as_uri(), logo_path.as_uri()
+
+
+def _pixels(path):
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+def test_variants_match_full_renders(tmp_path):
+    background, logo = _sources(tmp_path)
+    results = render_copy_variants(
+        TEMPLATE, background,
+        [{'id': index, 'copy_text': copy, 'output_path': str(tmp_path / f'variant{index}.png')}
+         for index, copy in enumerate(VARIANTS)],
+        logo_url=logo, width=WIDTH, height=HEIGHT,
+    )
+
+    assert [result['id'] for result in results] == [0, 1, 2]
+    for copy, result in zip(VARIANTS, results):
+        reference = str(tmp_path / f"reference{result['id']}.png")
+        ink = InkCoverage(WIDTH, HEIGHT)
+        composite_final_asset(TEMPLATE, background, copy, logo, reference, WIDTH, HEIGHT, ink=ink)
+        assert np.array_equal(_pixels(result['output_path']), _pixels(reference))
+        assert result['safe_zones'] == ink.validate(TEMPLATE['safe_zones'])
+
+
+def test_variants_only_repaint_their_text(tmp_path):
+    background, logo = _sources(tmp_path)
+    results = render_copy_variants(
+        TEMPLATE, background,
+        [{'copy_text': copy, 'output_path': str(tmp_path / f'variant{index}.png')}
+         for index, copy in enumerate(VARIANTS)],
+        logo_url=logo, width=WIDTH, height=HEIGHT,
+    )
+    dirty = [result['dirty_pixels'] for result in results]
+    # Every variant, even the one with an empty headline, restores what the
+    # previous one painted, but never the whole canvas
+    assert all(0 < pixels < WIDTH * HEIGHT // 2 for pixels in dirty)
+
+
+def test_template_without_safe_zones_reports_none(tmp_path):
+    background, _ = _sources(tmp_path)
+    template = {key: value for key, value in TEMPLATE.items() if key != 'safe_zones'}
+    results = render_copy_variants(
+        template, background, [{'copy_text': VARIANTS[0], 'output_path': str(tmp_path / 'out.png')}],
+        width=WIDTH, height=HEIGHT,
+    )
+    assert 'safe_zones' not in results[0]
@@ -0,0 +1,29 @@
+"""
+Golden-image regression tests for the compositor
+Renders golden_images.CORPUS through every render path and compares against
+the reference PNGs in golden/ with per-template PSNR/SSIM tolerances. No
+browser needed:
+    pytest test_golden_images.py
+Failing cases leave the render and a diff heatmap in /tmp/adforge_golden.
+"""
+import os
+
+import pytest
+
+import golden_images
+
+
+@pytest.fixture(scope='session')
+def fixture_urls(tmp_path_factory):
+    return golden_images.write_fixtures(str(tmp_path_factory.mktemp('golden-fixtures')))
+
+
+@pytest.mark.parametrize('case_id,name,fmt,path', golden_images.cases(), ids=[case[0] for case in golden_images.cases()])
+def test_render_matches_golden(case_id, name, fmt, path, fixture_urls, tmp_path):
+    if not os.path.exists(golden_images.FONT_PATH):
+        pytest.skip(f'{golden_images.FONT_PATH} not installed')
+    if not os.path.exists(golden_images.golden_path(name, fmt)):
+        pytest.skip('no golden yet (python3 golden_images.py --update)')
+
+    passed, metrics = golden_images.check_case(case_id, name, fmt, path, fixture_urls, str(tmp_path))
+    assert passed, f'{case_id} outside {golden_images.CORPUS[name]["tolerance"]}: {metrics}'
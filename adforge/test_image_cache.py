@@ -0,0 +1,91 @@
+"""
+Shared decoded-image cache (scripts/compositor/image_cache.py)
+Arena allocation, idle-only LRU eviction and reclaiming entries held by
+processes that died without releasing them. No browser needed:
+    pytest test_image_cache.py
+"""
+import os
+import sys
+
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'scripts'))
+
+from compositor.image_cache import SharedImageCache  # noqa: E402
+
+# 10x10 at 4 bytes per pixel
+ENTRY_BYTES = 400
+
+
+def _image(value, mode='RGB'):
+    return Image.new(mode, (10, 10), (value,) * len(mode))
+
+
+def _cache(tmp_path, entries=3):
+    return SharedImageCache(str(tmp_path), capacity_bytes=entries * ENTRY_BYTES)
+
+
+def _offsets(cache):
+    with cache._locked() as index:
+        return {key: entry['offset'] for key, entry in index['entries'].items()}
+
+
+def test_put_then_get_from_another_process_view(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put('rgb', _image(7))
+    cache.put('rgba', _image(9, 'RGBA'))
+
+    other = _cache(tmp_path)
+    assert other.get('missing') is None
+    rgb = other.get('rgb')
+    assert rgb.mode == 'RGBX' and rgb.getpixel((3, 3))[:3] == (7, 7, 7)
+    assert other.get('rgba').getpixel((0, 0)) == (9, 9, 9, 9)
+    assert other.size_of('rgb') == (10, 10)
+    assert other.mode_of('rgba') == 'RGBA' and other.mode_of('missing') is None
+    assert other.stats()['hits'] == 2 and other.stats()['misses'] == 1
+    # Uncacheable modes are left to the caller
+    assert cache.put('cmyk', Image.new('CMYK', (10, 10))) is None
+
+
+def test_allocates_first_fit_and_evicts_idle_lru(tmp_path):
+    cache = _cache(tmp_path)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, _image(1))
+    assert _offsets(cache) == {'a': 0, 'b': ENTRY_BYTES, 'c': 2 * ENTRY_BYTES}
+
+    # Full and every entry held by this live process: nothing can be evicted
+    assert cache.put('d', _image(2)) is None
+
+    cache.release_all()
+    cache.get('a')
+    cache.release_all()
+    # 'b' is now the least recently used idle entry; 'd' reuses its slot
+    assert cache.put('d', _image(2)) is not None
+    assert _offsets(cache) == {'a': 0, 'd': ENTRY_BYTES, 'c': 2 * ENTRY_BYTES}
+
+
+def test_does_not_evict_held_entries(tmp_path):
+    cache = _cache(tmp_path, entries=2)
+    cache.put('a', _image(1))
+    cache.release_all()
+    cache.put('b', _image(1))
+    # 'b' is still held, so only 'a' can go
+    cache.put('c', _image(1))
+    assert set(_offsets(cache)) == {'b', 'c'}
+    assert cache.put('too-big', Image.new('RGB', (100, 100))) is None
+
+
+def test_reclaims_entries_of_crashed_holders(tmp_path):
+    cache = _cache(tmp_path, entries=1)
+    pid = os.fork()
+    if pid == 0:
+        # A worker that dies without release_all()
+        SharedImageCache(str(tmp_path), capacity_bytes=ENTRY_BYTES).put('orphan', _image(3))
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    with cache._locked() as index:
+        assert index['entries']['orphan']['holders'] == [pid]
+    assert cache.put('fresh', _image(4)) is not None
+    assert set(_offsets(cache)) == {'fresh'}
@@ -1,188 +1,96 @@
 """
 AdForge Phase 1 Comprehensive Testing
 Tests Categories, Brand Assets, Products, and Product Images
+
+Uses the shared harness in conftest.py (one browser, saved login, stub backend):
+    pytest test_phase1.py -n auto
 """
-from playwright.sync_api import sync_playwright, expect
-import time
-import os
-
-def test_phase1():
-    """Test all Phase 1 features"""
-
-    screenshots_dir = '/tmp/adforge_phase1_tests'
-    os.makedirs(screenshots_dir, exist_ok=True)
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080}
-        )
-        page = context.new_page()
-
-        print("="*60)
-        print("AdForge Phase 1 Testing")
-        print("="*60)
-
-        # Test 1: Landing and Auth
-        print("\n=== Test 1: Landing Page & Authentication ===")
-        page.goto('http://localhost:3000')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        current_url = page.url
-        if '/auth/login' in current_url:
-            print("✓ Redirects to login for unauthenticated users")
-            page.screenshot(path=f'{screenshots_dir}/01_login_redirect.png', full_page=True)
-        else:
-            print(f"✗ Unexpected redirect: {current_url}")
-
-        # Test 2: Login Page Structure
-        print("\n=== Test 2: Login Page ===")
-        page.goto('http://localhost:3000/auth/login')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        email_inputs = page.locator('input[type="email"]').count()
-        password_inputs = page.locator('input[type="password"]').count()
-        print(f"Email inputs: {email_inputs}")
-        print(f"Password inputs: {password_inputs}")
-
-        if email_inputs > 0 and password_inputs > 0:
-            print("✓ Login form present")
-
-        page.screenshot(path=f'{screenshots_dir}/02_login_page.png', full_page=True)
-
-        # Test 3: Signup Page
-        print("\n=== Test 3: Signup Page ===")
-        page.goto('http://localhost:3000/auth/signup')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        signup_email = page.locator('input[type="email"]').count()
-        signup_password = page.locator('input[type="password"]').count()
-        print(f"Email inputs: {signup_email}")
-        print(f"Password inputs: {signup_password} (includes confirm)")
-
-        if signup_email > 0 and signup_password >= 2:
-            print("✓ Signup form present with password confirmation")
-
-        page.screenshot(path=f'{screenshots_dir}/03_signup_page.png', full_page=True)
-
-        # Test 4: Protected Routes
-        print("\n=== Test 4: Protected Routes ===")
-        routes_to_test = [
-            '/categories',
-            '/brand-assets',
-        ]
-
-        for route in routes_to_test:
-            page.goto(f'http://localhost:3000{route}')
-            page.wait_for_load_state('networkidle')
-            time.sleep(1)
-
-            if '/auth/login' in page.url:
-                print(f"✓ {route} is protected")
-            else:
-                print(f"✗ {route} is NOT protected!")
-
-        # Test 5: API Endpoints (Unauthenticated)
-        print("\n=== Test 5: API Authentication ===")
-        api_endpoints = [
-            '/api/categories',
-            '/api/brand-assets',
-        ]
-
-        for endpoint in api_endpoints:
-            response = page.request.get(f'http://localhost:3000{endpoint}')
-            status = response.status
-            print(f"{endpoint}: {status}")
-
-            if status in [401, 200]:  # 401 unauthorized or 200 with empty data is fine
-                print(f"✓ {endpoint} has auth check")
-            else:
-                print(f"⚠ {endpoint} returned unexpected status: {status}")
-
-        # Test 6: Page Rendering Check
-        print("\n=== Test 6: Page Rendering ===")
-        page.goto('http://localhost:3000/auth/login')
-        page.wait_for_load_state('networkidle')
-        time.sleep(2)
-
-        # Check if pages are actually rendering (not showing errors)
-        page_text = page.locator('body').inner_text()
-
-        if 'Internal Server Error' in page_text:
-            print("✗ Server errors detected!")
-        elif 'AdForge' in page_text or 'Sign' in page_text:
-            print("✓ Pages rendering correctly")
-        else:
-            print("⚠ Unexpected page content")
-
-        # Test 7: UI Components
-        print("\n=== Test 7: UI Components Check ===")
-        page.goto('http://localhost:3000/auth/login')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        buttons = page.locator('button').count()
-        inputs = page.locator('input').count()
-        links = page.locator('a').count()
-
-        print(f"Buttons: {buttons}")
-        print(f"Inputs: {inputs}")
-        print(f"Links: {links}")
-
-        if buttons > 0 and inputs > 0:
-            print("✓ UI components rendering")
-
-        # Test 8: Responsive Design Check
-        print("\n=== Test 8: Responsive Design ===")
-        viewports = [
-            {'width': 375, 'height': 667, 'name': 'Mobile'},
-            {'width': 768, 'height': 1024, 'name': 'Tablet'},
-            {'width': 1920, 'height': 1080, 'name': 'Desktop'},
-        ]
-
-        for viewport in viewports:
-            page.set_viewport_size({'width': viewport['width'], 'height': viewport['height']})
-            page.goto('http://localhost:3000/auth/login')
-            page.wait_for_load_state('networkidle')
-            time.sleep(1)
-
-            page.screenshot(
-                path=f'{screenshots_dir}/08_responsive_{viewport["name"].lower()}.png',
-                full_page=True
-            )
-            print(f"✓ Tested {viewport['name']} viewport ({viewport['width']}x{viewport['height']})")
-
-        # Reset viewport
-        page.set_viewport_size({'width': 1920, 'height': 1080})
-
-        # Summary
-        print("\n" + "="*60)
-        print("TEST SUMMARY")
-        print("="*60)
-        print(f"Screenshots saved to: {screenshots_dir}")
-        print("\nPhase 1 Features Tested:")
-        print("✓ Authentication system (login/signup)")
-        print("✓ Protected routes (middleware)")
-        print("✓ API authentication")
-        print("✓ UI rendering")
-        print("✓ Responsive design")
-        print("\nNote: Full CRUD operations require authenticated session")
-        print("To test Categories, Products, and Images:")
-        print("1. Create an account via signup")
-        print("2. Log in with credentials")
-        print("3. Manually test CRUD operations in browser")
-
-        browser.close()
-        print("\nTests completed!")
+import sys
 
-if __name__ == '__main__':
-    print("AdForge Phase 1 Testing Suite")
-    print("=" * 60)
-    print("Testing application at http://localhost:3000")
-    print("Make sure the dev server is running!")
-    print("=" * 60)
+import pytest
+
+try:
+    from playwright.sync_api import expect
+except ImportError:
+    pytestmark = pytest.mark.skip(reason='playwright is not installed')
+
+VIEWPORTS = [
+    {'width': 375, 'height': 667, 'name': 'Mobile'},
+    {'width': 768, 'height': 1024, 'name': 'Tablet'},
+    {'width': 1920, 'height': 1080, 'name': 'Desktop'},
+]
+
+
+def test_landing_redirects_to_login(anon_page, screenshots_dir):
+    """Test 1: Unauthenticated users are sent to the login page"""
+    anon_page.goto('/')
+    anon_page.wait_for_url('**/auth/login**')
+    anon_page.screenshot(path=f'{screenshots_dir}/01_login_redirect.png', full_page=True)
+
+
+def test_login_page(anon_page, screenshots_dir):
+    """Test 2: Login form is present"""
+    anon_page.goto('/auth/login')
+    expect(anon_page.locator('input[type="email"]')).to_be_visible()
+    expect(anon_page.locator('input[type="password"]')).to_be_visible()
+    anon_page.screenshot(path=f'{screenshots_dir}/02_login_page.png', full_page=True)
+
+
+def test_signup_page(anon_page, screenshots_dir):
+    """Test 3: Signup form includes password confirmation"""
+    anon_page.goto('/auth/signup')
+    expect(anon_page.locator('input[type="email"]')).to_be_visible()
+    expect(anon_page.locator('input[type="password"]')).to_have_count(2)
+    anon_page.screenshot(path=f'{screenshots_dir}/03_signup_page.png', full_page=True)
+
+
+@pytest.mark.parametrize('route', ['/categories', '/brand-assets'])
+def test_protected_routes(anon_page, route):
+    """Test 4: Dashboard routes redirect to login"""
+    anon_page.goto(route)
+    anon_page.wait_for_url('**/auth/login**')
 
-    test_phase1()
+
+@pytest.mark.parametrize('endpoint', ['/api/categories', '/api/brand-assets'])
+def test_api_authentication(anon_page, endpoint):
+    """Test 5: API endpoints refuse unauthenticated requests"""
+    response = anon_page.request.get(endpoint, max_redirects=0)
+    assert response.status in (401, 307), f'{endpoint} returned unexpected status: {response.status}'
+
+
+def test_page_rendering(anon_page):
+    """Test 6: Pages render without server errors"""
+    anon_page.goto('/auth/login')
+    expect(anon_page.get_by_text('Welcome to AdForge')).to_be_visible()
+    expect(anon_page.locator('body')).not_to_contain_text('Internal Server Error')
+
+
+def test_ui_components(anon_page):
+    """Test 7: Buttons, inputs and links render"""
+    anon_page.goto('/auth/login')
+    expect(anon_page.locator('button[type="submit"]')).to_be_visible()
+    expect(anon_page.locator('input')).to_have_count(2)
+    expect(anon_page.locator('a[href="/auth/signup"]')).to_be_visible()
+
+
+@pytest.mark.parametrize('viewport', VIEWPORTS, ids=[v['name'] for v in VIEWPORTS])
+def test_responsive_design(anon_page, screenshots_dir, viewport):
+    """Test 8: Login page renders at mobile, tablet and desktop sizes"""
+    anon_page.set_viewport_size({'width': viewport['width'], 'height': viewport['height']})
+    anon_page.goto('/auth/login')
+    expect(anon_page.locator('button[type="submit"]')).to_be_visible()
+    anon_page.screenshot(
+        path=f'{screenshots_dir}/08_responsive_{viewport["name"].lower()}.png',
+        full_page=True
+    )
+
+
+def test_categories_dashboard(page, screenshots_dir):
+    """Test 9: Logged-in users see their categories"""
+    page.goto('/categories')
+    expect(page.get_by_text('Vitamin C Gummies').first).to_be_visible()
+    page.screenshot(path=f'{screenshots_dir}/09_categories.png', full_page=True)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, *sys.argv[1:]]))
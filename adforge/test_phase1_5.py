@@ -1,229 +1,80 @@
 """
 AdForge Phase 1.5 Comprehensive Testing
 Tests @ Reference Picker Component with Backend/Frontend Integration
+
+Uses the shared harness in conftest.py (one browser, saved login, stub backend):
+    pytest test_phase1_5.py -n auto
 """
-from playwright.sync_api import sync_playwright, expect
-import time
-import os
-import json
-
-def test_phase1_5():
-    """Test Phase 1.5 - @ Reference Picker Component"""
-
-    screenshots_dir = '/tmp/adforge_phase1_5_tests'
-    os.makedirs(screenshots_dir, exist_ok=True)
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080}
-        )
-        page = context.new_page()
-
-        print("="*60)
-        print("AdForge Phase 1.5 Testing - @ Reference Picker")
-        print("="*60)
-
-        # Test 1: Search API Endpoint (Backend)
-        print("\n=== Test 1: Backend - Search API Endpoint ===" )
-        print("Testing unauthenticated access (should return 401)...")
-
-        response = page.request.get('http://localhost:3000/api/references/search?q=test')
-        print(f"Status: {response.status}")
-
-        if response.status == 401:
-            print("✓ API correctly requires authentication")
-        else:
-            print(f"✗ Expected 401, got {response.status}")
-
-        # Test 2: Login Page Components
-        print("\n=== Test 2: Frontend - Login Page Components ===")
-        page.goto('http://localhost:3000/auth/login')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        # Check for form elements
-        email_input = page.locator('input[type="email"]')
-        password_input = page.locator('input[type="password"]')
-        sign_in_button = page.locator('button[type="submit"]')
-
-        print(f"Email input found: {email_input.count() > 0}")
-        print(f"Password input found: {password_input.count() > 0}")
-        print(f"Sign in button found: {sign_in_button.count() > 0}")
-
-        if email_input.count() > 0 and password_input.count() > 0:
-            print("✓ Login form components present")
-
-        page.screenshot(path=f'{screenshots_dir}/01_login_page.png', full_page=True)
-
-        # Test 3: Create Product Dialog Structure
-        print("\n=== Test 3: Frontend - Create Product Dialog Structure ===")
-        print("Checking if ReferencePicker component is loaded in source...")
-
-        # Navigate to categories page (will redirect to login)
-        page.goto('http://localhost:3000/categories')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        current_url = page.url
-        if '/auth/login' in current_url:
-            print("✓ Protected route redirects to login correctly")
-
-        # Test 4: Page Rendering Check
-        print("\n=== Test 4: Frontend - Page Rendering ===")
-        page.goto('http://localhost:3000/auth/login')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        page_content = page.content()
-
-        # Check for no errors
-        has_error = 'error' in page_content.lower() and 'internal server error' in page_content.lower()
-        if not has_error:
-            print("✓ No server errors on login page")
-        else:
-            print("✗ Server error detected")
-
-        # Test 5: Build Verification
-        print("\n=== Test 5: Build Verification ===")
-        print("Testing if app builds successfully...")
-
-        # This will be verified by checking if pages load
-        pages_to_check = [
-            '/auth/login',
-            '/auth/signup',
-        ]
-
-        all_loaded = True
-        for route in pages_to_check:
-            page.goto(f'http://localhost:3000{route}')
-            page.wait_for_load_state('networkidle')
-            time.sleep(0.5)
-
-            if page.locator('body').count() > 0:
-                print(f"✓ {route} loads successfully")
-            else:
-                print(f"✗ {route} failed to load")
-                all_loaded = False
-
-        if all_loaded:
-            print("✓ All pages build and load correctly")
-
-        # Test 6: Component Integration Check
-        print("\n=== Test 6: Component Integration ===")
-        print("Checking if new components are properly imported...")
-
-        # Check JavaScript console for errors
-        console_errors = []
-        page.on('console', lambda msg: console_errors.append(msg.text) if msg.type == 'error' else None)
-
-        page.goto('http://localhost:3000/auth/login')
-        page.wait_for_load_state('networkidle')
-        time.sleep(2)
-
-        if len(console_errors) == 0:
-            print("✓ No JavaScript console errors")
-        else:
-            print(f"⚠ Found {len(console_errors)} console errors:")
-            for error in console_errors[:5]:  # Show first 5
-                print(f"  - {error}")
-
-        # Test 7: API Route Registration
-        print("\n=== Test 7: Backend - API Route Registration ===")
-        print("Checking if new API routes are registered...")
-
-        # Test search endpoint (should return 401 when not authenticated)
-        search_response = page.request.get('http://localhost:3000/api/references/search?q=')
-        print(f"/api/references/search - Status: {search_response.status}")
-
-        if search_response.status in [401, 200]:
-            print("✓ Search API endpoint is registered and responds")
-        else:
-            print(f"⚠ Unexpected status: {search_response.status}")
-
-        # Test 8: TypeScript Compilation
-        print("\n=== Test 8: TypeScript Compilation ===")
-        print("Verified during build process")
-        print("✓ TypeScript files compile without errors")
-
-        # Test 9: Responsive Design
-        print("\n=== Test 9: Responsive Design ===")
-        viewports = [
-            {'width': 375, 'height': 667, 'name': 'Mobile'},
-            {'width': 768, 'height': 1024, 'name': 'Tablet'},
-            {'width': 1920, 'height': 1080, 'name': 'Desktop'},
-        ]
-
-        for viewport in viewports:
-            page.set_viewport_size({'width': viewport['width'], 'height': viewport['height']})
-            page.goto('http://localhost:3000/auth/login')
-            page.wait_for_load_state('networkidle')
-            time.sleep(0.5)
-
-            page.screenshot(
-                path=f'{screenshots_dir}/09_responsive_{viewport["name"].lower()}.png',
-                full_page=True
-            )
-            print(f"✓ Tested {viewport['name']} viewport ({viewport['width']}x{viewport['height']})")
-
-        # Reset viewport
-        page.set_viewport_size({'width': 1920, 'height': 1080})
-
-        # Test 10: File Structure Verification
-        print("\n=== Test 10: File Structure Verification ===")
-        print("Checking if new files exist...")
-
-        expected_files = [
-            'src/app/api/references/search/route.ts',
-            'src/components/ui/reference-picker.tsx',
-            'src/components/ui/reference-display.tsx',
-            'src/components/products/EditProductDialog.tsx',
-        ]
-
-        import os
-        base_path = '/Users/varuntyagi/Downloads/Claude Research/AdForge/adforge/'
-
-        for file_path in expected_files:
-            full_path = os.path.join(base_path, file_path)
-            if os.path.exists(full_path):
-                print(f"✓ {file_path} exists")
-            else:
-                print(f"✗ {file_path} missing")
-
-        # Summary
-        print("\n" + "="*60)
-        print("TEST SUMMARY - PHASE 1.5")
-        print("="*60)
-        print(f"Screenshots saved to: {screenshots_dir}")
-        print("\nPhase 1.5 Features Tested:")
-        print("✓ Backend - API authentication and endpoints")
-        print("✓ Frontend - Component structure and rendering")
-        print("✓ Integration - No JavaScript errors")
-        print("✓ Build - TypeScript compilation successful")
-        print("✓ Responsive - Mobile/Tablet/Desktop layouts")
-        print("✓ File Structure - All new files present")
-
-        print("\n📋 Manual Testing Checklist (Requires Authentication):")
-        print("1. Create account and login")
-        print("2. Create a category")
-        print("3. Upload some brand assets")
-        print("4. Create a product")
-        print("5. In product description, type @ to test autocomplete")
-        print("6. Select a brand asset or product from autocomplete")
-        print("7. Save product and verify reference displays correctly")
-        print("8. Edit product and test reference picker again")
-        print("9. Verify reference previews show images/icons")
-        print("10. Test keyboard navigation (arrow keys, enter, escape)")
-
-        browser.close()
-        print("\nTests completed!")
+import sys
+
+import pytest
+
+try:
+    from playwright.sync_api import expect
+except ImportError:
+    pytestmark = pytest.mark.skip(reason='playwright is not installed')
+
+VIEWPORTS = [
+    {'width': 375, 'height': 667, 'name': 'Mobile'},
+    {'width': 768, 'height': 1024, 'name': 'Tablet'},
+    {'width': 1920, 'height': 1080, 'name': 'Desktop'},
+]
+
+
+def test_search_api_requires_auth(anon_page):
+    """Test 1: Backend - search API rejects unauthenticated access"""
+    response = anon_page.request.get('/api/references/search?q=test', max_redirects=0)
+    assert response.status in (401, 307), f'Expected 401, got {response.status}'
+
+
+def test_login_page_components(anon_page, screenshots_dir):
+    """Test 2: Frontend - login form components"""
+    anon_page.goto('/auth/login')
+    expect(anon_page.locator('input[type="email"]')).to_be_visible()
+    expect(anon_page.locator('input[type="password"]')).to_be_visible()
+    expect(anon_page.locator('button[type="submit"]')).to_be_visible()
+    anon_page.screenshot(path=f'{screenshots_dir}/01_login_page.png', full_page=True)
+
+
+def test_protected_route_redirects(anon_page):
+    """Test 3: Frontend - product pages stay behind login"""
+    anon_page.goto('/categories')
+    anon_page.wait_for_url('**/auth/login**')
+
+
+@pytest.mark.parametrize('route', ['/auth/login', '/auth/signup'])
+def test_pages_render_without_errors(anon_page, route):
+    """Tests 4-5: Pages load without server errors"""
+    anon_page.goto(route)
+    expect(anon_page.locator('form')).to_be_visible()
+    expect(anon_page.locator('body')).not_to_contain_text('Internal Server Error')
+
+
+def test_no_console_errors(anon_page):
+    """Test 6: Component integration - no JavaScript console errors"""
+    console_errors = []
+    anon_page.on('console', lambda msg: console_errors.append(msg.text) if msg.type == 'error' else None)
+    anon_page.goto('/auth/login', wait_until='networkidle')
+    assert console_errors == []
+
+
+def test_search_api_registered_for_users(page):
+    """Test 7: Backend - search API route is registered and answers logged-in users"""
+    response = page.request.get('/api/references/search?q=')
+    assert response.status == 200, f'Unexpected status: {response.status}'
+
+
+@pytest.mark.parametrize('viewport', VIEWPORTS, ids=[v['name'] for v in VIEWPORTS])
+def test_responsive_design(anon_page, screenshots_dir, viewport):
+    """Test 9: Responsive design"""
+    anon_page.set_viewport_size({'width': viewport['width'], 'height': viewport['height']})
+    anon_page.goto('/auth/login')
+    expect(anon_page.locator('button[type="submit"]')).to_be_visible()
+    anon_page.screenshot(
+        path=f'{screenshots_dir}/09_responsive_{viewport["name"].lower()}.png',
+        full_page=True
+    )
+
 
 if __name__ == '__main__':
-    print("AdForge Phase 1.5 Testing Suite")
-    print("=" * 60)
-    print("Testing @ Reference Picker Component")
-    print("Testing application at http://localhost:3000")
-    print("Make sure the dev server is running!")
-    print("=" * 60)
-
-    test_phase1_5()
+    sys.exit(pytest.main([__file__, *sys.argv[1:]]))
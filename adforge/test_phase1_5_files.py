@@ -0,0 +1,21 @@
+"""
+AdForge Phase 1.5 file structure
+The @ Reference Picker's route and components exist. No browser needed:
+    pytest test_phase1_5_files.py
+"""
+import os
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.mark.parametrize('file_path', [
+    'src/app/api/references/search/route.ts',
+    'src/components/ui/reference-picker.tsx',
+    'src/components/ui/reference-display.tsx',
+    'src/components/products/EditProductDialog.tsx',
+])
+def test_file_structure(file_path):
+    """Test 10: Phase 1.5 files exist"""
+    assert os.path.exists(os.path.join(HERE, file_path)), f'{file_path} missing'
@@ -0,0 +1,149 @@
+"""
+Render profiling (scripts/compositor/profiling.py)
+Which jobs get profiled (explicit switches, sampling, invalid settings) and
+the collapsed stacks rebuilt from cProfile's caller edges, including call
+graphs whose path count explodes. No browser needed:
+    pytest test_profiling.py
+"""
+import cProfile
+import os
+import pstats
+import sys
+import time
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'scripts'))
+
+from compositor import profiling  # noqa: E402
+from compositor.profiling import MAX_SAMPLE_EVERY, profile_settings, write_collapsed_stacks  # noqa: E402
+
+
+def test_explicit_switches(monkeypatch):
+    monkeypatch.setenv('ADFORGE_PROFILE_SAMPLE_EVERY', '1')
+    monkeypatch.setenv('ADFORGE_PROFILE_DIR', '/tmp/profiles-under-test')
+    assert profile_settings(False) is None
+    assert profile_settings(True) == {'output_dir': '/tmp/profiles-under-test', 'top_allocations': 10}
+    assert profile_settings({'top_allocations': 3})['top_allocations'] == 3
+
+
+def test_environment_sampling(monkeypatch):
+    monkeypatch.delenv('ADFORGE_PROFILE_SAMPLE_EVERY', raising=False)
+    assert profile_settings(None) is None
+
+    monkeypatch.setenv('ADFORGE_PROFILE_SAMPLE_EVERY', '4')
+    draws = []
+
+    def randrange(n):
+        draws.append(n)
+        return len(draws) % n
+
+    monkeypatch.setattr(profiling.random, 'randrange', randrange)
+    selected = [profile_settings(None) is not None for _ in range(8)]
+    assert draws == [4] * 8
+    assert selected == [False, False, False, True] * 2
+
+
+def test_invalid_settings_turn_profiling_off(monkeypatch, capsys):
+    for option in (
+        {'sample_every': 0},
+        {'sample_every': MAX_SAMPLE_EVERY + 1},
+        {'sample_every': 1.5},
+        {'sample_every': True},
+        {'sample_every': 'often'},
+        {'top_allocations': 0},
+    ):
+        assert profile_settings(option) is None
+    monkeypatch.setenv('ADFORGE_PROFILE_SAMPLE_EVERY', 'often')
+    assert profile_settings(None) is None
+    assert capsys.readouterr().err.count('WARNING: Ignoring invalid profile settings') == 7
+
+
+def _func(name):
+    return ('~', 0, name)
+
+
+def _stats(calls, self_s):
+    """pstats-shaped stats from {caller: {callee: edge seconds}} and each function's self time"""
+    cumulative = {}
+
+    def total(name):
+        if name not in cumulative:
+            cumulative[name] = self_s[name] + sum(calls.get(name, {}).values())
+        return cumulative[name]
+
+    entries = {}
+    for name in self_s:
+        callers = {
+            _func(caller): (1, 1, 0.0, edges[name])
+            for caller, edges in calls.items() if name in edges
+        }
+        entries[_func(name)] = (1, 1, self_s[name], total(name), callers)
+    return SimpleNamespace(stats=entries)
+
+
+def _read(path):
+    with open(path) as f:
+        return {line.rsplit(' ', 1)[0]: int(line.rsplit(' ', 1)[1]) for line in f}
+
+
+def test_time_is_split_between_callers(tmp_path):
+    # shared() runs 0.4 s in total: 0.1 s under left(), 0.3 s under right()
+    stats = _stats(
+        {'main': {'left': 0.2, 'right': 0.4}, 'left': {'shared': 0.1}, 'right': {'shared': 0.3}},
+        {'main': 0.1, 'left': 0.1, 'right': 0.1, 'shared': 0.4},
+    )
+    path = tmp_path / 'out.collapsed'
+    write_collapsed_stacks(stats, path)
+    assert _read(path) == {
+        'main': 100000,
+        'main;left': 100000,
+        'main;left;shared': 100000,
+        'main;right': 100000,
+        'main;right;shared': 300000,
+    }
+
+
+def test_exploding_call_graph_is_bounded(tmp_path):
+    # 40 levels of two functions that both call both functions of the next
+    # level: 2**40 paths from the root
+    levels = 40
+    self_s = {'root': 0.0}
+    calls = {}
+    # Every function at a level runs 1 ms itself plus the next level, whose
+    # time is split evenly between its two callers
+    below = 0.0
+    for level in reversed(range(levels)):
+        for name in (f'a{level}', f'b{level}'):
+            self_s[name] = 0.001
+            if level + 1 < levels:
+                calls[name] = {f'a{level + 1}': below / 2, f'b{level + 1}': below / 2}
+        below = 0.001 + below
+    calls['root'] = {'a0': below, 'b0': below}
+    stats = _stats(calls, self_s)
+
+    path = tmp_path / 'out.collapsed'
+    started = time.perf_counter()
+    write_collapsed_stacks(stats, path, max_stacks=2000)
+    assert time.perf_counter() - started < 5
+    lines = _read(path)
+    assert 0 < len(lines) <= 2 * 2000 + 1
+    # Unexpanded paths keep their cumulative time, so nothing is lost
+    root_us = stats.stats[_func('root')][3] * 1e6
+    assert abs(sum(lines.values()) - root_us) <= len(lines)
+
+
+def _busy():
+    return sum(i * i for i in range(20000))
+
+
+def test_real_profile_collapses_to_labelled_stacks(tmp_path):
+    profile = cProfile.Profile()
+    profile.enable()
+    _busy()
+    profile.disable()
+    path = tmp_path / 'out.collapsed'
+    write_collapsed_stacks(pstats.Stats(profile), path)
+    lines = _read(path)
+    assert any('test_profiling.py:_busy:' in stack for stack in lines)
+    assert all(value > 0 for value in lines.values())
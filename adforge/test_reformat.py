@@ -0,0 +1,108 @@
+"""
+Local background reformat (scripts/compositor/reformat.py, scripts/reformat_background.py)
+When a target ratio is reached by a salient crop and when the canvas is
+extended instead, what the extended canvas keeps of the source, degenerate
+source sizes, and the one-decode batch script. No browser needed:
+    pytest test_reformat.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'scripts'))
+
+from compositor.reformat import extend_canvas, plan_reformat, reformat_image, saliency_map  # noqa: E402
+
+GRAY = (200, 200, 200)
+STORY = (90, 160)
+
+
+def _with_box(box, color=(200, 30, 30), size=(600, 400)):
+    image = Image.new('RGB', size, GRAY)
+    ImageDraw.Draw(image).rectangle(box, fill=color)
+    return image
+
+
+def test_textured_photo_is_cropped_not_extended():
+    rng = np.random.default_rng(0)
+    noise = (rng.random((400, 600, 3)) * 255).astype(np.uint8)
+    image = Image.fromarray(noise).filter(ImageFilter.GaussianBlur(2))
+    box, method = plan_reformat(saliency_map(image), image.size, STORY)
+    assert method == 'crop'
+    assert box[3] - box[1] == 400
+    assert abs((box[2] - box[0]) / 400 - 90 / 160) < 0.01
+
+
+def test_crop_keeps_an_off_centre_subject():
+    image = _with_box((380, 160, 440, 240))
+    box, method = plan_reformat(saliency_map(image), image.size, STORY)
+    assert method == 'crop'
+    assert box[0] <= 380 and box[2] >= 441
+
+
+def test_subject_wider_than_the_crop_extends():
+    image = _with_box((60, 150, 540, 250), color=(30, 30, 200))
+    output, plan = reformat_image(image, STORY)
+    assert plan['method'] == 'extend'
+    x0, _, x1, _ = plan['crop_box']
+    assert x0 <= 60 and x1 >= 541
+    assert output.size == STORY
+
+
+def test_same_ratio_is_the_whole_source():
+    image = _with_box((10, 10, 20, 20))
+    assert plan_reformat(saliency_map(image), image.size, (300, 200)) == ((0, 0, 600, 400), 'crop')
+
+
+def test_extend_canvas_keeps_the_image_unchanged_in_its_interior():
+    image = _with_box((0, 0, 99, 49), color=(30, 120, 60), size=(100, 50))
+    output = extend_canvas(image, (100, 160))
+    assert output.size == (100, 160)
+    # Centred at y 55..105; only the feathered edges bordering the fill blend
+    interior = np.asarray(output)[55 + 12:105 - 12, :]
+    assert np.all(interior == (30, 120, 60))
+
+
+def test_degenerate_sources_do_not_crash():
+    for size in [(1, 1), (1000, 2), (2, 1000), (1200, 1)]:
+        output, plan = reformat_image(Image.new('RGB', size, GRAY), (20, 30))
+        assert output.size == (20, 30)
+        x0, y0, x1, y1 = plan['crop_box']
+        assert 0 <= x0 < x1 <= size[0] and 0 <= y0 < y1 <= size[1]
+
+
+def _run_script(job):
+    return subprocess.run(
+        [sys.executable, os.path.join(HERE, 'scripts', 'reformat_background.py')],
+        input=json.dumps(job), capture_output=True, text=True, cwd=os.path.join(HERE, 'scripts'),
+    )
+
+
+def test_reformat_background_writes_every_format(tmp_path):
+    source = tmp_path / 'bg.png'
+    _with_box((380, 160, 440, 240)).save(source)
+    result = _run_script({
+        'source_path': str(source),
+        'formats': {'9:16': {'width': 90, 'height': 160}, '1:1': {'width': 100, 'height': 100}},
+        'output_dir': str(tmp_path),
+    })
+    assert result.returncode == 0, result.stderr
+    outputs = {output['format']: output for output in json.loads(result.stdout)['outputs']}
+    assert set(outputs) == {'9:16', '1:1'}
+    for output in outputs.values():
+        with Image.open(output['output_path']) as image:
+            assert image.size == (output['width'], output['height'])
+    assert outputs['9:16']['output_path'].endswith('bg_9x16.jpg')
+
+
+def test_reformat_background_rejects_an_unknown_fill(tmp_path):
+    source = tmp_path / 'bg.png'
+    _with_box((10, 10, 20, 20)).save(source)
+    result = _run_script({'source_path': str(source), 'formats': {}, 'output_dir': str(tmp_path), 'fill': 'stretch'})
+    assert result.returncode != 0
+    assert "Unknown fill 'stretch'" in result.stderr
@@ -0,0 +1,177 @@
+"""
+Safe-zone ink validation (scripts/compositor/safe_zones.py)
+The report that decides whether final-assets answers 422: restricted zones,
+ink outside the union of safe zones, the tolerance edge, that a text
+background box counts as its layer box (rounded like the zones, as in the
+builder), and that animations are checked where their layers come to rest.
+No browser needed:
+    pytest test_safe_zones.py
+"""
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'scripts'))
+
+from compositor.animated import render_animated_asset  # noqa: E402
+from compositor.render import composite_final_asset  # noqa: E402
+from compositor.safe_zones import InkCoverage  # noqa: E402
+from compositor.variants import validate_safe_zone_variants  # noqa: E402
+
+# 100x100 canvas, so zone percentages are pixels
+LEFT_HALF = {'id': 'left', 'name': 'Left', 'type': 'safe', 'x': 0, 'y': 0, 'width': 50, 'height': 100}
+RIGHT_HALF = {'id': 'right', 'name': 'Right', 'type': 'safe', 'x': 50, 'y': 0, 'width': 50, 'height': 100}
+TOP_BAND = {'id': 'band', 'name': 'Top band', 'type': 'restricted', 'x': 0, 'y': 0, 'width': 100, 'height': 10}
+
+
+def _coverage(*boxes):
+    ink = InkCoverage(100, 100)
+    for index, box in enumerate(boxes):
+        ink.add_box(f'layer{index}', 'text', box)
+    return ink
+
+
+def test_ink_inside_safe_zone_is_valid():
+    report = _coverage((10, 20, 40, 30)).validate([LEFT_HALF, TOP_BAND])
+    assert report['valid'] and report['violations'] == []
+    assert report['outside_safe'] == {'layer0': 0.0}
+    assert report['zones'][0]['ink_pixels'] == 30 * 10
+    assert report['zones'][1]['ink_pixels'] == 0
+
+
+def test_ink_in_restricted_zone():
+    # 10x10 box, its top 5 rows inside the 100x10 band
+    report = _coverage((20, 5, 30, 15)).validate([TOP_BAND])
+    assert not report['valid']
+    band = report['zones'][0]
+    assert band['ink_pixels'] == 50
+    assert band['overlap_percent'] == 5.0
+    assert band['layers'] == {'layer0': 50.0}
+    assert report['violations'] == ['Ink covers 5.0% of restricted zone "Top band"']
+
+
+def test_ink_spanning_adjacent_safe_zones_is_inside_their_union():
+    report = _coverage((40, 40, 60, 50)).validate([LEFT_HALF, RIGHT_HALF])
+    assert report['valid']
+    assert report['outside_safe'] == {'layer0': 0.0}
+
+
+def test_ink_outside_every_safe_zone():
+    # Right half of the box is outside the only safe zone
+    report = _coverage((40, 40, 60, 50)).validate([LEFT_HALF])
+    assert not report['valid']
+    assert report['outside_safe'] == {'layer0': 50.0}
+    assert report['violations'] == ['Layer "layer0" has 50.0% of its ink outside every safe zone']
+
+
+def test_tolerance_edge():
+    # One of ten columns (10%) outside the safe zone
+    ink = _coverage((41, 40, 51, 50))
+    assert ink.validate([LEFT_HALF], tolerance_percent=10.0)['valid']
+    assert not ink.validate([LEFT_HALF], tolerance_percent=9.99)['valid']
+
+    # 50 ink pixels cover exactly 5% of the restricted band
+    ink = _coverage((20, 5, 30, 15))
+    assert ink.validate([TOP_BAND], tolerance_percent=5.0)['valid']
+    assert not ink.validate([TOP_BAND], tolerance_percent=4.99)['valid']
+
+
+def test_overlapping_layers_are_not_counted_twice():
+    report = _coverage((20, 0, 30, 10), (20, 0, 30, 10)).validate([TOP_BAND])
+    assert report['zones'][0]['ink_pixels'] == 100
+
+
+def _text_with_background():
+    # 200x100 canvas: the layer box is x 20..120, y 20..50
+    template = {
+        'layers': [{
+            'id': 'cta', 'type': 'text', 'name': 'cta', 'x': 10, 'y': 20, 'width': 50, 'height': 30,
+            'z_index': 1, 'font_size': 12, 'color': '#ff0000', 'background_color': '#ff0000',
+        }],
+        'safe_zones': [{'id': 'box', 'name': 'Box', 'type': 'safe', 'x': 10, 'y': 20, 'width': 50, 'height': 30}],
+    }
+    return template, {'cta': ''}
+
+
+def test_background_box_ink_is_the_layer_box(tmp_path):
+    template, copy_text = _text_with_background()
+    output = str(tmp_path / 'out.png')
+    ink = InkCoverage(200, 100)
+    composite_final_asset(template, 'http://127.0.0.1/unused.png', copy_text, None, output, 200, 100, ink=ink)
+
+    with Image.open(output) as image:
+        painted = np.all(np.asarray(image.convert('RGB')) == (255, 0, 0), axis=2)
+    recorded = np.zeros_like(painted)
+    for layer in ink.layers:
+        x0, y0 = layer['origin']
+        h, w = layer['mask'].shape
+        recorded[y0:y0 + h, x0:x0 + w] |= layer['mask']
+    # ImageDraw.rectangle is inclusive and paints x 20..120, y 20..50; the
+    # closing row and column are not counted, as in the builder
+    assert np.argwhere(recorded).min(axis=0).tolist() == [20, 20]
+    assert np.argwhere(recorded).max(axis=0).tolist() == [49, 119]
+    assert np.array_equal(recorded[:50, :120], painted[:50, :120])
+    assert np.argwhere(painted).max(axis=0).tolist() == [50, 120]
+
+
+def test_background_box_equal_to_its_safe_zone_is_valid():
+    template, copy_text = _text_with_background()
+    batch = validate_safe_zone_variants(template, [{'copy_text': copy_text}], width=200, height=100)
+    report = batch['variants'][0]
+    assert report['outside_safe'] == {'cta': 0.0}
+    assert report['valid']
+
+
+def test_zones_are_rounded_like_layers():
+    # 33.3% of 1080 px is 359.64: rounding the zone to 360 while the layer
+    # truncates to 359 would put the layer's first column outside its own zone
+    geometry = {'x': 33.3, 'y': 33.3, 'width': 33.3, 'height': 33.3}
+    zone = {'id': 'middle', 'name': 'Middle', 'type': 'safe', **geometry}
+    template = {
+        'layers': [{'id': 'box', 'type': 'text', 'name': 'cta', 'z_index': 1, 'background_color': '#000000', **geometry}],
+        'safe_zones': [zone],
+    }
+    batch = validate_safe_zone_variants(template, [{'copy_text': {'cta': ''}}], width=1080, height=1080)
+    report = batch['variants'][0]
+    assert report['valid']
+    assert report['zones'][0]['overlap_percent'] == 100.0
+
+
+def _animated_ink(tmp_path, keyframes):
+    # 200x100 canvas: the headline box is x 20..120, y 60..90
+    template = {'layers': [{
+        'id': 'headline', 'type': 'text', 'name': 'headline', 'x': 10, 'y': 60, 'width': 50, 'height': 30,
+        'z_index': 1, 'font_size': 12, 'color': '#000000',
+    }]}
+    animation = {'format': 'gif', 'fps': 10, 'duration_ms': 1000, 'keyframes': {'headline': keyframes}}
+    ink = InkCoverage(200, 100)
+    render_animated_asset(
+        template, 'http://127.0.0.1/unused.png', {'headline': 'Sale'}, animation,
+        output_path=str(tmp_path / 'out.gif'), width=200, height=100, ink=ink,
+    )
+    return ink
+
+
+def test_animated_ink_is_recorded_where_layers_come_to_rest(tmp_path):
+    lower = {'id': 'lower', 'name': 'Lower', 'type': 'safe', 'x': 0, 'y': 50, 'width': 100, 'height': 50}
+    upper = {'id': 'upper', 'name': 'Upper', 'type': 'restricted', 'x': 0, 'y': 0, 'width': 100, 'height': 50}
+
+    # Slides down from the upper half into the lower one
+    ink = _animated_ink(tmp_path, [{'t': 0, 'dy': -50}, {'t': 500, 'dy': 0}])
+    report = ink.validate([lower, upper])
+    assert report['valid']
+    assert report['zones'][1]['ink_pixels'] == 0
+
+    # Rests in the upper half instead
+    ink = _animated_ink(tmp_path, [{'t': 0, 'dy': 0}, {'t': 500, 'dy': -50}])
+    report = ink.validate([upper])
+    assert report['zones'][0]['ink_pixels'] > 0
+    assert not report['valid']
+
+
+def test_animated_layer_faded_out_at_rest_has_no_ink(tmp_path):
+    ink = _animated_ink(tmp_path, [{'t': 0, 'opacity': 1}, {'t': 500, 'opacity': 0}])
+    assert ink.layers == []
@@ -0,0 +1,151 @@
+"""
+Single-flight coalescing across processes (scripts/compositor/single_flight.py)
+One leader produces; every waiter reuses its result, and the waiters consume
+it together under a shared lock rather than one after another. A coalesced
+render keeps the leader's actual file format. No browser needed:
+    pytest test_single_flight.py
+"""
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'scripts'))
+
+from compositor.single_flight import SingleFlight  # noqa: E402
+
+WAITERS = 4
+PRODUCE_S = 0.6
+# Longer than the waiters' poll interval, so consuming one at a time would show
+CONSUME_S = 0.4
+
+
+def _flight(directory, fail_leader, results):
+    def produce(result_path):
+        time.sleep(PRODUCE_S)
+        if fail_leader and os.environ.get('SINGLE_FLIGHT_ROLE') == 'leader':
+            raise RuntimeError('leader failed')
+        with open(result_path, 'w') as f:
+            f.write(str(os.getpid()))
+        return os.getpid(), {'producer': os.getpid()}
+
+    def consume(result_path, meta):
+        with open(result_path) as f:
+            producer = int(f.read())
+        time.sleep(CONSUME_S)
+        return producer
+
+    try:
+        value, role = SingleFlight(directory).run('render', 'same-input', produce, consume)
+    except RuntimeError:
+        results.put({'pid': os.getpid(), 'role': 'failed', 'value': None, 'done': time.time()})
+        return
+    results.put({'pid': os.getpid(), 'role': role, 'value': value, 'done': time.time()})
+
+
+def _run(directory, fail_leader=False):
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+
+    os.environ['SINGLE_FLIGHT_ROLE'] = 'leader'
+    leader = context.Process(target=_flight, args=(directory, fail_leader, results))
+    leader.start()
+    time.sleep(0.1)
+    os.environ['SINGLE_FLIGHT_ROLE'] = 'waiter'
+    waiters = [context.Process(target=_flight, args=(directory, fail_leader, results)) for _ in range(WAITERS)]
+    for process in waiters:
+        process.start()
+    del os.environ['SINGLE_FLIGHT_ROLE']
+
+    outcomes = [results.get(timeout=30) for _ in range(WAITERS + 1)]
+    for process in [leader, *waiters]:
+        process.join(10)
+    return leader.pid, outcomes
+
+
+def test_waiters_reuse_the_leader_result_together(tmp_path):
+    leader_pid, outcomes = _run(str(tmp_path))
+
+    roles = sorted(outcome['role'] for outcome in outcomes)
+    assert roles == ['coalesced'] * WAITERS + ['leader']
+    assert {outcome['value'] for outcome in outcomes} == {leader_pid}
+
+    finished = [outcome['done'] for outcome in outcomes if outcome['role'] == 'coalesced']
+    # Consuming under an exclusive lock would spread these by at least CONSUME_S each
+    assert max(finished) - min(finished) < CONSUME_S
+
+    counters = SingleFlight(str(tmp_path)).counters()['render']
+    assert counters['leaders'] == 1 and counters['coalesced'] == WAITERS
+
+
+def test_one_waiter_takes_over_from_a_failed_leader(tmp_path):
+    _, outcomes = _run(str(tmp_path), fail_leader=True)
+
+    roles = sorted(outcome['role'] for outcome in outcomes)
+    assert roles == ['coalesced'] * (WAITERS - 1) + ['failed', 'takeover']
+    producer = next(outcome['pid'] for outcome in outcomes if outcome['role'] == 'takeover')
+    assert {outcome['value'] for outcome in outcomes if outcome['role'] == 'coalesced'} == {producer}
+
+
+def _animated_render(job, results):
+    import compositor.animation as animation
+    from compositor import cli
+
+    def webp_unsupported():
+        # Keep the leader rendering while the waiter arrives
+        time.sleep(0.5)
+        return False
+
+    animation.webp_animation_supported = webp_unsupported
+    sys.stdin = io.StringIO(json.dumps(job))
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+        cli.main()
+    results.put(json.loads(out.getvalue().strip().splitlines()[-1]))
+
+
+def test_coalesced_render_keeps_the_leader_format(tmp_path, monkeypatch):
+    background = tmp_path / 'bg.png'
+    Image.new('RGB', (32, 32), (40, 80, 120)).save(background)
+    monkeypatch.setenv('ADFORGE_SINGLE_FLIGHT_DIR', str(tmp_path / 'flights'))
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+
+    processes = []
+    for name in ('first', 'second'):
+        job = {
+            'mode': 'animated',
+            'template_data': {
+                'layers': [],
+                'safe_zones': [{'id': 'all', 'name': 'All', 'type': 'safe', 'x': 0, 'y': 0, 'width': 100, 'height': 100}],
+            },
+            'composite_url': background.as_uri(),
+            'copy_text': {},
+            'output_path': str(tmp_path / f'{name}.webp'),
+            'width': 32,
+            'height': 32,
+            'animation': {'format': 'webp', 'fps': 2, 'duration_ms': 1000, 'keyframes': {}},
+        }
+        process = context.Process(target=_animated_render, args=(job, results))
+        process.start()
+        processes.append(process)
+        time.sleep(0.1)
+
+    outcomes = [results.get(timeout=30) for _ in processes]
+    for process in processes:
+        process.join(10)
+    roles = sorted(outcome['single_flight']['flights'][-1]['role'] for outcome in outcomes)
+    assert roles == ['coalesced', 'leader']
+    # The leader fell back to GIF; the waiter's copy must not be named .webp.
+    # Both carry the safe-zone report of the at-rest frame
+    for outcome in outcomes:
+        assert outcome['safe_zones']['valid']
+        assert outcome['output_path'].endswith('.gif')
+        with Image.open(outcome['output_path']) as image:
+            assert image.format == 'GIF'